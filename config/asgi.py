@@ -2,6 +2,8 @@
 ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Run the site under ASGI to serve the live stock/price stream
+(store.views.product_events); the WSGI app answers it with 404.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -9,8 +11,17 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Web workers discover ModelAdmins on the first admin request, not at boot
+os.environ.setdefault('LAZY_ADMIN', '1')
 
 application = get_asgi_application()
+
+if settings.WARM_ON_START:
+    # Imported once apps are loaded; /readyz reports ready when this finishes
+    from config.warmup import on_ready
+
+    on_ready()
@@ -0,0 +1,41 @@
+"""
+Gunicorn server hooks.
+
+Use with ``gunicorn -c python:config.gunicorn config.wsgi``.
+
+Audit rows (store.audit) wait in a per-worker buffer for up to
+AUDIT_FLUSH_INTERVAL seconds. atexit only runs when the interpreter
+shuts down normally, so the buffer is also flushed from the worker's own
+exit hooks. Only a worker that is still busy at graceful_timeout, and is
+then SIGKILLed, loses what it had queued.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _flush_audit_buffer():
+    from django.apps import apps
+
+    # A worker that failed to boot has nothing queued
+    if not apps.ready:
+        return
+    from store.audit import buffer
+
+    try:
+        written = buffer.flush()
+    except Exception:
+        logger.exception('Could not flush the audit buffer on worker exit')
+    else:
+        if written:
+            logger.info('Flushed %s audit rows on worker exit', written)
+
+
+def worker_exit(server, worker):
+    """
+    Called in the worker as it exits: after a graceful stop, SIGINT/SIGQUIT,
+    or the SIGABRT sent when a request times out (by then that request's
+    transaction has been rolled back).
+    """
+    _flush_audit_buffer()
@@ -0,0 +1,45 @@
+"""
+Jinja2 environment for the storefront templates in ``store/jinja2/``.
+
+Enabled with STORE_TEMPLATE_ENGINE=jinja2 (see TEMPLATES in settings). The
+Django backend's ``request``, ``csrf_input``/``csrf_token`` and the
+``user``/``messages`` context processors already reach Jinja2 templates;
+this adds ``url()``, ``static()`` and a bytecode cache so worker restarts
+load compiled templates instead of re-parsing them.
+"""
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.templatetags.static import static
+from django.urls import reverse
+from jinja2 import Environment, FileSystemBytecodeCache
+
+
+def url(viewname, *args, **kwargs):
+    """``{% url 'store:product_filter' slug %}`` is ``{{ url('store:product_filter', slug) }}``."""
+    return reverse(viewname, args=args or None, kwargs=kwargs or None)
+
+
+def user_cart(user):
+    """
+    The customer's Cart or None. Django templates swallow the missing-cart
+    error on ``user.cart``; Jinja2 would raise it.
+    """
+    if not user.is_authenticated:
+        return None
+    try:
+        return user.cart
+    except ObjectDoesNotExist:
+        return None
+
+
+def environment(bytecode_cache_dir=None, **options):
+    # Compiled templates are shared between workers through the cache directory
+    # (the system temp dir when unset)
+    options.setdefault('bytecode_cache', FileSystemBytecodeCache(bytecode_cache_dir))
+    env = Environment(**options)
+    env.globals.update({
+        'url': url,
+        'static': static,
+        'user_cart': user_cart,
+    })
+    return env
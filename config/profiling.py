@@ -0,0 +1,273 @@
+"""
+On-demand request profiling for staff.
+
+A staff member creates a signed, short-lived trigger on the admin's
+Profiles page (/admin/profiles/). A request carrying it, as
+``?_profile=<token>`` or an ``X-Profile`` header, runs under cProfile
+plus a stack sampler. The report is written to PROFILE_REPORTS_DIR:
+
+- ``report.json``: request summary, the hottest functions and every SQL query;
+- ``stats.prof``: the raw cProfile data (pstats, snakeviz);
+- ``stacks.folded``: collapsed stacks for flamegraph.pl or speedscope.
+
+The directory is a ring buffer that keeps the newest PROFILE_REPORTS_MAX
+reports. A request without a trigger costs one dict lookup; one with a
+malformed or forged trigger is turned away before any database query.
+
+The middleware works in both sync and async stacks. Under ASGI the request
+is profiled from a worker thread, and the sync views below it run back in
+that thread (asgiref's thread-sensitive mode), where cProfile and the
+sampler can see them.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import shutil
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+from pathlib import Path
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db import connections
+from django.utils import timezone
+
+PROFILE_PARAM = '_profile'
+PROFILE_HEADER = 'X-Profile'
+TOKEN_SALT = 'config.profiling'
+TOKEN_MAX_AGE = 60 * 60
+# make_token() output is well under this; anything longer is not worth signing
+TOKEN_MAX_LENGTH = 200
+SAMPLE_INTERVAL = 0.001
+MAX_QUERIES = 1000
+TOP_FUNCTIONS = 60
+REPORT_ID_RE = re.compile(r'^\d{8}T\d{12}-[0-9a-f]{8}$')
+REPORT_FILES = {'json': 'report.json', 'prof': 'stats.prof', 'folded': 'stacks.folded'}
+
+_write_lock = threading.Lock()
+
+
+def make_token(user):
+    """A trigger valid for TOKEN_MAX_AGE seconds, tied to ``user`` staying staff."""
+    return signing.dumps({'user': user.pk}, salt=TOKEN_SALT, compress=True)
+
+
+def token_user(token):
+    """The active staff user a trigger was made by, or None if it is invalid or expired."""
+    # value:timestamp:signature; the signature is checked before the user is looked up
+    if len(token) > TOKEN_MAX_LENGTH or token.count(':') != 2:
+        return None
+    try:
+        payload = signing.loads(token, salt=TOKEN_SALT, max_age=TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    if not isinstance(payload, dict) or not isinstance(payload.get('user'), int):
+        return None
+    return get_user_model().objects.filter(pk=payload['user'], is_active=True, is_staff=True).first()
+
+
+def request_token(request):
+    return request.GET.get(PROFILE_PARAM) or request.headers.get(PROFILE_HEADER)
+
+
+def reports_dir():
+    return Path(settings.PROFILE_REPORTS_DIR)
+
+
+class StackSampler:
+    """Samples one thread's Python stack every ``interval`` seconds into folded-stack counts."""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._labels = {}
+        self._prefixes = sorted({str(settings.BASE_DIR), *filter(None, sys.path)}, key=len, reverse=True)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                label = self._labels.get(code)
+                if label is None:
+                    path = self._short_path(code.co_filename)
+                    label = self._labels[code] = f'{code.co_name} ({path}:{code.co_firstlineno})'
+                frames.append(label)
+                frame = frame.f_back
+            if frames:
+                self.stacks[';'.join(reversed(frames))] += 1
+
+    def _short_path(self, filename):
+        for prefix in self._prefixes:
+            if filename.startswith(prefix + os.sep):
+                return filename[len(prefix) + 1:]
+        return filename
+
+    def folded(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+class QueryRecorder:
+    """``connection.execute_wrapper`` that records each query's SQL and duration."""
+
+    def __init__(self, alias, queries):
+        self.alias = alias
+        self.queries = queries
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if len(self.queries) < MAX_QUERIES:
+                self.queries.append({
+                    'alias': self.alias,
+                    'sql': sql,
+                    'params': repr(params)[:500],
+                    'ms': round((time.perf_counter() - start) * 1000, 3),
+                })
+
+
+class ProfilingMiddleware:
+    """Profile requests that carry a valid trigger; pass everything else straight through."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = request_token(request)
+        if not token:
+            return self.get_response(request)
+        staff = token_user(token)
+        if staff is None:
+            return self.get_response(request)
+        return self.profile(request, staff, self.get_response)
+
+    async def __acall__(self, request):
+        token = request_token(request)
+        if not token:
+            return await self.get_response(request)
+        staff = await sync_to_async(token_user)(token)
+        if staff is None:
+            return await self.get_response(request)
+        return await sync_to_async(self.profile)(request, staff, async_to_sync(self.get_response))
+
+    def profile(self, request, staff, get_response):
+        queries = []
+        profiler = cProfile.Profile()
+        started_at = timezone.now()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(QueryRecorder(connection.alias, queries)))
+            sampler = stack.enter_context(StackSampler(threading.get_ident()))
+            profiler.enable()
+            try:
+                response = get_response(request)
+            finally:
+                profiler.disable()
+        duration = time.perf_counter() - start
+
+        report_id = save_report(request, response, staff, started_at, duration, profiler, sampler, queries)
+        response['X-Profile-Report'] = report_id
+        return response
+
+
+def _top_functions(profiler):
+    output = io.StringIO()
+    stats = pstats.Stats(profiler, stream=output)
+    stats.strip_dirs().sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+    return output.getvalue()
+
+
+def save_report(request, response, staff, started_at, duration, profiler, sampler, queries):
+    """Write one report directory and trim the ring buffer. Returns the report id."""
+    # Sortable by time, so the ring buffer can drop the oldest by name
+    report_id = f'{started_at:%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:8]}'
+    params = request.GET.copy()
+    params.pop(PROFILE_PARAM, None)
+    summary = {
+        'id': report_id,
+        'created_at': started_at.isoformat(),
+        'method': request.method,
+        'path': request.path + (f'?{params.urlencode()}' if params else ''),
+        'status': response.status_code,
+        'duration_ms': round(duration * 1000, 1),
+        'staff': staff.get_username(),
+        'query_count': len(queries),
+        'sql_ms': round(sum(query['ms'] for query in queries), 1),
+        'samples': sum(sampler.stacks.values()),
+        'top_functions': _top_functions(profiler),
+        'queries': queries,
+    }
+
+    root = reports_dir()
+    root.mkdir(parents=True, exist_ok=True)
+    # Build in a hidden directory, then rename, so the admin never lists half a report
+    building = root / f'.{report_id}'
+    building.mkdir()
+    profiler.dump_stats(building / REPORT_FILES['prof'])
+    (building / REPORT_FILES['folded']).write_text(sampler.folded())
+    (building / REPORT_FILES['json']).write_text(json.dumps(summary, indent=1))
+    os.replace(building, root / report_id)
+
+    with _write_lock:
+        for old_id in list_report_ids()[settings.PROFILE_REPORTS_MAX:]:
+            shutil.rmtree(root / old_id, ignore_errors=True)
+    return report_id
+
+
+def list_report_ids():
+    """Report ids, newest first."""
+    try:
+        names = os.listdir(reports_dir())
+    except FileNotFoundError:
+        return []
+    return sorted((name for name in names if REPORT_ID_RE.match(name)), reverse=True)
+
+
+def load_report(report_id):
+    """The stored summary, or None for an unknown id."""
+    if not REPORT_ID_RE.match(report_id):
+        return None
+    try:
+        return json.loads((reports_dir() / report_id / REPORT_FILES['json']).read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def report_file(report_id, kind):
+    """Path of one of a report's files, or None."""
+    if not REPORT_ID_RE.match(report_id) or kind not in REPORT_FILES:
+        return None
+    path = reports_dir() / report_id / REPORT_FILES[kind]
+    return path if path.is_file() else None
@@ -0,0 +1,67 @@
+"""
+Admin pages for config.profiling: the report list, report details and file
+downloads, and a form that makes signed profiling links.
+"""
+
+from django.contrib import admin
+from django.http import FileResponse, Http404
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from .profiling import (
+    PROFILE_HEADER, PROFILE_PARAM, TOKEN_MAX_AGE, list_report_ids, load_report, make_token, report_file,
+)
+
+
+def report_list(request):
+    reports = [report for report in map(load_report, list_report_ids()) if report]
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Request profiles',
+        'reports': reports,
+        'profile_param': PROFILE_PARAM,
+        'profile_header': PROFILE_HEADER,
+        'token_minutes': TOKEN_MAX_AGE // 60,
+    }
+    if request.method == 'POST':
+        target = request.POST.get('path', '').strip() or '/'
+        if not target.startswith('/'):
+            target = f'/{target}'
+        token = make_token(request.user)
+        separator = '&' if '?' in target else '?'
+        context['profile_link'] = request.build_absolute_uri(f'{target}{separator}{PROFILE_PARAM}={token}')
+        context['profile_token'] = token
+    return TemplateResponse(request, 'admin/profiling/report_list.html', context)
+
+
+def report_detail(request, report_id):
+    report = load_report(report_id)
+    if report is None:
+        raise Http404('No such profile report.')
+    context = {
+        **admin.site.each_context(request),
+        'title': f"Profile of {report['method']} {report['path']}",
+        'report': report,
+        'slowest_queries': sorted(report['queries'], key=lambda query: query['ms'], reverse=True)[:20],
+    }
+    return TemplateResponse(request, 'admin/profiling/report_detail.html', context)
+
+
+def report_download(request, report_id, kind):
+    path = report_file(report_id, kind)
+    if path is None:
+        raise Http404('No such profile file.')
+    return FileResponse(path.open('rb'), as_attachment=True, filename=f'{report_id}-{path.name}')
+
+
+def get_urls():
+    # admin_view() limits these to active staff, like the rest of the admin
+    return [
+        path('profiles/', admin.site.admin_view(report_list), name='profiling_reports'),
+        path('profiles/<str:report_id>/', admin.site.admin_view(report_detail), name='profiling_report'),
+        path(
+            'profiles/<str:report_id>/<str:kind>/',
+            admin.site.admin_view(report_download),
+            name='profiling_report_file',
+        ),
+    ]
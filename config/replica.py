@@ -0,0 +1,169 @@
+"""
+Read replica for the SQLite database.
+
+The replica is a file copy of the primary made with SQLite's online backup
+API (``manage.py refresh_replica``), swapped into place atomically so readers
+never block on the copy. Each copy records when its snapshot was taken,
+which gives the replica lag.
+
+Routing (config.routers.ReplicaRouter) sends catalog reads made while
+serving a request to the replica, unless the request is *pinned* to the
+primary: unsafe requests, the admin's edit views, requests that have
+already written or are inside a transaction, and any request within
+REPLICA_PIN_SECONDS of the same browser's last write, so a shopper always
+reads their own cart changes.
+"""
+
+import contextvars
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+REPLICA_ALIAS = 'replica'
+PIN_COOKIE = 'db_pin'
+LAG_CHECK_SECONDS = 5
+
+# Per-request {'pinned': bool, 'wrote': bool}; the replica is only used
+# while one is installed (by ReplicaPinMiddleware or replica_reads()), so
+# management commands and task workers always read the primary. A mutable
+# dict so updates made in copied contexts (sync_to_async) are seen.
+_request_state = contextvars.ContextVar('replica_request_state', default=None)
+_lag_lock = threading.Lock()
+_lag_checked = {'at': 0.0, 'lag': None}
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def can_read_replica():
+    state = _request_state.get()
+    if state is None or state['pinned']:
+        return False
+    # Reads inside a write transaction must see that transaction's data
+    return not connections['default'].in_atomic_block
+
+
+def note_write():
+    """Called by the router for every write; the response then pins the browser."""
+    state = _request_state.get()
+    if state is not None:
+        state['wrote'] = state['pinned'] = True
+
+
+@contextmanager
+def replica_reads(pinned=False):
+    """Route reads inside the block like a storefront request would."""
+    state = {'pinned': pinned, 'wrote': False}
+    token = _request_state.set(state)
+    try:
+        yield state
+    finally:
+        _request_state.reset(token)
+
+
+def refresh_replica():
+    """
+    Copy the primary into the replica file. Returns the snapshot time; the
+    backup runs against a temporary file that then replaces the replica.
+    """
+    primary_path = settings.DATABASES['default']['NAME']
+    replica_path = settings.DB_REPLICA_PATH
+    temp_path = f'{replica_path}.tmp'
+
+    snapshot_at = time.time()
+    source = sqlite3.connect(primary_path)
+    target = sqlite3.connect(temp_path)
+    try:
+        source.backup(target)
+        # The copy inherits the primary's WAL mode; a rollback journal lets
+        # it be opened read-only without -wal/-shm files
+        target.execute('PRAGMA journal_mode = DELETE')
+        target.execute(
+            'CREATE TABLE IF NOT EXISTS replica_status '
+            '(id INTEGER PRIMARY KEY CHECK (id = 1), snapshot_at REAL NOT NULL)'
+        )
+        target.execute('INSERT OR REPLACE INTO replica_status (id, snapshot_at) VALUES (1, ?)', (snapshot_at,))
+        target.commit()
+    finally:
+        target.close()
+        source.close()
+    os.replace(temp_path, replica_path)
+    return snapshot_at
+
+
+def replica_lag():
+    """Seconds since the replica's snapshot, or None when there is no usable replica."""
+    if not replica_configured():
+        return None
+    # A private connection: the file is swapped on every refresh, and this
+    # must not disturb a query the request has open on the replica alias
+    try:
+        connection = sqlite3.connect(f'file:{settings.DB_REPLICA_PATH}?mode=ro', uri=True)
+        try:
+            row = connection.execute('SELECT snapshot_at FROM replica_status WHERE id = 1').fetchone()
+        finally:
+            connection.close()
+    except sqlite3.Error:
+        return None
+    return max(time.time() - row[0], 0.0) if row else None
+
+
+def replica_is_fresh():
+    """Whether the replica is within REPLICA_MAX_LAG, re-checked every few seconds."""
+    now = time.monotonic()
+    with _lag_lock:
+        if now - _lag_checked['at'] < LAG_CHECK_SECONDS:
+            lag = _lag_checked['lag']
+            return lag is not None and lag <= settings.REPLICA_MAX_LAG
+    lag = replica_lag()
+    with _lag_lock:
+        _lag_checked.update(at=now, lag=lag)
+    return lag is not None and lag <= settings.REPLICA_MAX_LAG
+
+
+class ReplicaPinMiddleware:
+    """Pin requests that must see the primary; remember writers with a short-lived cookie."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with replica_reads(self.pinned(request)) as state:
+            response = self.get_response(request)
+        return self.remember_writer(response, state)
+
+    async def __acall__(self, request):
+        # Views run by sync_to_async get a copy of this context, and with it the same state dict
+        with replica_reads(self.pinned(request)) as state:
+            response = await self.get_response(request)
+        return self.remember_writer(response, state)
+
+    def pinned(self, request):
+        return request.method not in ('GET', 'HEAD', 'OPTIONS') or PIN_COOKIE in request.COOKIES
+
+    def remember_writer(self, response, state):
+        if state['wrote']:
+            # Long enough for the next refresh to include this write
+            response.set_cookie(PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _request_state.get()
+        match = request.resolver_match
+        # Admin changelists are report reads; change forms must not load stale rows
+        if state and match and 'admin' in match.namespaces and not (match.url_name or '').endswith('_changelist'):
+            state['pinned'] = True
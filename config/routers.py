@@ -0,0 +1,39 @@
+"""
+Database router for the optional read replica (see config.replica).
+"""
+
+from .replica import REPLICA_ALIAS, can_read_replica, note_write, replica_is_fresh
+
+# Catalog and reporting data that can be read slightly stale. Carts, users,
+# sessions and everything else always use the primary.
+REPLICA_READ_MODELS = {
+    'store.category',
+    'store.product',
+    'store.productimage',
+    'store.productattribute',
+    'store.productattributevalue',
+    'store.pricehistory',
+    'store.priceschedule',
+    'store.order',
+    'store.orderitem',
+    'store.stockmovement',
+}
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.label_lower not in REPLICA_READ_MODELS or not can_read_replica():
+            return 'default'
+        # Fall back to the primary when the replica is missing or too far behind
+        return REPLICA_ALIAS if replica_is_fresh() else 'default'
+
+    def db_for_write(self, model, **hints):
+        note_write()
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
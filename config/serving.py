@@ -0,0 +1,146 @@
+"""
+Production file serving for MEDIA_ROOT and STATIC_ROOT.
+
+Replaces ``django.views.static.serve`` (DEBUG only, no ranges or caching)
+with a view that streams files through ``FileResponse`` so WSGI servers
+with ``wsgi.file_wrapper`` (gunicorn, uWSGI) hand them to ``sendfile()``,
+answers conditional and ``Range`` requests, serves the ``.br``/``.gz``
+copies written at collectstatic time, and marks content-hashed files as
+immutable.
+"""
+
+import mimetypes
+import re
+from pathlib import Path
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotAllowed
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+# Manifest fingerprints ("app.3f2a9c1b7d4e.css") and content-addressed
+# names (a sha256 hex digest) never change content, so cache them forever
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.[^/.]+$|[0-9a-f]{32,}')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+DEFAULT_CACHE_CONTROL = 'public, max-age=3600'
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+PRECOMPRESSED_VARIANTS = (('br', '.br'), ('gzip', '.gz'))
+
+
+class RangeFile:
+    """File wrapper that stops reading after ``length`` bytes."""
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        size = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    Parse a single-range ``Range`` header into (start, end) inclusive.
+    Returns None to serve the whole file, or False if unsatisfiable.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.group(1) == match.group(2) == '':
+        return None
+    start, end = match.groups()
+    if start == '':
+        # Suffix range: the last N bytes
+        length = int(end)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def serve_file(request, path, document_root, precompressed=False):
+    """
+    Serve ``path`` from ``document_root``. With ``precompressed`` a ``.br`` or
+    ``.gz`` sibling is sent when the client accepts that encoding.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    try:
+        fullpath = Path(safe_join(document_root, path))
+    except SuspiciousFileOperation:
+        raise Http404('Invalid path')
+    if not fullpath.is_file():
+        raise Http404(f'"{path}" does not exist')
+
+    serve_path, encoding = fullpath, None
+    if precompressed:
+        accepted = request.headers.get('Accept-Encoding', '')
+        for candidate, suffix in PRECOMPRESSED_VARIANTS:
+            variant = fullpath.with_name(fullpath.name + suffix)
+            if candidate in accepted and variant.is_file():
+                serve_path, encoding = variant, candidate
+                break
+
+    stat = serve_path.stat()
+    etag = quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}' + (f'-{encoding}' if encoding else ''))
+    last_modified = int(stat.st_mtime)
+
+    def add_headers(response):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = (
+            IMMUTABLE_CACHE_CONTROL if HASHED_NAME_RE.search(fullpath.name) else DEFAULT_CACHE_CONTROL
+        )
+        if precompressed:
+            response['Vary'] = 'Accept-Encoding'
+        return response
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return add_headers(not_modified)
+
+    content_type = mimetypes.guess_type(fullpath.name)[0] or 'application/octet-stream'
+    size = stat.st_size
+
+    # Byte ranges are only offered on the identity encoding
+    byte_range = None
+    range_header = request.headers.get('Range')
+    if range_header and encoding is None:
+        if_range = request.headers.get('If-Range')
+        if not if_range or if_range == etag:
+            byte_range = parse_range(range_header, size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return add_headers(response)
+
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type)
+        response['Content-Length'] = size
+    elif byte_range:
+        start, end = byte_range
+        file = serve_path.open('rb')
+        file.seek(start)
+        response = FileResponse(RangeFile(file, end - start + 1), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = end - start + 1
+    else:
+        # A real file object lets the WSGI server use sendfile()
+        response = FileResponse(serve_path.open('rb'), content_type=content_type)
+
+    response['Accept-Ranges'] = 'bytes'
+    if encoding:
+        response['Content-Encoding'] = encoding
+    return add_headers(response)
@@ -31,12 +31,19 @@ ALLOWED_HOSTS = ["gn5918857.pythonanywhere.com", "localhost"]
 
 # Application definition
 
+# Startup trimming for web workers (see config.wsgi / config.asgi):
+# STOREFRONT_ONLY serves just the shop, leaving out the admin and DRF apps;
+# LAZY_ADMIN defers discovering every app's admin.py to the first admin URL.
+STOREFRONT_ONLY = os.environ.get('STOREFRONT_ONLY', '').lower() in ('1', 'true', 'yes')
+LAZY_ADMIN = os.environ.get('LAZY_ADMIN', '').lower() in ('1', 'true', 'yes')
+
 INSTALLED_APPS = [
     'users.apps.UsersConfig',  # Add your users app here
     'store.apps.StoreConfig',
+    'taskqueue.apps.TaskqueueConfig',
     'rest_framework',       
     'rest_framework.authtoken',
-    'django.contrib.admin',
+    'django.contrib.admin.apps.SimpleAdminConfig' if LAZY_ADMIN else 'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -44,6 +51,12 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
 ]
 
+if STOREFRONT_ONLY:
+    INSTALLED_APPS = [
+        app for app in INSTALLED_APPS
+        if not app.startswith(('rest_framework', 'django.contrib.admin'))
+    ]
+
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
@@ -55,7 +68,7 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'config.urls'
+ROOT_URLCONF = 'config.urls_storefront' if STOREFRONT_ONLY else 'config.urls'
 
 TEMPLATES = [
     {
@@ -72,19 +85,119 @@ TEMPLATES = [
     },
 ]
 
+# Optional Jinja2 engine for the storefront pages in store/jinja2/.
+# Listed first when enabled, so it wins for the templates it has; everything
+# else (admin, users, cart) falls through to the Django engine.
+JINJA2_TEMPLATES = {
+    'BACKEND': 'django.template.backends.jinja2.Jinja2',
+    'DIRS': [],
+    'APP_DIRS': True,
+    'OPTIONS': {
+        'environment': 'config.jinja2.environment',
+        'bytecode_cache_dir': os.environ.get('JINJA2_BYTECODE_CACHE_DIR'),
+        'context_processors': [
+            'django.contrib.auth.context_processors.auth',
+            'django.contrib.messages.context_processors.messages',
+        ],
+    },
+}
+
+if os.environ.get('STORE_TEMPLATE_ENGINE', 'django') == 'jinja2':
+    TEMPLATES.insert(0, JINJA2_TEMPLATES)
+
 WSGI_APPLICATION = 'config.wsgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Per-connection SQLite tuning, run on every new connection (and so by
+# config.warmup when a worker starts): a 20 MB page cache, in-memory temp
+# tables and memory-mapped reads. The primary also runs in WAL mode so
+# readers don't block the writer.
+SQLITE_PRAGMAS = 'PRAGMA cache_size = -20000; PRAGMA temp_store = MEMORY; PRAGMA mmap_size = 134217728'
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {'init_command': f'PRAGMA journal_mode = WAL; {SQLITE_PRAGMAS}'},
+        # A file, like production: concurrent writers in an in-memory test
+        # database get "table is locked" errors instead of waiting their turn
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+    }
+}
+
+# Optional read-only replica for catalog reads, refreshed from the primary by
+# `manage.py refresh_replica --interval N` (see config.replica). Reads fall
+# back to the primary when the copy is older than REPLICA_MAX_LAG seconds.
+DB_REPLICA_PATH = os.environ.get('DB_REPLICA_PATH')
+REPLICA_MAX_LAG = int(os.environ.get('REPLICA_MAX_LAG', 60))
+# How long a browser keeps reading the primary after it writes
+REPLICA_PIN_SECONDS = REPLICA_MAX_LAG
+
+if DB_REPLICA_PATH:
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f'file:{DB_REPLICA_PATH}?mode=ro',
+        'OPTIONS': {'uri': True, 'init_command': SQLITE_PRAGMAS},
+        'TEST': {'MIRROR': 'default'},
     }
+    DATABASE_ROUTERS = ['config.routers.ReplicaRouter']
+    MIDDLEWARE.insert(1, 'config.replica.ReplicaPinMiddleware')
+
+# Warm caches in the background when a web worker starts (config.warmup);
+# /readyz answers 503 until that is done.
+WARM_ON_START = os.environ.get('WARM_ON_START', 'true').lower() in ('1', 'true', 'yes')
+
+# Staff request profiling (config.profiling): signed ?_profile= links made on
+# /admin/profiles/; the newest PROFILE_REPORTS_MAX reports are kept on disk.
+# Outermost, so the report covers every other middleware too.
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+PROFILE_REPORTS_DIR = os.environ.get('PROFILE_REPORTS_DIR', os.path.join(BASE_DIR, 'profiles'))
+PROFILE_REPORTS_MAX = int(os.environ.get('PROFILE_REPORTS_MAX', 50))
+
+if PROFILING_ENABLED:
+    MIDDLEWARE.insert(0, 'config.profiling.ProfilingMiddleware')
+
+
+# Password hashing
+# https://docs.djangoproject.com/en/5.2/topics/auth/passwords/
+# PASSWORD_HASHER_PROFILE picks the hasher used for new and upgraded hashes;
+# the other tuned hashers stay listed so existing hashes still verify and are
+# rehashed transparently on the next successful login.
+# Run `manage.py calibrate_hasher` on the deployment host to tune the costs.
+# The costs below are Django's own defaults, not calibrated ones: until the
+# calibrated values are put here (or PASSWORD_PBKDF2_ITERATIONS is set), the
+# default 'pbkdf2' profile hashes exactly like Django's stock PBKDF2.
+# `manage.py bench_login` shows what each profile does to login throughput.
+
+PASSWORD_HASHER_PROFILE = os.environ.get('PASSWORD_HASHER_PROFILE', 'pbkdf2')
+
+PASSWORD_HASHER_PARAMS = {
+    'pbkdf2': {'iterations': int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 1_000_000))},
+    'scrypt': {'work_factor': 2 ** 14, 'block_size': 8, 'parallelism': 1},
+    'argon2': {'time_cost': 2, 'memory_cost': 102400, 'parallelism': 8},
 }
 
+_PASSWORD_HASHER_CLASSES = {
+    'pbkdf2': 'users.hashers.TunedPBKDF2PasswordHasher',
+    'scrypt': 'users.hashers.TunedScryptPasswordHasher',
+    'argon2': 'users.hashers.TunedArgon2PasswordHasher',
+}
+
+PASSWORD_HASHERS = [_PASSWORD_HASHER_CLASSES[PASSWORD_HASHER_PROFILE]] + [
+    hasher for profile, hasher in _PASSWORD_HASHER_CLASSES.items()
+    if profile != PASSWORD_HASHER_PROFILE
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+
+# Login throttling (users.ratelimit), counters are kept in the default cache.
+# LOGIN_RATE_LIMIT overrides any of users.ratelimit.DEFAULT_LOGIN_RATE_LIMIT.
+LOGIN_RATE_LIMIT = {}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -105,6 +218,27 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Background tasks (taskqueue app)
+# Eager mode runs tasks inline after commit instead of queueing them for
+# `manage.py run_workers`; handy for local development and tests.
+
+TASKQUEUE_EAGER = os.environ.get('TASKQUEUE_EAGER', '').lower() in ('1', 'true', 'yes')
+TASKQUEUE_RETRY_BACKOFF = 10
+TASKQUEUE_LOCK_TIMEOUT = 15 * 60
+
+
+# Audit log (store.audit)
+# Product price/stock/availability diffs and product/cart admin history are
+# queued after commit and written in batches by a background thread: every
+# AUDIT_FLUSH_INTERVAL seconds or once AUDIT_FLUSH_SIZE rows are waiting.
+# Under gunicorn, run with -c python:config.gunicorn so workers flush on exit.
+# Unbuffered mode writes them right after commit; handy for tests.
+
+AUDIT_BUFFERED = os.environ.get('AUDIT_BUFFERED', 'true').lower() in ('1', 'true', 'yes')
+AUDIT_FLUSH_INTERVAL = 2.0
+AUDIT_FLUSH_SIZE = 200
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -128,6 +262,30 @@ MEDIA_URL = '/media/'
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# collectstatic writes content-hashed names plus .gz/.br copies
+# (.br needs the optional `brotli` package); product images are named by
+# their SHA-256 so duplicate uploads share one file
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'config.storage.CompressedManifestStaticFilesStorage',
+    },
+    # ProductImage files, stored once per distinct content (store.images)
+    'product_images': {
+        'BACKEND': 'config.storage.ContentAddressedStorage',
+    },
+}
+
+# Serve MEDIA_URL/STATIC_URL from Django (config.serving) with Range, ETag
+# and Cache-Control support. Turn off when nginx or a CDN serves them.
+SERVE_FILES = os.environ.get('SERVE_FILES', 'true').lower() in ('1', 'true', 'yes')
+
+# Absolute base for the links in the sitemap and product feed files
+# (written under MEDIA_ROOT/feeds by `manage.py build_feeds`)
+SITE_URL = os.environ.get('SITE_URL', 'http://localhost:8000').rstrip('/')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
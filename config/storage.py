@@ -0,0 +1,137 @@
+"""
+Content-hashed file storages.
+
+``CompressedManifestStaticFilesStorage``: ``collectstatic`` writes
+content-hashed copies (``app.3f2a9c1b7d4e.css``) through Django's manifest
+storage, then stores ``.gz`` and, when the optional ``brotli`` package is
+installed, ``.br`` siblings so the file server never compresses on the fly.
+
+``ContentAddressedStorage``: uploads are hashed while they are streamed to
+disk and stored once under their SHA-256, so uploading the same photo again
+reuses the existing file. Which rows use a file is tracked by the caller
+(store.images).
+"""
+
+import gzip
+import hashlib
+import os
+import tempfile
+import time
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.mjs', '.svg', '.json', '.map', '.txt', '.html', '.xml', '.ico')
+MIN_COMPRESS_SIZE = 256
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    # Fall back to the plain name instead of raising when an asset was not
+    # collected (e.g. in tests or before the first collectstatic)
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Not collected yet, so there is nothing to hash
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        # Files may be yielded more than once across the manifest passes;
+        # compress only the final hashed name of each
+        processed = {}
+        for name, hashed_name, result in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(result, Exception):
+                processed[name] = hashed_name
+            yield name, hashed_name, result
+
+        if dry_run:
+            return
+        for name, hashed_name in processed.items():
+            for compressed_name in self.compress(hashed_name):
+                yield name, compressed_name, True
+
+    def compress(self, name):
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return []
+        with self.open(name) as original:
+            content = original.read()
+        if len(content) < MIN_COMPRESS_SIZE:
+            return []
+
+        variants = [('.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(content)))
+
+        written = []
+        for suffix, compressed in variants:
+            # Only keep variants that actually save bytes
+            if len(compressed) >= len(content):
+                continue
+            compressed_name = name + suffix
+            if self.exists(compressed_name):
+                self.delete(compressed_name)
+            self._save(compressed_name, ContentFile(compressed))
+            written.append(compressed_name)
+        return written
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Saves ``<upload_to>/<h[:2]>/<h[2:4]>/<h><ext>`` where ``h`` is the
+    content's SHA-256; the uploaded file name only contributes its
+    extension. Writes go to a temporary file that is renamed into place,
+    so concurrent uploads of the same content are safe.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # The name is chosen by _save from the content; identical content
+        # is meant to land on the same name
+        return name
+
+    @staticmethod
+    def blob_name(directory, digest, extension):
+        return os.path.join(directory, digest[:2], digest[2:4], digest + extension.lower())
+
+    def _save(self, name, content):
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1]
+        root = self.path(directory)
+        os.makedirs(root, exist_ok=True)
+
+        sha256 = hashlib.sha256()
+        handle, temp_path = tempfile.mkstemp(dir=root, prefix='.upload-')
+        try:
+            with os.fdopen(handle, 'wb') as temp_file:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    sha256.update(chunk)
+                    temp_file.write(chunk)
+
+            blob_name = self.blob_name(directory, sha256.hexdigest(), extension)
+            blob_path = self.path(blob_name)
+            if os.path.exists(blob_path):
+                # Already stored: refresh its mtime so garbage collection
+                # leaves a blob alone right after an upload reused it
+                os.utime(blob_path)
+            else:
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(temp_path, self.file_permissions_mode)
+                os.replace(temp_path, blob_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+        return blob_name.replace('\\', '/')
+
+    def age(self, name):
+        """Seconds since ``name`` was last written or reused."""
+        return time.time() - os.path.getmtime(self.path(name))
@@ -14,17 +14,53 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
-from django.urls import path, include
-from django.conf import settings 
-from django.conf.urls.static import static 
+from django.urls.resolvers import RoutePattern, URLResolver
 
+from .urls_storefront import urlpatterns as storefront_urlpatterns
 
-urlpatterns = [
-    path('admin/', admin.site.urls),
-    path('users/', include('users.urls')),
-    path('', include('store.urls')),
-]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+class LazyURLResolver(URLResolver):
+    """
+    Resolver whose URLconf is imported on first use. The parent resolver
+    populates its children eagerly on the first reverse() of *any* URL, so
+    that populate is skipped until a lookup inside this resolver needs it.
+    """
+
+    needed = False
+
+    def _populate(self):
+        if self.needed:
+            super()._populate()
+
+    @property
+    def reverse_dict(self):
+        self.needed = True
+        return super().reverse_dict
+
+    @property
+    def namespace_dict(self):
+        self.needed = True
+        return super().namespace_dict
+
+    @property
+    def app_dict(self):
+        self.needed = True
+        return super().app_dict
+
+
+def lazy_include(route, urlconf_module, namespace):
+    """
+    Like include(), but the URLconf module is imported the first time a URL
+    under ``route`` is resolved or reversed instead of at startup.
+    """
+    return LazyURLResolver(
+        RoutePattern(route, is_endpoint=False),
+        urlconf_module,
+        app_name=namespace,
+        namespace=namespace,
+    )
+
+
+urlpatterns = [
+    lazy_include('admin/', 'config.urls_admin', 'admin'),
+] + storefront_urlpatterns
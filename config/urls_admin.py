@@ -0,0 +1,15 @@
+"""
+Admin URLs, imported on first use through config.urls.lazy_include().
+
+Web workers install the admin as SimpleAdminConfig (see config.wsgi), so the
+admin modules of every app are only discovered here, on the first admin
+request or reverse().
+"""
+from django.contrib import admin
+
+from . import profiling_admin
+
+admin.autodiscover()
+
+app_name = 'admin'
+urlpatterns = profiling_admin.get_urls() + admin.site.get_urls()
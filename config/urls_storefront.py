@@ -0,0 +1,48 @@
+"""
+Storefront-only URL configuration.
+
+Used as ROOT_URLCONF when STOREFRONT_ONLY is set, so storefront workers
+never import the admin. config.urls extends these patterns with the admin.
+"""
+import re
+
+from django.urls import path, re_path, include
+from django.conf import settings
+
+from store.feeds import feeds_root
+
+from .serving import serve_file
+from .warmup import healthz, readyz
+
+
+def file_route(prefix, document_root, **kwargs):
+    return re_path(
+        r'^%s(?P<path>.+)$' % re.escape(prefix.lstrip('/')),
+        serve_file,
+        {'document_root': document_root, **kwargs},
+    )
+
+
+urlpatterns = [
+    # Load balancer probes; /readyz stays 503 until config.warmup has run
+    path('healthz', healthz, name='healthz'),
+    path('readyz', readyz, name='readyz'),
+    path('users/', include('users.urls')),
+    # Sitemap and product feed files written by `manage.py build_feeds`
+    re_path(
+        r'^(?P<path>sitemap(?:-[\w-]+)?\.xml|products\.(?:csv|xml))$', serve_file,
+        {'document_root': feeds_root(), 'precompressed': True}, name='feed_file',
+    ),
+]
+
+# Media and collected static files, unless a front-end server handles them.
+# Must come before the store's catch-all category/product slugs.
+if settings.SERVE_FILES:
+    urlpatterns += [
+        file_route(settings.MEDIA_URL, settings.MEDIA_ROOT),
+        file_route(settings.STATIC_URL, settings.STATIC_ROOT, precompressed=True),
+    ]
+
+urlpatterns += [
+    path('', include('store.urls')),
+]
@@ -0,0 +1,227 @@
+"""
+Cache warm-up for freshly started workers, and the health endpoints.
+
+``warm_caches()`` runs the steps a worker would otherwise pay for on its
+first requests:
+
+1. compile every project template on every template engine;
+2. open each database connection, which applies SQLITE_PRAGMAS;
+3. fill the shared caches: category tree and permissions version, and
+   build the search typeahead index;
+4. render the hot storefront pages in priority order (home page, the
+   categories with the most recent cart activity, the other top-level
+   categories, the most-carted products). That loads the stock cache,
+   code paths and the SQLite page cache.
+
+Storefront pages embed a per-visitor CSRF token, so no rendered page or
+fragment is cached; the caches the pages read from are.
+
+``on_ready()`` (called by config.wsgi and config.asgi when WARM_ON_START is
+set) runs warm-up in a background thread. ``/readyz`` answers 503 until it
+has finished, so a load balancer only routes to warm workers. ``/healthz``
+only says the process is up. Under ``gunicorn --preload`` on_ready() runs in
+the master; a worker forked while warm-up was still running starts its own
+(the thread does not survive the fork), one forked after it inherits the
+warm caches.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import DatabaseError, connections
+from django.db.models import Count
+from django.http import JsonResponse
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+from django.urls import resolve, reverse
+from django.utils import timezone
+from django.views.decorators.cache import never_cache
+
+logger = logging.getLogger(__name__)
+
+HOT_CATEGORIES = 20
+HOT_PRODUCTS = 50
+CART_ACTIVITY_DAYS = 7
+
+_warming = threading.Event()
+_warmed = threading.Event()
+# Process that started warm-up
+_warming_pid = None
+
+
+def preload_templates():
+    """Compile the project's templates on each engine. Returns the number loaded."""
+    base_dir = Path(settings.BASE_DIR).resolve()
+    loaded = 0
+    for engine in engines.all():
+        for directory in engine.template_dirs:
+            directory = Path(directory).resolve()
+            # Third-party templates (the admin's) are left to first use
+            if not directory.is_relative_to(base_dir) or not directory.is_dir():
+                continue
+            for path in sorted(directory.rglob('*')):
+                if not path.is_file() or path.suffix not in ('.html', '.txt', '.xml'):
+                    continue
+                try:
+                    engine.get_template(path.relative_to(directory).as_posix())
+                except (TemplateDoesNotExist, TemplateSyntaxError):
+                    logger.exception('Could not preload template %s', path)
+                    continue
+                loaded += 1
+    return loaded
+
+
+def open_connections():
+    """Connect to every database (running its init_command pragmas). Returns the aliases."""
+    aliases = []
+    for connection in connections.all():
+        connection.ensure_connection()
+        aliases.append(connection.alias)
+    return aliases
+
+
+def fill_shared_caches():
+    from store.catalog import get_category_tree
+    from store.typeahead import build_index
+    from users.roles import get_permissions_version
+
+    get_permissions_version()
+    get_category_tree()
+    return len(build_index().products)
+
+
+def hot_paths(categories=HOT_CATEGORIES, products=HOT_PRODUCTS):
+    """Storefront paths to render, most valuable first."""
+    from store.catalog import get_category_tree
+    from store.models import CartItem, Product
+
+    paths = [reverse('store:product_list')]
+    active = {node['id']: node for node in get_category_tree()}
+    recent_items = CartItem.objects.filter(
+        cart__updated_at__gte=timezone.now() - timedelta(days=CART_ACTIVITY_DAYS),
+        product__is_available=True,
+        product__category_id__in=active,
+    ).order_by()
+
+    # Categories of products in recently active carts, then the other top-level ones
+    category_ids = list(
+        recent_items.values_list('product__category_id', flat=True)
+        .annotate(activity=Count('id'))
+        .order_by('-activity', 'product__category_id')[:categories]
+    )
+    category_ids += [
+        node['id'] for node in active.values()
+        if node['parent_id'] is None and node['id'] not in category_ids
+    ][:max(categories - len(category_ids), 0)]
+    paths += [reverse('store:product_filter', args=[active[category_id]['slug']]) for category_id in category_ids]
+
+    # The most-carted products, topped up with the newest
+    product_ids = list(
+        recent_items.values_list('product_id', flat=True)
+        .annotate(activity=Count('id'))
+        .order_by('-activity', 'product_id')[:products]
+    )
+    if len(product_ids) < products:
+        product_ids += Product.objects.filter(
+            is_available=True, category_id__in=active,
+        ).exclude(id__in=product_ids).order_by('-created_at').values_list('id', flat=True)[:products - len(product_ids)]
+    by_id = Product.objects.only('slug', 'category_id').in_bulk(product_ids)
+    paths += [
+        reverse('store:product_detail', args=[active[by_id[product_id].category_id]['slug'], by_id[product_id].slug])
+        for product_id in product_ids
+    ]
+    return paths
+
+
+def render_pages(paths):
+    """Render ``paths`` as an anonymous visitor. Returns {path: status code or error}."""
+    # Here, not at the top: the health views keep this module on every
+    # worker's boot path, and django.test pulls in unittest
+    from django.test import RequestFactory
+
+    factory = RequestFactory()
+    results = {}
+    for path in paths:
+        request = factory.get(path)
+        request.user = AnonymousUser()
+        try:
+            match = resolve(path)
+            response = match.func(request, *match.args, **match.kwargs)
+            results[path] = response.status_code
+        except Exception as error:
+            logger.exception('Warm-up request for %s failed', path)
+            results[path] = repr(error)
+    return results
+
+
+def warm_caches(categories=HOT_CATEGORIES, products=HOT_PRODUCTS, log=None):
+    """Run every warm-up step in order. Returns {step: (result, seconds)}."""
+    steps = [
+        ('templates', preload_templates),
+        ('connections', open_connections),
+        ('shared caches', fill_shared_caches),
+        ('pages', lambda: render_pages(hot_paths(categories, products))),
+    ]
+    timings = {}
+    for name, step in steps:
+        start = time.perf_counter()
+        result = step()
+        timings[name] = (result, time.perf_counter() - start)
+        if log:
+            log(name, *timings[name])
+    return timings
+
+
+def _warm_in_background():
+    try:
+        warm_caches()
+    except Exception:
+        # A cold worker still serves correctly; don't keep it out of rotation
+        logger.exception('Cache warm-up failed')
+    finally:
+        connections.close_all()
+        _warmed.set()
+
+
+def on_ready():
+    """Start warm-up in a background thread; /readyz reports 503 until it is done."""
+    global _warming_pid
+    if _warming.is_set() and _warming_pid == os.getpid():
+        return
+    _warming_pid = os.getpid()
+    _warming.set()
+    threading.Thread(target=_warm_in_background, name='cache-warmup', daemon=True).start()
+
+
+def is_ready():
+    """True once warm-up has finished, or if this process never started one."""
+    if _warmed.is_set() or not _warming.is_set():
+        return True
+    if _warming_pid != os.getpid():
+        # Forked mid warm-up: the thread stayed behind in the parent
+        on_ready()
+    return False
+
+
+@never_cache
+def healthz(request):
+    """Liveness: the process answers requests."""
+    return JsonResponse({'status': 'ok'})
+
+
+@never_cache
+def readyz(request):
+    """Readiness: warm-up is done and the database answers."""
+    if not is_ready():
+        return JsonResponse({'status': 'warming'}, status=503)
+    try:
+        with connections['default'].cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except DatabaseError:
+        return JsonResponse({'status': 'database unavailable'}, status=503)
+    return JsonResponse({'status': 'ready'})
@@ -9,8 +9,17 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Web workers discover ModelAdmins on the first admin request, not at boot
+os.environ.setdefault('LAZY_ADMIN', '1')
 
 application = get_wsgi_application()
+
+if settings.WARM_ON_START:
+    # Imported once apps are loaded; /readyz reports ready when this finishes
+    from config.warmup import on_ready
+
+    on_ready()
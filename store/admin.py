@@ -1,13 +1,76 @@
 # store/admin.py
 
+import json
+
 from django.contrib import admin
+from django.contrib.admin.models import ADDITION, CHANGE, DELETION, LogEntry
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Count, DecimalField, F, Prefetch, Sum
+from django.urls import reverse
 from django.utils.html import format_html
-from .models import Category, Product, ProductAttribute, ProductAttributeValue, ProductImage, Cart, CartItem
+from .audit import audit_context, log
+from .models import (
+    Category, Product, ProductAttribute, ProductAttributeValue, ProductImage, Cart, CartItem,
+    StockMovement, PriceSchedule, PriceHistory, ProductAudit, Order, OrderItem,
+)
+from .paginators import EstimatedCountPaginator
+from .stock import get_available, get_available_stock, invalidate_available_stock, record_movement
+
+
+# --- Changelists that stay fast on big tables ---
+class ScalableChangeListMixin:
+    # No second COUNT(*) over the whole table, and a bounded count of the results
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+
+
+# --- Admin history written in batches after the request (see store.audit) ---
+class BufferedLogEntryMixin:
+    def _log_actions(self, request, objects, action_flag, message=''):
+        if isinstance(message, list):
+            message = json.dumps(message)
+        entries = [
+            LogEntry(
+                user_id=request.user.pk,
+                content_type_id=ContentType.objects.get_for_model(obj, for_concrete_model=False).id,
+                object_id=str(obj.pk),
+                object_repr=str(obj)[:200],
+                action_flag=action_flag,
+                change_message=message,
+            )
+            for obj in objects
+        ]
+        log(entries)
+        return entries
+
+    def log_addition(self, request, obj, message):
+        return self._log_actions(request, [obj], ADDITION, message)[0]
+
+    def log_change(self, request, obj, message):
+        return self._log_actions(request, [obj], CHANGE, message)[0]
+
+    def log_deletions(self, request, queryset):
+        return self._log_actions(request, queryset, DELETION)
+
+
+def with_main_images(queryset, prefix=''):
+    """Prefetch each product's main image into ``main_images`` (one query per page)."""
+    return queryset.prefetch_related(
+        Prefetch(f'{prefix}images', queryset=ProductImage.objects.filter(is_main=True), to_attr='main_images')
+    )
+
+
+def main_image_of(product):
+    images = getattr(product, 'main_images', None)
+    if images is None:
+        return product.images.filter(is_main=True).first()
+    return images[0] if images else None
 
 # --- Inline for Dynamic Attributes ---
 class ProductAttributeValueInline(admin.TabularInline):
     model = ProductAttributeValue
     extra = 1
+    autocomplete_fields = ['attribute']
 
 # --- Inline for Images ---
 class ProductImageInline(admin.TabularInline):
@@ -25,7 +88,7 @@ class CartItemInline(admin.TabularInline):
     def product_details(self, obj):
         if obj.product:
             # Get the main product image
-            main_image = obj.product.images.filter(is_main=True).first()
+            main_image = main_image_of(obj.product)
             image_html = ""
             if main_image:
                 image_html = f'<img src="{main_image.image.url}" style="width: 50px; height: 50px; object-fit: cover; border-radius: 4px; margin-right: 10px;" alt="{obj.product.name}">'
@@ -43,6 +106,9 @@ class CartItemInline(admin.TabularInline):
             return format_html(product_info)
         return "No Product"
     product_details.short_description = 'Product Details'
+
+    def get_queryset(self, request):
+        return with_main_images(super().get_queryset(request).select_related('product__category'), 'product__')
     
     def unit_price(self, obj):
         return f"Rs. {obj.product.price}"
@@ -55,53 +121,192 @@ class CartItemInline(admin.TabularInline):
 
 # --- Category Admin (CORRECTED) ---
 @admin.register(Category)
-class CategoryAdmin(admin.ModelAdmin):
-    list_display = ['name', 'slug', 'is_active', 'product_count']
+class CategoryAdmin(ScalableChangeListMixin, admin.ModelAdmin):
+    list_display = ['name', 'parent', 'slug', 'is_active', 'product_count']
     list_filter = ['is_active']
     search_fields = ['name']
     # REMOVED prepopulated_fields since slug is non-editable
-    fields = ('name', 'description', 'is_active')  # REMOVED slug from here
+    fields = ('name', 'parent', 'description', 'is_active')  # REMOVED slug from here
+    list_select_related = ['parent']
+    ordering = ['path']
+    autocomplete_fields = ['parent']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(product_total=Count('products'))
     
     def product_count(self, obj):
-        return obj.products.count()
+        return obj.product_total
     product_count.short_description = 'Products'
+    product_count.admin_order_field = 'product_total'
 
 # --- Product Admin (CORRECTED) ---
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(BufferedLogEntryMixin, ScalableChangeListMixin, admin.ModelAdmin):
     list_display = ['name', 'category', 'price', 'stock', 'is_available', 'created_at']
+    list_select_related = ['category']
+    autocomplete_fields = ['category']
     list_filter = ['category', 'is_available', 'created_at']
     search_fields = ['name', 'description']
     list_editable = ['price', 'stock', 'is_available']
     # REMOVED prepopulated_fields since slug is non-editable
     inlines = [ProductImageInline, ProductAttributeValueInline]
-    fields = ('name', 'category', 'description', 'price', 'stock', 'is_available')  # REMOVED slug from here
+    fields = ('name', 'category', 'description', 'price', 'stock', 'is_available', 'audit_history')  # REMOVED slug from here
+    readonly_fields = ['audit_history']
+
+    def audit_history(self, obj):
+        if not obj.pk:
+            return '-'
+        url = reverse('admin:store_productaudit_changelist') + f'?product__id__exact={obj.pk}'
+        return format_html('<a href="{}">Price, stock and availability changes</a>', url)
+    audit_history.short_description = 'History'
+
+    def save_model(self, request, obj, form, change):
+        with audit_context(user=request.user, source=ProductAudit.ADMIN):
+            super().save_model(request, obj, form, change)
+        if change and 'price' in form.changed_data:
+            PriceHistory.objects.create(
+                product=obj, old_price=form.initial['price'], new_price=obj.price,
+                note=f'Admin edit by {request.user}',
+            )
+        # Direct stock edits (incl. list_editable) are kept in the ledger as applied adjustments
+        if 'stock' in form.changed_data:
+            delta = obj.stock - (form.initial.get('stock') or 0)
+            if delta:
+                record_movement(
+                    obj, StockMovement.ADJUSTMENT, delta,
+                    note=f'Admin edit by {request.user}', is_applied=True,
+                )
+
+# --- Stock Movement Admin (append-only ledger) ---
+@admin.register(StockMovement)
+class StockMovementAdmin(ScalableChangeListMixin, admin.ModelAdmin):
+    list_display = ['product', 'kind', 'quantity', 'is_applied', 'note', 'created_at']
+    list_filter = ['kind', 'is_applied', 'created_at']
+    search_fields = ['product__name', 'note']
+    list_select_related = ['product']
+    autocomplete_fields = ['product']
+    fields = ('product', 'kind', 'quantity', 'note')
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        invalidate_available_stock([obj.product_id])
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+# --- Price Schedule Admin ---
+@admin.register(PriceSchedule)
+class PriceScheduleAdmin(ScalableChangeListMixin, admin.ModelAdmin):
+    list_display = ['name', 'product', 'category', 'new_price', 'percent_off', 'starts_at', 'ends_at', 'status']
+    list_filter = ['status', 'starts_at']
+    search_fields = ['name', 'product__name', 'category__name']
+    list_select_related = ['product', 'category']
+    autocomplete_fields = ['product', 'category']
+    readonly_fields = ['status', 'applied_at', 'ended_at']
+    fields = ('name', 'product', 'category', 'new_price', 'percent_off', 'starts_at', 'ends_at', 'status', 'applied_at', 'ended_at')
+
+# --- Price History Admin (append-only) ---
+@admin.register(PriceHistory)
+class PriceHistoryAdmin(ScalableChangeListMixin, admin.ModelAdmin):
+    list_display = ['product', 'old_price', 'new_price', 'schedule', 'note', 'changed_at']
+    list_filter = ['changed_at']
+    search_fields = ['product__name', 'note']
+    list_select_related = ['product', 'schedule']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+# --- Product Audit Admin (append-only, written by store.audit) ---
+@admin.register(ProductAudit)
+class ProductAuditAdmin(ScalableChangeListMixin, admin.ModelAdmin):
+    list_display = ['changed_at', 'product_display', 'field', 'old_value', 'new_value', 'source', 'user']
+    list_filter = ['field', 'source']
+    search_fields = ['product__name']
+    list_select_related = ['product', 'user']
+
+    def product_display(self, obj):
+        return obj.product or f'#{obj.product_id} (deleted)'
+    product_display.short_description = 'Product'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
 
 # --- Product Attribute Admin ---
 @admin.register(ProductAttribute)
-class ProductAttributeAdmin(admin.ModelAdmin):
-    list_display = ['name', 'values_count']
+class ProductAttributeAdmin(ScalableChangeListMixin, admin.ModelAdmin):
+    list_display = ['name', 'data_type', 'values_count']
+    list_filter = ['data_type']
     search_fields = ['name']
+    fields = ('name', 'data_type', 'choices')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(values_total=Count('productattributevalue'))
     
     def values_count(self, obj):
-        return obj.productattributevalue_set.count()
+        return obj.values_total
     values_count.short_description = 'Values Count'
+    values_count.admin_order_field = 'values_total'
 
 # --- Product Attribute Value Admin ---
 @admin.register(ProductAttributeValue)
-class ProductAttributeValueAdmin(admin.ModelAdmin):
-    list_display = ['product', 'attribute', 'value']
+class ProductAttributeValueAdmin(ScalableChangeListMixin, admin.ModelAdmin):
+    list_display = ['product_name', 'attribute_name', 'value']
     list_filter = ['attribute', 'product__category']
     search_fields = ['product__name', 'value']
+    autocomplete_fields = ['product', 'attribute']
+
+    def get_queryset(self, request):
+        # Names come in with the rows instead of one __str__ lookup per line
+        return super().get_queryset(request).annotate(
+            product_name=F('product__name'), attribute_name=F('attribute__name'),
+        )
+
+    def product_name(self, obj):
+        return obj.product_name
+    product_name.short_description = 'Product'
+    product_name.admin_order_field = 'product__name'
+
+    def attribute_name(self, obj):
+        return obj.attribute_name
+    attribute_name.short_description = 'Attribute'
+    attribute_name.admin_order_field = 'attribute__name'
 
 # --- Cart Admin ---
 @admin.register(Cart)
-class CartAdmin(admin.ModelAdmin):
-    list_display = ['user_email', 'user_name', 'items_count', 'total_quantity', 'total_price_display', 'created_at', 'updated_at']
+class CartAdmin(BufferedLogEntryMixin, ScalableChangeListMixin, admin.ModelAdmin):
+    list_display = ['user_email', 'user_name', 'items_count', 'total_quantity_display', 'total_price_display', 'created_at', 'updated_at']
     list_filter = ['created_at', 'updated_at']
     search_fields = ['user__email', 'user__first_name', 'user__last_name']
-    readonly_fields = ['created_at', 'updated_at', 'total_price_display', 'total_quantity_display', 'items_list']
+    readonly_fields = ['user_email', 'user_name', 'created_at', 'updated_at', 'total_price_display', 'total_quantity_display', 'items_list']
     inlines = [CartItemInline]
+    autocomplete_fields = ['user']
+    list_select_related = ['user']
+
+    def get_queryset(self, request):
+        # Cart totals in the same query as the carts
+        return super().get_queryset(request).annotate(
+            items_total=Count('items'),
+            quantity_total=Sum('items__quantity'),
+            price_total=Sum(
+                F('items__quantity') * F('items__product__price'),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            ),
+        )
     
     def user_email(self, obj):
         return obj.user.email
@@ -113,27 +318,29 @@ class CartAdmin(admin.ModelAdmin):
     user_name.short_description = 'Name'
     
     def items_count(self, obj):
-        return obj.items.count()
+        return obj.items_total
     items_count.short_description = 'Items Count'
+    items_count.admin_order_field = 'items_total'
     
     def total_price_display(self, obj):
-        return f"<strong style='color: green;'>Rs. {obj.total_price}</strong>"
+        return f"<strong style='color: green;'>Rs. {obj.price_total or 0:.2f}</strong>"
     total_price_display.short_description = 'Total Value'
     total_price_display.allow_tags = True
     
     def total_quantity_display(self, obj):
-        return obj.total_quantity
+        return obj.quantity_total or 0
     total_quantity_display.short_description = 'Total Items'
+    total_quantity_display.admin_order_field = 'quantity_total'
     
     def items_list(self, obj):
         """Display all items in the cart in the detail view"""
-        items = obj.items.select_related('product', 'product__category').all()
+        items = with_main_images(obj.items.select_related('product', 'product__category'), 'product__')
         if not items:
             return "No items in cart"
         
         items_html = "<div style='max-height: 300px; overflow-y: auto;'>"
         for item in items:
-            main_image = item.product.images.filter(is_main=True).first()
+            main_image = main_image_of(item.product)
             image_html = ""
             if main_image:
                 image_html = f'<img src="{main_image.image.url}" style="width: 40px; height: 40px; object-fit: cover; border-radius: 4px; margin-right: 10px;" alt="{item.product.name}">'
@@ -170,11 +377,17 @@ class CartAdmin(admin.ModelAdmin):
 
 # --- CartItem Admin ---
 @admin.register(CartItem)
-class CartItemAdmin(admin.ModelAdmin):
+class CartItemAdmin(ScalableChangeListMixin, admin.ModelAdmin):
     list_display = ['cart_user', 'product_with_image', 'category', 'unit_price', 'quantity', 'total_price_display', 'stock_status']
-    list_filter = ['cart__user', 'product__category', 'product__is_available']
+    # Search by customer email instead of one filter link per user
+    list_filter = ['product__category', 'product__is_available']
     search_fields = ['cart__user__email', 'product__name', 'product__category__name']
     readonly_fields = ['product_details', 'unit_price_display', 'total_price_display', 'stock_status']
+    autocomplete_fields = ['cart', 'product']
+    list_select_related = ['cart__user', 'product__category']
+
+    def get_queryset(self, request):
+        return with_main_images(super().get_queryset(request), 'product__')
     
     def cart_user(self, obj):
         return obj.cart.user.email
@@ -182,7 +395,7 @@ class CartItemAdmin(admin.ModelAdmin):
     cart_user.admin_order_field = 'cart__user__email'
     
     def product_with_image(self, obj):
-        main_image = obj.product.images.filter(is_main=True).first()
+        main_image = main_image_of(obj.product)
         if main_image:
             return format_html(
                 '<img src="{}" style="width: 30px; height: 30px; object-fit: cover; border-radius: 4px; margin-right: 8px;" alt="{}"> {}',
@@ -208,16 +421,23 @@ class CartItemAdmin(admin.ModelAdmin):
     total_price_display.short_description = 'Total Price'
     total_price_display.allow_tags = True
     
+    def get_changelist_instance(self, request):
+        changelist = super().get_changelist_instance(request)
+        # Warm the available-to-sell cache for the whole page in one go
+        get_available_stock(obj.product_id for obj in changelist.result_list)
+        return changelist
+
     def stock_status(self, obj):
-        if obj.product.stock >= obj.quantity:
-            return format_html('<span style="color: green;">✓ Adequate ({})</span>', obj.product.stock)
+        available = get_available(obj.product_id)
+        if available >= obj.quantity:
+            return format_html('<span style="color: green;">✓ Adequate ({})</span>', available)
         else:
-            return format_html('<span style="color: red;">✗ Low Stock ({})</span>', obj.product.stock)
+            return format_html('<span style="color: red;">✗ Low Stock ({})</span>', available)
     stock_status.short_description = 'Stock Status'
     
     def product_details(self, obj):
         """Detailed product information for the detail view"""
-        main_image = obj.product.images.filter(is_main=True).first()
+        main_image = main_image_of(obj.product)
         image_html = ""
         if main_image:
             image_html = f'<img src="{main_image.image.url}" style="width: 100px; height: 100px; object-fit: cover; border-radius: 8px; margin-right: 15px;" alt="{obj.product.name}">'
@@ -255,4 +475,26 @@ class CartItemAdmin(admin.ModelAdmin):
         ('Inventory', {
             'fields': ('stock_status',)
         }),
-    )
\ No newline at end of file
+    )
+
+# --- Inline for Order Items ---
+class OrderItemInline(admin.TabularInline):
+    model = OrderItem
+    extra = 0
+    readonly_fields = ['product', 'product_name', 'unit_price', 'quantity']
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+# --- Order Admin ---
+@admin.register(Order)
+class OrderAdmin(ScalableChangeListMixin, admin.ModelAdmin):
+    list_display = ['id', 'user', 'status', 'total_price', 'created_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['id', 'user__email']
+    list_select_related = ['user']
+    readonly_fields = ['user', 'total_price', 'created_at']
+    fields = ('user', 'status', 'total_price', 'created_at')
+    inlines = [OrderItemInline]
+
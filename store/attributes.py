@@ -0,0 +1,155 @@
+# store/attributes.py
+"""
+Typed product attributes: re-typing stored values when an attribute's type
+changes, and attribute filters and sorting for product listings.
+
+Listing query parameters (attribute names are slugified):
+
+- ``attr.<name>=<value>``: exact match;
+- ``attr.<name>.min=<n>`` and ``attr.<name>.max=<n>``: inclusive numeric range;
+- ``sort=attr.<name>`` or ``sort=-attr.<name>``: products without the
+  attribute come last.
+
+Each filter is an ``id IN (subquery)`` over the (attribute, typed value)
+index. Sorting reads one value per product through the (product, attribute)
+unique index.
+"""
+import math
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+from django.utils.text import slugify
+
+from .changes import record_changes
+from .models import CatalogChange, ProductAttribute, ProductAttributeValue
+
+FILTER_PREFIX = 'attr.'
+RETYPE_BATCH_SIZE = 1000
+
+
+def _batches(attribute):
+    """Keyset-paginate the attribute's values; safe while they are being updated."""
+    last_id = 0
+    values = ProductAttributeValue.objects.filter(attribute=attribute).order_by('id')
+    while batch := list(values.filter(id__gt=last_id)[:RETYPE_BATCH_SIZE]):
+        yield batch
+        last_id = batch[-1].id
+
+
+def invalid_values(attribute):
+    """Stored values that would not parse under the attribute's (new) type."""
+    bad = []
+    for batch in _batches(attribute):
+        for item in batch:
+            try:
+                attribute.parse(item.value)
+            except ValidationError:
+                bad.append(item.value)
+    return bad
+
+
+def retype_values(attribute):
+    """
+    Re-parse every value of ``attribute`` into its typed columns, in batches.
+    Raises ValidationError (rolling back) if a value doesn't fit the type.
+    """
+    fields = ['value', 'value_int', 'value_decimal']
+    with transaction.atomic():
+        for batch in _batches(attribute):
+            for item in batch:
+                item.value, item.value_int, item.value_decimal = attribute.parse(item.value)
+            ProductAttributeValue.objects.bulk_update(batch, fields)
+            # bulk_update sends no signals
+            record_changes(CatalogChange.ATTRIBUTE_VALUE, [item.id for item in batch])
+
+
+def get_filter_attributes():
+    """All attributes by slugified name."""
+    return {slugify(attribute.name): attribute for attribute in ProductAttribute.objects.order_by('name')}
+
+
+def _bound(attribute, raw, upper):
+    """A range bound for the attribute's column, or None if ``raw`` isn't a number."""
+    try:
+        number = Decimal(raw)
+    except InvalidOperation:
+        return None
+    if not number.is_finite():
+        return None
+    if attribute.data_type == ProductAttribute.INTEGER:
+        return math.floor(number) if upper else math.ceil(number)
+    return number
+
+
+def _matching(attribute, **lookups):
+    return ProductAttributeValue.objects.filter(attribute=attribute, **lookups).values('product_id')
+
+
+def apply_attribute_filters(products, params, attributes):
+    """
+    Apply the ``attr.*`` filters and attribute sort in ``params`` to
+    ``products``. Unknown attributes and unparsable values are ignored.
+    Returns (products, selected) where ``selected`` maps each parameter
+    that was applied to its value.
+    """
+    selected = {}
+    for key, raw in params.items():
+        if not key.startswith(FILTER_PREFIX) or raw == '':
+            continue
+        name, _, bound = key[len(FILTER_PREFIX):].partition('.')
+        attribute = attributes.get(name)
+        if attribute is None:
+            continue
+        column = attribute.value_field
+        if bound in ('min', 'max') and attribute.is_numeric:
+            value = _bound(attribute, raw, upper=bound == 'max')
+            if value is None:
+                continue
+            lookup = f'{column}__{"lte" if bound == "max" else "gte"}'
+            products = products.filter(id__in=_matching(attribute, **{lookup: value}))
+        elif not bound:
+            try:
+                typed = dict(zip(('value', 'value_int', 'value_decimal'), attribute.parse(raw)))
+            except ValidationError:
+                continue
+            products = products.filter(id__in=_matching(attribute, **{column: typed[column]}))
+        else:
+            continue
+        selected[key] = raw
+
+    sort = params.get('sort', '')
+    sort_key = sort.removeprefix('-')
+    attribute = attributes.get(sort_key[len(FILTER_PREFIX):]) if sort_key.startswith(FILTER_PREFIX) else None
+    if attribute is not None:
+        sort_value = Subquery(
+            ProductAttributeValue.objects.filter(product=OuterRef('pk'), attribute=attribute)
+            .values(attribute.value_field)[:1]
+        )
+        sort_column = F('attribute_sort')
+        ordering = sort_column.desc(nulls_last=True) if sort.startswith('-') else sort_column.asc(nulls_last=True)
+        products = products.annotate(attribute_sort=sort_value).order_by(ordering, '-created_at')
+        selected['sort'] = sort
+    return products, selected
+
+
+def filter_form(attributes, selected):
+    """Range inputs and sort options for the listing's numeric attributes."""
+    ranges, sort_options = [], []
+    for slug, attribute in attributes.items():
+        if not attribute.is_numeric:
+            continue
+        ranges.append({
+            'name': attribute.name,
+            'min_param': f'{FILTER_PREFIX}{slug}.min',
+            'max_param': f'{FILTER_PREFIX}{slug}.max',
+            'min': selected.get(f'{FILTER_PREFIX}{slug}.min', ''),
+            'max': selected.get(f'{FILTER_PREFIX}{slug}.max', ''),
+        })
+        for prefix, label in (('', 'low to high'), ('-', 'high to low')):
+            value = f'{prefix}{FILTER_PREFIX}{slug}'
+            sort_options.append({
+                'value': value, 'label': f'{attribute.name}: {label}', 'selected': selected.get('sort') == value,
+            })
+    return {'ranges': ranges, 'sort_options': sort_options}
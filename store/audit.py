@@ -0,0 +1,202 @@
+# store/audit.py
+"""
+Buffered audit logging.
+
+Audit rows are the ProductAudit diffs of product price, stock and
+availability, plus the admin's LogEntry rows for products and carts. They
+are not written inside the request. ``log()`` queues them once the
+surrounding transaction commits, so a rolled-back change is never
+recorded. A background thread writes the queue with one ``bulk_create``
+per model every AUDIT_FLUSH_INTERVAL seconds, or as soon as
+AUDIT_FLUSH_SIZE rows are waiting. The queue is also flushed at process
+exit and by gunicorn's worker_exit hook (config.gunicorn). Rows still
+queued when a worker is killed outright (SIGKILL, e.g. past gunicorn's
+graceful_timeout) are lost, at most AUDIT_FLUSH_INTERVAL seconds' worth;
+that is the price of keeping the writes out of the request. With
+AUDIT_BUFFERED off, rows are written as soon as the transaction commits.
+
+``Product.save()`` is diffed by signals. The bulk UPDATEs in pricing, stock
+compaction and checkout call ``record_product_changes`` themselves.
+``audit_context`` attributes the diffs made inside it to a user and source.
+"""
+import atexit
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.utils import timezone
+
+from .models import ProductAudit
+
+logger = logging.getLogger(__name__)
+
+AUDITED_FIELDS = [ProductAudit.PRICE, ProductAudit.STOCK, ProductAudit.AVAILABILITY]
+AUDIT_FLUSH_INTERVAL = getattr(settings, 'AUDIT_FLUSH_INTERVAL', 2.0)
+AUDIT_FLUSH_SIZE = getattr(settings, 'AUDIT_FLUSH_SIZE', 200)
+# Oldest rows are dropped past this, e.g. while the database is unavailable
+AUDIT_BUFFER_MAX = getattr(settings, 'AUDIT_BUFFER_MAX', 50_000)
+BATCH_SIZE = 500
+
+_context = ContextVar('audit_context', default=(None, ProductAudit.OTHER))
+
+
+@contextmanager
+def audit_context(user=None, source=ProductAudit.OTHER):
+    """Attribute the product changes made inside the block to ``user`` and ``source``."""
+    token = _context.set((user, source))
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+class AuditBuffer:
+    """Rows waiting to be written, and the thread that writes them."""
+
+    def __init__(self):
+        self._rows = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def __len__(self):
+        return len(self._rows)
+
+    def add(self, rows):
+        with self._lock:
+            if self._pid != os.getpid():
+                # A forked worker inherits the parent's queue but not its thread
+                self._pid = os.getpid()
+                self._rows = []
+                self._thread = None
+            self._rows.extend(rows)
+            overflow = len(self._rows) - AUDIT_BUFFER_MAX
+            if overflow > 0:
+                logger.error('Audit buffer full, dropping %s rows', overflow)
+                del self._rows[:overflow]
+            full = len(self._rows) >= AUDIT_FLUSH_SIZE
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='audit-flush', daemon=True)
+                self._thread.start()
+        if full:
+            self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(AUDIT_FLUSH_INTERVAL)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Audit flush failed')
+            connection.close_if_unusable_or_obsolete()
+
+    def flush(self):
+        """Write every queued row now. Returns the number written."""
+        with self._lock:
+            rows, self._rows = self._rows, []
+        if not rows:
+            return 0
+        try:
+            return write_rows(rows)
+        except DatabaseError:
+            logger.exception('Could not write %s audit rows, will retry', len(rows))
+            for row in rows:
+                row.pk = None
+                row._state.adding = True
+            with self._lock:
+                self._rows[:0] = rows
+            return 0
+
+
+def write_rows(rows):
+    """``bulk_create`` ``rows`` grouped by model; rows that violate a constraint are dropped."""
+    by_model = {}
+    for row in rows:
+        by_model.setdefault(type(row), []).append(row)
+    written = 0
+    for model, objs in by_model.items():
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create(objs, batch_size=BATCH_SIZE)
+            written += len(objs)
+        except IntegrityError:
+            # E.g. a LogEntry whose user was deleted meanwhile: keep the rest
+            for obj in objs:
+                obj.pk = None
+                try:
+                    with transaction.atomic():
+                        obj.save(force_insert=True)
+                    written += 1
+                except IntegrityError:
+                    logger.warning('Dropping audit row %r', obj)
+    return written
+
+
+buffer = AuditBuffer()
+atexit.register(buffer.flush)
+
+
+def log(rows):
+    """Queue ``rows`` (unsaved model instances) to be written once the current transaction commits."""
+    rows = list(rows)
+    if not rows:
+        return
+    if getattr(settings, 'AUDIT_BUFFERED', True):
+        transaction.on_commit(lambda: buffer.add(rows))
+    else:
+        transaction.on_commit(lambda: write_rows(rows))
+
+
+def _text(value):
+    return '' if value is None else str(value)
+
+
+def record_product_changes(changes, user=None, source=None):
+    """
+    Log ``changes``, an iterable of (product_id, field, old, new); unchanged
+    values are skipped. ``user`` and ``source`` default to the audit_context.
+    """
+    context_user, context_source = _context.get()
+    user = user or context_user
+    user_id = user.pk if user is not None and user.is_authenticated else None
+    now = timezone.now()
+    log(
+        ProductAudit(
+            product_id=product_id,
+            field=field,
+            old_value=_text(old),
+            new_value=_text(new),
+            source=source or context_source,
+            user_id=user_id,
+            changed_at=now,
+        )
+        for product_id, field, old, new in changes
+        if old != new
+    )
+
+
+def stored_values(product, update_fields=None):
+    """The audited values of ``product`` as stored, before a save; None if it is new."""
+    fields = [field for field in AUDITED_FIELDS if update_fields is None or field in update_fields]
+    if product.pk is None or product._state.adding or not fields:
+        return None
+    return type(product).objects.filter(pk=product.pk).values(*fields).first()
+
+
+def record_product_save(product, created, before):
+    """Log what a ``save()`` changed, given ``stored_values()`` from before it."""
+    if created:
+        before = dict.fromkeys(AUDITED_FIELDS)
+    elif before is None:
+        return
+    # to_python: a price assigned as '10' is the stored Decimal('10.00')
+    record_product_changes(
+        (product.pk, field, old, product._meta.get_field(field).to_python(getattr(product, field)))
+        for field, old in before.items()
+    )
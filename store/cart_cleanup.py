@@ -0,0 +1,69 @@
+# store/cart_cleanup.py
+import json
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Cart, CartItem
+
+
+def abandoned_carts(idle_days, now=None):
+    """Carts not touched for ``idle_days``, via the updated_at index."""
+    cutoff = (now or timezone.now()) - timedelta(days=idle_days)
+    return Cart.objects.filter(updated_at__lt=cutoff)
+
+
+def _archive(cart_ids, archive_file):
+    items = CartItem.objects.filter(cart_id__in=cart_ids).values_list('cart_id', 'product_id', 'quantity')
+    lines = {}
+    for cart_id, product_id, quantity in items:
+        lines.setdefault(cart_id, []).append([product_id, quantity])
+    carts = Cart.objects.filter(id__in=cart_ids).values('id', 'user_id', 'created_at', 'updated_at')
+    for cart in carts:
+        archive_file.write(json.dumps({
+            'cart': cart['id'],
+            'user': cart['user_id'],
+            'created_at': cart['created_at'].isoformat(),
+            'updated_at': cart['updated_at'].isoformat(),
+            'items': lines.get(cart['id'], []),
+        }) + '\n')
+
+
+def purge_abandoned_carts(idle_days=30, batch_size=500, pause=0.05, archive_file=None, now=None):
+    """
+    Delete idle carts and their items in small batches, each in its own short
+    transaction, pausing between batches so other writers can take the
+    SQLite lock. Optionally writes each cart to ``archive_file`` as JSON
+    lines first. Returns the number of carts removed.
+    """
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=idle_days)
+    removed = 0
+
+    while True:
+        # Deleted carts drop out of the range and re-touched ones no longer
+        # match it, so every pass simply takes the oldest remaining batch
+        cart_ids = list(
+            Cart.objects.filter(updated_at__lt=cutoff)
+            .order_by('updated_at')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not cart_ids:
+            break
+
+        with transaction.atomic():
+            # Re-check the cutoff: a shopper may have come back since we looked
+            cart_ids = list(
+                Cart.objects.filter(id__in=cart_ids, updated_at__lt=cutoff).values_list('id', flat=True)
+            )
+            if archive_file is not None:
+                _archive(cart_ids, archive_file)
+            CartItem.objects.filter(cart_id__in=cart_ids).delete()
+            deleted, per_model = Cart.objects.filter(id__in=cart_ids).delete()
+            removed += per_model.get(Cart._meta.label, 0)
+
+        if pause:
+            time.sleep(pause)
+    return removed
@@ -0,0 +1,73 @@
+# store/catalog.py
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Max
+
+from .models import CatalogChange, Category
+
+CATEGORY_TREE_CACHE_KEY = 'store:category_tree'
+CATEGORY_TREE_TIMEOUT = 60 * 60
+
+
+def get_catalog_version(kind=None):
+    """
+    Version number to fold into catalog cache keys: the sequence number of
+    the latest change (of ``kind``) in the catalog changes feed. Changes are
+    recorded in the same transaction as the change itself and read from the
+    database, so every process sees a new version as soon as it commits.
+    """
+    changes = CatalogChange.objects.all() if kind is None else CatalogChange.objects.filter(kind=kind)
+    return changes.aggregate(version=Max('id'))['version'] or 0
+
+
+def _build_category_tree():
+    """
+    Load every category in one query and order the active ones depth-first,
+    siblings by name. Subtrees under an inactive category are hidden.
+    """
+    # From the primary, like the version in its cache key: a lagging read
+    # replica would cache an old tree under the new version
+    rows = list(
+        Category.objects.using(DEFAULT_DB_ALIAS).values('id', 'parent_id', 'name', 'slug', 'path', 'depth', 'is_active')
+    )
+    children = {}
+    for row in rows:
+        children.setdefault(row['parent_id'], []).append(row)
+
+    nodes = []
+    stack = sorted(children.get(None, []), key=lambda row: row['name'], reverse=True)
+    while stack:
+        row = stack.pop()
+        if not row['is_active']:
+            continue
+        nodes.append(row)
+        stack.extend(sorted(children.get(row['id'], []), key=lambda child: child['name'], reverse=True))
+    return nodes
+
+
+def category_tree_key():
+    # Versioned by the latest category change, so a committed change retires
+    # the cached tree in every process, whatever cache backend each one uses
+    return f'{CATEGORY_TREE_CACHE_KEY}:{get_catalog_version(CatalogChange.CATEGORY)}'
+
+
+def get_category_tree():
+    """Active categories in sidebar order, served from the cache."""
+    key = category_tree_key()
+    nodes = cache.get(key)
+    if nodes is None:
+        nodes = _build_category_tree()
+        cache.set(key, nodes, CATEGORY_TREE_TIMEOUT)
+    return nodes
+
+
+def invalidate_category_tree():
+    """Drop this process' copy, e.g. after a fixture load that records no change."""
+    cache.delete(category_tree_key())
+
+
+def get_breadcrumbs(category, tree=None):
+    """Ancestors of ``category`` (root first, itself last) taken from the cached tree."""
+    by_id = {node['id']: node for node in (tree if tree is not None else get_category_tree())}
+    ancestor_ids = [int(part) for part in category.path.strip('/').split('/') if part]
+    return [by_id[ancestor_id] for ancestor_id in ancestor_ids if ancestor_id in by_id]
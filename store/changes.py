@@ -0,0 +1,178 @@
+# store/changes.py
+"""
+Catalog changes feed for POS and mobile clients.
+
+Every save or delete of a synced object (categories, attributes, products,
+product images, attribute values) appends a ``CatalogChange`` row in the
+same transaction: an upsert, or a tombstone for a delete. Bulk UPDATEs that
+bypass signals (pricing, stock compaction, checkout) call
+``record_changes`` themselves. The row id is the sequence number; SQLite
+commits one writer at a time, so sequence order is commit order.
+
+A client keeps the (opaque) ``cursor`` of the last batch it applied and
+asks for what came after it (``views.catalog_changes``). Each batch holds only the
+latest state of each changed object, read at request time, and is applied
+in ``KIND_ORDER`` (parents before children).
+
+Compaction (``manage.py compact_changes``) deletes rows superseded by a
+later change to the same object. It also deletes tombstones older than the
+retention period and records the highest one in ``CatalogChangeHorizon``.
+Cursor 0 (a client with no local data) therefore always replays the full
+catalog; until that replay catches up, its cursors carry a ``r`` prefix
+so they stay valid below the horizon. Any other cursor below the horizon
+may have missed a delete, so it gets ``CursorExpired`` and the client
+starts over from 0.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef
+from django.utils import timezone
+
+from .models import (
+    CatalogChange, CatalogChangeHorizon, Category, Product, ProductAttribute, ProductAttributeValue, ProductImage,
+)
+
+DEFAULT_BATCH_SIZE = 500
+MAX_BATCH_SIZE = 2000
+TOMBSTONE_RETENTION_DAYS = 30
+
+KIND_MODELS = {
+    CatalogChange.CATEGORY: Category,
+    CatalogChange.ATTRIBUTE: ProductAttribute,
+    CatalogChange.PRODUCT: Product,
+    CatalogChange.IMAGE: ProductImage,
+    CatalogChange.ATTRIBUTE_VALUE: ProductAttributeValue,
+}
+MODEL_KINDS = {model: kind for kind, model in KIND_MODELS.items()}
+KIND_ORDER = list(KIND_MODELS)
+
+# Fields sent for each kind; "image" is turned into its URL
+KIND_FIELDS = {
+    CatalogChange.CATEGORY: ['id', 'parent_id', 'name', 'slug', 'description', 'is_active'],
+    CatalogChange.ATTRIBUTE: ['id', 'name', 'data_type', 'choices'],
+    CatalogChange.PRODUCT: [
+        'id', 'category_id', 'name', 'slug', 'description', 'price', 'stock', 'is_available', 'updated_at',
+    ],
+    CatalogChange.IMAGE: ['id', 'product_id', 'image', 'alt_text', 'is_main'],
+    CatalogChange.ATTRIBUTE_VALUE: ['id', 'product_id', 'attribute_id', 'value', 'value_int', 'value_decimal'],
+}
+
+
+REPLAY_PREFIX = 'r'
+
+
+class CursorExpired(Exception):
+    pass
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def parse_cursor(value):
+    """Return (sequence, replaying) for a cursor string; '0' starts a replay."""
+    replaying = value.startswith(REPLAY_PREFIX)
+    try:
+        sequence = int(value[len(REPLAY_PREFIX):] if replaying else value)
+    except ValueError:
+        raise InvalidCursor(value)
+    if sequence < 0:
+        raise InvalidCursor(value)
+    return sequence, replaying or sequence == 0
+
+
+def record_changes(kind, object_ids, action=CatalogChange.UPSERT):
+    """Append one change per id; call inside the transaction that made the change."""
+    CatalogChange.objects.bulk_create(
+        [CatalogChange(kind=kind, object_id=object_id, action=action) for object_id in object_ids]
+    )
+
+
+def get_horizon():
+    return CatalogChangeHorizon.objects.values_list('sequence', flat=True).first() or 0
+
+
+def _load(kind, ids):
+    rows = list(KIND_MODELS[kind].objects.filter(id__in=ids).order_by('id').values(*KIND_FIELDS[kind]))
+    if kind == CatalogChange.IMAGE:
+        storage = ProductImage._meta.get_field('image').storage
+        for row in rows:
+            row['image'] = storage.url(row['image']) if row['image'] else None
+    return rows
+
+
+def changes_since(cursor, limit=DEFAULT_BATCH_SIZE):
+    """
+    The next batch after the ``cursor`` string:
+    ``{'cursor', 'has_more', 'upserts': {kind: [rows]}, 'deletes': {kind: [ids]}}``.
+    """
+    sequence, replaying = parse_cursor(cursor)
+    # One read transaction on the primary (reads inside a transaction never
+    # go to the replica): change rows and objects come from the same snapshot
+    with transaction.atomic():
+        horizon = get_horizon()
+        if sequence < horizon and not replaying:
+            raise CursorExpired(cursor)
+        changes = list(
+            CatalogChange.objects.filter(id__gt=sequence).order_by('id').values_list('id', 'kind', 'object_id')[:limit + 1]
+        )
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+
+        # Only the current state matters: one entry per object
+        touched = {}
+        for _, kind, object_id in changes:
+            touched.setdefault(kind, set()).add(object_id)
+
+        upserts, deletes = {}, {}
+        for kind in KIND_ORDER:
+            ids = touched.get(kind)
+            if not ids:
+                continue
+            rows = _load(kind, ids)
+            if rows:
+                upserts[kind] = rows
+            # Gone now, whatever the row said; the tombstone may be in a later batch
+            missing = sorted(ids - {row['id'] for row in rows})
+            if missing:
+                deletes[kind] = missing
+
+    if changes:
+        sequence = changes[-1][0]
+    if not has_more:
+        # Nothing is left below the horizon either, so the cursor can jump to it
+        cursor = str(max(sequence, horizon))
+    elif replaying and sequence < horizon:
+        cursor = f'{REPLAY_PREFIX}{sequence}'
+    else:
+        cursor = str(sequence)
+    return {
+        'cursor': cursor,
+        'has_more': has_more,
+        'upserts': upserts,
+        'deletes': deletes,
+    }
+
+
+def compact_changes(retention_days=TOMBSTONE_RETENTION_DAYS):
+    """
+    Delete superseded changes and tombstones older than ``retention_days``.
+    Returns (superseded, tombstones) deleted.
+    """
+    later = CatalogChange.objects.filter(kind=OuterRef('kind'), object_id=OuterRef('object_id'), id__gt=OuterRef('id'))
+    with transaction.atomic():
+        superseded, _ = CatalogChange.objects.filter(Exists(later)).delete()
+
+        expired = CatalogChange.objects.filter(
+            action=CatalogChange.DELETE, created_at__lt=timezone.now() - timedelta(days=retention_days)
+        )
+        last_expired = expired.aggregate(last=Max('id'))['last']
+        tombstones = 0
+        if last_expired is not None:
+            tombstones, _ = expired.filter(id__lte=last_expired).delete()
+            horizon, _ = CatalogChangeHorizon.objects.get_or_create(pk=1)
+            horizon.sequence = max(horizon.sequence, last_expired)
+            horizon.compacted_at = timezone.now()
+            horizon.save()
+    return superseded, tombstones
@@ -0,0 +1,96 @@
+# store/checkout.py
+from django.db import transaction
+from django.db.models import F, Value
+from django.utils import timezone
+
+from .audit import record_product_changes
+from .changes import record_changes
+from .live import publish_products
+from .models import Cart, CartItem, CatalogChange, Order, OrderItem, Product, ProductAudit, StockMovement
+from .stock import invalidate_available_stock, pending_quantity
+
+
+class CheckoutError(Exception):
+    pass
+
+
+class EmptyCartError(CheckoutError):
+    pass
+
+
+class OutOfStockError(CheckoutError):
+    def __init__(self, product_name):
+        self.product_name = product_name
+        super().__init__(f'Not enough stock for {product_name}.')
+
+
+def checkout(user):
+    """
+    Turn the user's Cart into an Order.
+
+    Cart lines are read before the transaction starts so the write
+    transaction only holds the SQLite lock for the stock UPDATEs and
+    inserts. Each product's stock is decremented with one conditional
+    UPDATE against its available-to-sell figure, stock plus the movements
+    not yet compacted, the same figure add_to_cart checks; if any product
+    is short the whole checkout rolls back. Prices are read inside the
+    transaction, so a price schedule applied meanwhile is charged.
+    """
+    items = list(
+        CartItem.objects.filter(cart__user=user).select_related('product').order_by('product_id')
+    )
+    if not items:
+        raise EmptyCartError('Your cart is empty.')
+    product_ids = [item.product_id for item in items]
+
+    with transaction.atomic():
+        for item in items:
+            updated = Product.objects.filter(
+                id=item.product_id, is_available=True, stock__gte=Value(item.quantity) - pending_quantity()
+            ).update(stock=F('stock') - item.quantity, updated_at=timezone.now())
+            if not updated:
+                raise OutOfStockError(item.product.name)
+        # The stock UPDATEs bypass post_save
+        record_changes(CatalogChange.PRODUCT, product_ids)
+        rows = list(Product.objects.filter(id__in=product_ids).values_list('id', 'stock', 'price'))
+        stock = {product_id: value for product_id, value, _ in rows}
+        prices = {product_id: value for product_id, _, value in rows}
+        record_product_changes(
+            [
+                (item.product_id, ProductAudit.STOCK, stock[item.product_id] + item.quantity, stock[item.product_id])
+                for item in items
+            ],
+            user=user,
+            source=ProductAudit.CHECKOUT,
+        )
+        total = sum(prices[item.product_id] * item.quantity for item in items)
+
+        order = Order.objects.create(user=user, total_price=total)
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product_id=item.product_id,
+                product_name=item.product.name,
+                unit_price=prices[item.product_id],
+                quantity=item.quantity,
+            )
+            for item in items
+        ])
+        # Keep the stock ledger complete; these sales are already in Product.stock
+        StockMovement.objects.bulk_create([
+            StockMovement(
+                product_id=item.product_id,
+                kind=StockMovement.SALE,
+                quantity=-item.quantity,
+                note=f'Order #{order.pk}',
+                is_applied=True,
+            )
+            for item in items
+        ])
+        CartItem.objects.filter(id__in=[item.id for item in items]).delete()
+        Cart.touch(items[0].cart_id)
+
+    invalidate_available_stock(product_ids)
+    # The stock UPDATEs bypass post_save, so publish the new levels here
+    publish_products(product_ids)
+    return order
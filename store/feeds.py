@@ -0,0 +1,262 @@
+# store/feeds.py
+"""
+Sitemap and shopping feed files for crawlers.
+
+Products are split into shards by primary key range (``SHARD_SIZE`` ids
+each), so a product always lands in the same shard. Every run fingerprints
+each shard with one grouped query (product count and latest
+``Product.updated_at``) and rebuilds only shards whose fingerprint changed
+since the manifest written by the previous run. Each rebuilt shard is
+streamed with a chunked ``iterator()`` query into:
+
+- ``sitemap-products-<n>.xml``, listed by the ``sitemap.xml`` index;
+- a CSV and an RSS fragment in ``parts/``, concatenated into the full
+  ``products.csv`` and ``products.xml`` feeds.
+
+Files are written atomically, and left untouched when their content is
+unchanged, so their mtime (served as Last-Modified by config.serving) only
+moves when something a crawler cares about did. Large files also get a
+``.gz`` sibling for clients that accept gzip.
+"""
+import csv
+import gzip
+import io
+import json
+import os
+from pathlib import Path
+from urllib.parse import urljoin
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import Count, F, Max, Prefetch
+from django.urls import reverse
+
+from .models import Category, Product, ProductImage, subtree_q
+
+FEEDS_DIR = 'feeds'
+SHARD_SIZE = 10000
+ITERATOR_CHUNK_SIZE = 500
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+MIN_COMPRESS_SIZE = 1024
+
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+CSV_COLUMNS = ['id', 'title', 'description', 'link', 'image_link', 'availability', 'price', 'product_type']
+
+
+def feeds_root():
+    return Path(settings.MEDIA_ROOT) / FEEDS_DIR
+
+
+def write_if_changed(path, content):
+    """Atomically replace ``path`` with ``content`` (bytes). Returns False if it was already identical."""
+    try:
+        if path.read_bytes() == content:
+            return False
+    except FileNotFoundError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(path.name + '.tmp')
+    temp_path.write_bytes(content)
+    os.replace(temp_path, path)
+
+    gzip_path = path.with_name(path.name + '.gz')
+    if len(content) >= MIN_COMPRESS_SIZE:
+        temp_path.write_bytes(gzip.compress(content, compresslevel=9, mtime=0))
+        os.replace(temp_path, gzip_path)
+    else:
+        gzip_path.unlink(missing_ok=True)
+    return True
+
+
+def remove_file(path):
+    path.unlink(missing_ok=True)
+    path.with_name(path.name + '.gz').unlink(missing_ok=True)
+
+
+def shard_fingerprints():
+    """{shard: [product count, latest updated_at]} for every non-empty shard, in one query."""
+    rows = (
+        Product.objects.order_by()
+        .annotate(shard=(F('id') - 1) / SHARD_SIZE)
+        .values('shard')
+        .annotate(count=Count('id'), last=Max('updated_at'))
+    )
+    return {str(row['shard']): [row['count'], row['last'].isoformat()] for row in rows}
+
+
+def shard_products(shard):
+    """Stream the products of one shard with their category and main image."""
+    first_id = int(shard) * SHARD_SIZE + 1
+    return (
+        Product.objects.filter(id__gte=first_id, id__lt=first_id + SHARD_SIZE, category__isnull=False)
+        .select_related('category')
+        .prefetch_related(
+            Prefetch('images', queryset=ProductImage.objects.filter(is_main=True), to_attr='main_images')
+        )
+        .order_by('id')
+        .iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+    )
+
+
+def product_url(base_url, product):
+    return base_url + reverse('store:product_detail', args=[product.category.slug, product.slug])
+
+
+def _lastmod(value):
+    return value.strftime('%Y-%m-%dT%H:%M:%SZ') if value.utcoffset() is not None else value.isoformat()
+
+
+def render_shard(shard, base_url, hidden_category_ids):
+    """Build (sitemap XML, CSV rows, RSS items) for one shard."""
+    urls, rss_items = [], []
+    csv_buffer = io.StringIO()
+    writer = csv.writer(csv_buffer)
+    for product in shard_products(shard):
+        if product.category_id in hidden_category_ids:
+            continue
+        link = product_url(base_url, product)
+        image_link = urljoin(base_url + '/', product.main_images[0].image.url) if product.main_images else ''
+        availability = 'in stock' if product.is_available and product.stock > 0 else 'out of stock'
+        price = f'{product.price:.2f} INR'
+
+        if product.is_available:
+            urls.append(
+                f'<url><loc>{escape(link)}</loc><lastmod>{_lastmod(product.updated_at)}</lastmod></url>'
+            )
+        writer.writerow([
+            product.id, product.name, product.description, link, image_link,
+            availability, price, product.category.name,
+        ])
+        rss_items.append(
+            '<item>'
+            f'<g:id>{product.id}</g:id>'
+            f'<title>{escape(product.name)}</title>'
+            f'<description>{escape(product.description)}</description>'
+            f'<link>{escape(link)}</link>'
+            f'<g:image_link>{escape(image_link)}</g:image_link>'
+            f'<g:availability>{availability}</g:availability>'
+            f'<g:price>{price}</g:price>'
+            f'<g:product_type>{escape(product.category.name)}</g:product_type>'
+            '</item>'
+        )
+
+    sitemap = (
+        f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{SITEMAP_NS}">\n'
+        + ''.join(f'{url}\n' for url in urls)
+        + '</urlset>\n'
+    )
+    return sitemap, csv_buffer.getvalue(), ''.join(f'{item}\n' for item in rss_items)
+
+
+def render_categories(base_url, hidden_category_ids):
+    urls = [
+        f'<url><loc>{escape(base_url + reverse("store:product_filter", args=[slug]))}</loc></url>'
+        for slug in Category.objects.exclude(id__in=hidden_category_ids).order_by('path').values_list('slug', flat=True)
+    ]
+    return (
+        f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{SITEMAP_NS}">\n'
+        f'<url><loc>{escape(base_url + reverse("store:product_list"))}</loc></url>\n'
+        + ''.join(f'{url}\n' for url in urls)
+        + '</urlset>\n'
+    )
+
+
+def hidden_category_ids():
+    """Ids of inactive categories and everything below them; the storefront hides these."""
+    inactive_paths = Category.objects.filter(is_active=False).values_list('path', flat=True)
+    hidden = set()
+    for path in inactive_paths:
+        hidden.update(Category.objects.filter(subtree_q(path)).values_list('id', flat=True))
+    return hidden
+
+
+def load_manifest(root):
+    try:
+        return json.loads((root / MANIFEST_NAME).read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def build_feeds(full=False, base_url=None):
+    """
+    Bring the sitemap and feed files under MEDIA_ROOT/feeds up to date.
+    Returns {'rebuilt': [...], 'removed': [...], 'unchanged': n} by shard.
+    """
+    root = feeds_root()
+    base_url = (base_url or settings.SITE_URL).rstrip('/')
+    hidden = sorted(hidden_category_ids())
+    settings_key = {'version': MANIFEST_VERSION, 'shard_size': SHARD_SIZE, 'base_url': base_url, 'hidden': hidden}
+
+    manifest = load_manifest(root)
+    if manifest.get('settings') != settings_key:
+        full = True
+    previous = {} if full else manifest.get('shards', {})
+    # Fingerprint before reading any product: an edit made while the shards
+    # are written leaves a stale fingerprint, so the next run picks it up
+    current = shard_fingerprints()
+
+    rebuilt = sorted((shard for shard in current if previous.get(shard) != current[shard]), key=int)
+    removed = sorted((shard for shard in previous if shard not in current), key=int)
+    parts = root / 'parts'
+    for shard in rebuilt:
+        sitemap, csv_part, rss_part = render_shard(shard, base_url, set(hidden))
+        write_if_changed(root / f'sitemap-products-{shard}.xml', sitemap.encode())
+        write_if_changed(parts / f'products-{shard}.csv', csv_part.encode())
+        write_if_changed(parts / f'products-{shard}.xml', rss_part.encode())
+    for shard in removed:
+        remove_file(root / f'sitemap-products-{shard}.xml')
+        remove_file(parts / f'products-{shard}.csv')
+        remove_file(parts / f'products-{shard}.xml')
+
+    shards = sorted(current, key=int)
+    if full or rebuilt or removed or not (root / 'sitemap.xml').exists():
+        write_if_changed(root / 'sitemap-categories.xml', render_categories(base_url, set(hidden)).encode())
+        write_index(root, base_url, shards, current)
+        write_full_feeds(root, parts, shards, base_url)
+
+    # Written last: a run that dies midway is simply redone next time
+    write_if_changed(
+        root / MANIFEST_NAME,
+        json.dumps({'settings': settings_key, 'shards': current}, indent=1, sort_keys=True).encode(),
+    )
+    return {'rebuilt': rebuilt, 'removed': removed, 'unchanged': len(current) - len(rebuilt)}
+
+
+def write_index(root, base_url, shards, fingerprints):
+    def loc(name):
+        return escape(base_url + reverse('feed_file', kwargs={'path': name}))
+
+    entries = [f'<sitemap><loc>{loc("sitemap-categories.xml")}</loc></sitemap>']
+    for shard in shards:
+        entries.append(
+            f'<sitemap><loc>{loc(f"sitemap-products-{shard}.xml")}</loc>'
+            f'<lastmod>{fingerprints[shard][1]}</lastmod></sitemap>'
+        )
+    index = (
+        f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{SITEMAP_NS}">\n'
+        + ''.join(f'{entry}\n' for entry in entries)
+        + '</sitemapindex>\n'
+    )
+    write_if_changed(root / 'sitemap.xml', index.encode())
+
+
+def write_full_feeds(root, parts, shards, base_url):
+    """Concatenate the per-shard fragments; no database queries."""
+    header = io.StringIO()
+    csv.writer(header).writerow(CSV_COLUMNS)
+    csv_content = [header.getvalue().encode()]
+    rss_content = [
+        b'<?xml version="1.0" encoding="UTF-8"?>\n'
+        b'<rss version="2.0" xmlns:g="http://base.google.com/ns/1.0">\n<channel>\n'
+        + f'<title>DD Creation</title><link>{escape(base_url)}/</link>\n'.encode()
+    ]
+    for shard in shards:
+        for name, content in (('csv', csv_content), ('xml', rss_content)):
+            try:
+                content.append((parts / f'products-{shard}.{name}').read_bytes())
+            except FileNotFoundError:
+                pass
+    rss_content.append(b'</channel>\n</rss>\n')
+    write_if_changed(root / 'products.csv', b''.join(csv_content))
+    write_if_changed(root / 'products.xml', b''.join(rss_content))
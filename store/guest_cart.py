@@ -0,0 +1,156 @@
+# store/guest_cart.py
+from django.conf import settings
+
+from .models import Cart, CartItem, Product
+
+GUEST_CART_COOKIE = getattr(settings, 'GUEST_CART_COOKIE', 'guest_cart')
+GUEST_CART_SALT = 'store.guest_cart'
+GUEST_CART_MAX_AGE = getattr(settings, 'GUEST_CART_MAX_AGE', 60 * 60 * 24 * 30)
+
+# Keep the cookie well under the 4KB browser limit
+MAX_GUEST_CART_LINES = 50
+MAX_LINE_QUANTITY = 100
+
+
+class GuestCart:
+    """
+    Cart for anonymous shoppers, kept in a signed cookie as "product_id:qty"
+    pairs so that browsing visitors (and bots) never write to the database.
+    """
+
+    def __init__(self, request):
+        raw = request.get_signed_cookie(
+            GUEST_CART_COOKIE, default='', salt=GUEST_CART_SALT, max_age=GUEST_CART_MAX_AGE
+        )
+        self.lines = self._decode(raw)
+        self.had_cookie = GUEST_CART_COOKIE in request.COOKIES
+        self._cart_items = None
+
+    @staticmethod
+    def _decode(raw):
+        lines = {}
+        for pair in raw.split('|') if raw else []:
+            try:
+                product_id, quantity = (int(part) for part in pair.split(':', 1))
+            except ValueError:
+                continue
+            if product_id > 0 and quantity > 0:
+                lines[product_id] = min(quantity, MAX_LINE_QUANTITY)
+        return lines
+
+    def _encode(self):
+        return '|'.join(f'{product_id}:{quantity}' for product_id, quantity in self.lines.items())
+
+    def __bool__(self):
+        return bool(self.lines)
+
+    def add(self, product_id, quantity=1):
+        if product_id not in self.lines and len(self.lines) >= MAX_GUEST_CART_LINES:
+            return False
+        self.set(product_id, self.lines.get(product_id, 0) + quantity)
+        return True
+
+    def set(self, product_id, quantity):
+        if quantity > 0:
+            self.lines[product_id] = min(quantity, MAX_LINE_QUANTITY)
+        else:
+            self.lines.pop(product_id, None)
+        self._cart_items = None
+
+    def remove(self, product_id):
+        self.set(product_id, 0)
+
+    def save(self, response):
+        """
+        Write the cart back to the response. An empty cart drops the cookie
+        only if the browser sent one, so cart views for shoppers who never
+        added anything send no Set-Cookie header.
+        """
+        if not self.lines:
+            if self.had_cookie:
+                response.delete_cookie(GUEST_CART_COOKIE)
+            return
+        response.set_signed_cookie(
+            GUEST_CART_COOKIE,
+            self._encode(),
+            salt=GUEST_CART_SALT,
+            max_age=GUEST_CART_MAX_AGE,
+            httponly=True,
+            samesite='Lax',
+        )
+
+    def clear(self, response):
+        self.lines = {}
+        self._cart_items = None
+        response.delete_cookie(GUEST_CART_COOKIE)
+
+    @property
+    def items(self):
+        """
+        Unsaved CartItem instances so cart templates render guest and user
+        carts the same way. Guest items use the product id as their id.
+        """
+        if self._cart_items is None:
+            products = Product.objects.filter(
+                id__in=self.lines, is_available=True
+            ).select_related('category').prefetch_related('images')
+            self._cart_items = [
+                CartItem(id=product.id, product=product, quantity=self.lines[product.id])
+                for product in products
+            ]
+        return self._cart_items
+
+    @property
+    def total_price(self):
+        return sum(item.total_price for item in self.items)
+
+    @property
+    def total_quantity(self):
+        return sum(item.quantity for item in self.items)
+
+    def merge_into(self, user):
+        """
+        Merge the guest lines into the user's Cart with a single bulk upsert.
+        Quantities of products already in the user's cart are added together.
+        """
+        if not self.lines:
+            return 0
+
+        cart, created = Cart.objects.get_or_create(user=user)
+        product_ids = Product.objects.filter(
+            id__in=self.lines, is_available=True
+        ).values_list('id', flat=True)
+        existing = {} if created else dict(
+            cart.items.filter(product_id__in=self.lines).values_list('product_id', 'quantity')
+        )
+
+        merged = [
+            CartItem(
+                cart=cart,
+                product_id=product_id,
+                quantity=min(existing.get(product_id, 0) + self.lines[product_id], MAX_LINE_QUANTITY),
+            )
+            for product_id in product_ids
+        ]
+        if merged:
+            CartItem.objects.bulk_create(
+                merged,
+                update_conflicts=True,
+                unique_fields=['cart', 'product'],
+                update_fields=['quantity'],
+            )
+            Cart.touch(cart.pk)
+        return len(merged)
+
+
+def merge_guest_cart(request, user, response):
+    """
+    Move the anonymous visitor's cookie cart into ``user``'s Cart after
+    login/signup and drop the cookie from ``response``.
+    """
+    guest_cart = GuestCart(request)
+    if not guest_cart:
+        return 0
+    merged = guest_cart.merge_into(user)
+    guest_cart.clear(response)
+    return merged
@@ -0,0 +1,237 @@
+# store/images.py
+"""
+Reference counting, garbage collection and backfill for the
+content-addressed product image store (config.storage.ContentAddressedStorage).
+
+Each stored file has an ``ImageBlob`` row counting the ProductImage rows
+that use it. Signals keep the count in the same transaction as the row
+change. A file stays on disk after its count reaches zero. ``collect_garbage``
+deletes it once it has been unreferenced for a grace period, long enough
+for an upload that reused it to be saved. It also deletes blob files that
+never got a row, e.g. an upload whose form was rejected.
+
+``dedupe_images`` moves files saved before content addressing into the
+store, so identical uploads collapse into one file, and then recounts every
+reference.
+"""
+import hashlib
+import os
+import re
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .changes import record_changes
+from .models import CatalogChange, ImageBlob, Product, ProductImage
+
+GC_GRACE_HOURS = 24
+BATCH_SIZE = 500
+
+
+def image_storage():
+    return ProductImage._meta.get_field('image').storage
+
+
+def image_dir():
+    return ProductImage._meta.get_field('image').upload_to
+
+
+def is_blob_name(name):
+    pattern = rf'{re.escape(image_dir())}/[0-9a-f]{{2}}/[0-9a-f]{{2}}/[0-9a-f]{{64}}(\.\w+)?'
+    return re.fullmatch(pattern, name) is not None
+
+
+def retain(name):
+    """Count one more use of ``name``; call inside the transaction that stored the reference."""
+    if not name:
+        return
+    if ImageBlob.objects.filter(name=name).update(ref_count=F('ref_count') + 1, unreferenced_at=None):
+        return
+    storage = image_storage()
+    size = storage.size(name) if storage.exists(name) else 0
+    try:
+        with transaction.atomic():
+            ImageBlob.objects.create(name=name, size=size, ref_count=1)
+    except IntegrityError:
+        # Created concurrently
+        ImageBlob.objects.filter(name=name).update(ref_count=F('ref_count') + 1, unreferenced_at=None)
+
+
+def release(name):
+    """Count one use of ``name`` less; the file is left for ``collect_garbage``."""
+    if not name:
+        return
+    ImageBlob.objects.filter(name=name, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+    ImageBlob.objects.filter(name=name, ref_count=0, unreferenced_at__isnull=True).update(
+        unreferenced_at=timezone.now()
+    )
+
+
+def recount_references():
+    """
+    Recompute every ImageBlob's count from the ProductImage rows. Returns
+    the number corrected. Works through BATCH_SIZE blobs (then referenced
+    names) at a time, each batch in its own short transaction, so the
+    write lock is never held for the whole table.
+    """
+    now = timezone.now()
+    corrected = 0
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            batch = list(ImageBlob.objects.filter(id__gt=last_id).order_by('id')[:BATCH_SIZE])
+            if not batch:
+                break
+            last_id = batch[-1].id
+            counts = dict(
+                ProductImage.objects.filter(image__in=[blob.name for blob in batch])
+                .order_by().values_list('image').annotate(uses=Count('id'))
+            )
+            changed = []
+            for blob in batch:
+                uses = counts.get(blob.name, 0)
+                if blob.ref_count != uses or (uses == 0) != (blob.unreferenced_at is not None):
+                    blob.ref_count = uses
+                    blob.unreferenced_at = (blob.unreferenced_at or now) if uses == 0 else None
+                    changed.append(blob)
+            ImageBlob.objects.bulk_update(changed, ['ref_count', 'unreferenced_at'])
+        corrected += len(changed)
+
+    # Referenced files without a row
+    storage = image_storage()
+    created = 0
+    last_name = ''
+    referenced = ProductImage.objects.exclude(image='').order_by('image').values_list('image').annotate(uses=Count('id'))
+    while batch := list(referenced.filter(image__gt=last_name)[:BATCH_SIZE]):
+        last_name = batch[-1][0]
+        known = set(ImageBlob.objects.filter(name__in=[name for name, _ in batch]).values_list('name', flat=True))
+        missing = [
+            ImageBlob(name=name, ref_count=uses, size=storage.size(name) if storage.exists(name) else 0)
+            for name, uses in batch
+            if name not in known
+        ]
+        # A row retain() created meanwhile already counts its use
+        ImageBlob.objects.bulk_create(missing, ignore_conflicts=True)
+        created += len(missing)
+    return corrected + created
+
+
+def _walk_blob_files(storage):
+    """Yield the store's blob names and leftover temporary uploads."""
+    root = storage.path(image_dir())
+    for directory, _, filenames in os.walk(root):
+        relative = os.path.relpath(directory, storage.location).replace(os.sep, '/')
+        for filename in filenames:
+            name = f'{relative}/{filename}'
+            if is_blob_name(name) or filename.startswith('.upload-'):
+                yield name
+
+
+def collect_garbage(grace_hours=GC_GRACE_HOURS):
+    """
+    Delete blob files no ProductImage has used for ``grace_hours``.
+    Returns (files deleted, bytes freed).
+    """
+    storage = image_storage()
+    grace = timedelta(hours=grace_hours)
+    cutoff = timezone.now() - grace
+    deleted = freed = 0
+
+    def remove(name):
+        nonlocal deleted, freed
+        try:
+            size = storage.size(name)
+        except FileNotFoundError:
+            return
+        storage.delete(name)
+        deleted += 1
+        freed += size
+
+    # Unreferenced blobs
+    last_id = 0
+    orphans = ImageBlob.objects.filter(unreferenced_at__lt=cutoff, ref_count=0).order_by('id')
+    while batch := list(orphans.filter(id__gt=last_id)[:BATCH_SIZE]):
+        last_id = batch[-1].id
+        for blob in batch:
+            # A fresh mtime means an upload just reused the file; its row comes next
+            if storage.exists(blob.name) and storage.age(blob.name) < grace.total_seconds():
+                continue
+            if ImageBlob.objects.filter(pk=blob.pk, ref_count=0).delete()[0]:
+                remove(blob.name)
+
+    def remove_untracked(names):
+        tracked = set(ImageBlob.objects.filter(name__in=names).values_list('name', flat=True))
+        for name in names:
+            if name not in tracked:
+                remove(name)
+
+    # Files that never got a row, and temporary files of interrupted uploads
+    pending = []
+    for name in _walk_blob_files(storage):
+        if storage.age(name) < grace.total_seconds():
+            continue
+        pending.append(name)
+        if len(pending) >= BATCH_SIZE:
+            remove_untracked(pending)
+            pending = []
+    remove_untracked(pending)
+    return deleted, freed
+
+
+def dedupe_images(dry_run=False):
+    """
+    Move every image stored outside the content-addressed layout into it,
+    deleting the original file. Returns a dict of counts and bytes.
+    """
+    storage = image_storage()
+    stats = {'images': 0, 'missing': 0, 'stored': 0, 'reused': 0, 'bytes_before': 0, 'bytes_after': 0}
+    seen = set()
+    last_id = 0
+    legacy = ProductImage.objects.exclude(image='').order_by('id')
+    while batch := list(legacy.filter(id__gt=last_id).only('id', 'image', 'product_id')[:BATCH_SIZE]):
+        last_id = batch[-1].id
+        moved, product_ids, old_names = {}, set(), set()
+        for image in batch:
+            old_name = image.image.name
+            if is_blob_name(old_name):
+                continue
+            try:
+                with storage.open(old_name) as original:
+                    digest = hashlib.file_digest(original, 'sha256').hexdigest()
+                    size = storage.size(old_name)
+                    new_name = storage.blob_name(image_dir(), digest, os.path.splitext(old_name)[1])
+                    stats['images'] += 1
+                    stats['bytes_before'] += size
+                    if new_name in seen or storage.exists(new_name):
+                        stats['reused'] += 1
+                    else:
+                        stats['stored'] += 1
+                        stats['bytes_after'] += size
+                        if not dry_run:
+                            new_name = storage.save(f'{image_dir()}/{os.path.basename(old_name)}', original)
+                    seen.add(new_name)
+            except FileNotFoundError:
+                stats['missing'] += 1
+                continue
+            moved[image.id] = (old_name, new_name)
+            product_ids.add(image.product_id)
+            old_names.add(old_name)
+
+        if dry_run or not moved:
+            continue
+        with transaction.atomic():
+            for image_id, (old_name, new_name) in moved.items():
+                # No signals here: recount_references() fixes the counts below
+                ProductImage.objects.filter(pk=image_id, image=old_name).update(image=new_name)
+            # The image URLs changed: resync clients and rebuild the product feed shards
+            record_changes(CatalogChange.IMAGE, list(moved))
+            Product.objects.filter(id__in=product_ids).update(updated_at=timezone.now())
+        still_used = set(ProductImage.objects.filter(image__in=old_names).values_list('image', flat=True))
+        for old_name in old_names - still_used:
+            storage.delete(old_name)
+
+    if not dry_run:
+        recount_references()
+    return stats
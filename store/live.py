@@ -0,0 +1,144 @@
+# store/live.py
+"""
+Live stock and price updates for open storefront pages.
+
+Product changes made in this process are published to an in-process
+broadcast hub, and each Server-Sent Events connection (ASGI only, see
+``views.product_events``) subscribes to the products on its page. Every
+subscriber has its own bounded queue on the event loop. A client that falls
+``SUBSCRIBER_QUEUE_SIZE`` events behind is disconnected rather than allowed
+to buffer without limit; EventSource reconnects and starts from a fresh
+snapshot.
+"""
+import asyncio
+import json
+import threading
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Product
+
+SUBSCRIBER_QUEUE_SIZE = 100
+MAX_WATCHED_PRODUCTS = 200
+KEEPALIVE_SECONDS = 15
+RECONNECT_MS = 3000
+
+
+class Subscriber:
+    def __init__(self, product_ids):
+        self.product_ids = frozenset(product_ids)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        self.dropped = False
+
+    def offer(self, event):
+        """Queue ``event``; always runs on the subscriber's own loop."""
+        if self.dropped:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too slow to keep up: discard the backlog and end the stream
+            self.dropped = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class BroadcastHub:
+    """Fans product events out to the subscribers watching each product."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._watchers = {}
+
+    def subscribe(self, product_ids):
+        subscriber = Subscriber(product_ids)
+        with self._lock:
+            for product_id in subscriber.product_ids:
+                self._watchers.setdefault(product_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            for product_id in subscriber.product_ids:
+                watchers = self._watchers.get(product_id)
+                if watchers:
+                    watchers.discard(subscriber)
+                    if not watchers:
+                        del self._watchers[product_id]
+
+    def watched(self, product_ids):
+        """The subset of ``product_ids`` someone is subscribed to."""
+        with self._lock:
+            return [product_id for product_id in product_ids if product_id in self._watchers]
+
+    def publish(self, events):
+        """Deliver events (dicts with an ``id``) to their watchers. Safe from any thread."""
+        with self._lock:
+            deliveries = [
+                (subscriber, event)
+                for event in events
+                for subscriber in self._watchers.get(event['id'], ())
+            ]
+        for subscriber, event in deliveries:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.offer, event)
+            except RuntimeError:
+                # The subscriber's loop has shut down
+                pass
+
+
+hub = BroadcastHub()
+
+
+def product_event(product_id, stock, price, is_available=True):
+    # Unavailable products can't be bought, so they show as out of stock
+    return {
+        'id': product_id,
+        'stock': stock if is_available else 0,
+        'price': f'{Decimal(str(price)):.2f}',
+    }
+
+
+def load_product_events(product_ids):
+    rows = Product.objects.filter(id__in=product_ids).values_list('id', 'stock', 'price', 'is_available')
+    return [product_event(*row) for row in rows]
+
+
+def publish_products(product_ids):
+    """Publish the current stock and price of any watched ``product_ids`` (one query, or none)."""
+    watched = hub.watched(product_ids)
+    if watched:
+        hub.publish(load_product_events(watched))
+
+
+def format_event(name, data):
+    return f'event: {name}\ndata: {json.dumps(data, cls=DjangoJSONEncoder, separators=(",", ":"))}\n\n'
+
+
+async def event_stream(product_ids):
+    """
+    SSE body for one client: the current state of its products, then each
+    change as it is published, with comment lines to keep proxies from
+    timing the connection out.
+    """
+    # Subscribe before the snapshot so no change can slip between the two
+    subscriber = hub.subscribe(product_ids)
+    try:
+        yield f'retry: {RECONNECT_MS}\n\n'
+        for event in await sync_to_async(load_product_events)(list(product_ids)):
+            yield format_event('product', event)
+        while True:
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            if event is None:
+                return
+            yield format_event('product', event)
+    finally:
+        hub.unsubscribe(subscriber)
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from store.pricing import apply_due_price_schedules
+
+
+class Command(BaseCommand):
+    help = 'Start and end due price schedules with one batched UPDATE per schedule.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Keep running and check for due schedules every N seconds (default: run once).',
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        while True:
+            changed = apply_due_price_schedules()
+            self.stdout.write(self.style.SUCCESS(f'Updated {changed} product price(s).'))
+            if interval <= 0:
+                break
+            time.sleep(interval)
@@ -0,0 +1,103 @@
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+from django.db.models import F
+
+from config.replica import REPLICA_ALIAS, refresh_replica, replica_lag, replica_reads
+from store.models import Cart, CartItem, Category, Product
+from users.models import CustomUser
+
+BENCH_EMAIL = 'bench-replica@example.com'
+BENCH_NAME = 'bench-replica'
+
+
+class Command(BaseCommand):
+    help = 'Measure mixed catalog-read/cart-write throughput with and without the read replica.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4, help='Threads reading the catalog.')
+        parser.add_argument('--writers', type=int, default=2, help='Threads writing cart items.')
+        parser.add_argument('--seconds', type=float, default=5, help='Duration of each phase.')
+
+    def handle(self, *args, **options):
+        if REPLICA_ALIAS not in settings.DATABASES:
+            raise CommandError('Set DB_REPLICA_PATH to enable the read replica.')
+
+        category = Category.objects.create(name=BENCH_NAME, slug=BENCH_NAME)
+        product = Product.objects.create(
+            category=category, name=BENCH_NAME, description='Benchmark product', price=Decimal('1.00'), stock=10**6
+        )
+        user = CustomUser.objects.create_user(email=BENCH_EMAIL, password=None)
+        cart = Cart.objects.create(user=user)
+        item = CartItem.objects.create(cart=cart, product=product, quantity=1)
+        try:
+            refresh_replica()
+            self.stdout.write(f"Replica lag {replica_lag():.1f}s; {options['readers']} reader(s), "
+                              f"{options['writers']} writer(s), {options['seconds']}s per phase")
+            for label, primary_only in (('primary only', True), ('with replica', False)):
+                reads, writes, errors = self.run_phase(item.pk, primary_only, options)
+                seconds = options['seconds']
+                self.stdout.write(
+                    f'{label:>13}: {reads / seconds:8.1f} reads/s  {writes / seconds:7.1f} writes/s  '
+                    f'({errors} lock timeout(s))'
+                )
+        finally:
+            user.delete()
+            product.delete()
+            category.delete()
+
+    def run_phase(self, item_id, primary_only, options):
+        counts = {'reads': 0, 'writes': 0, 'errors': 0}
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def count(key):
+            with lock:
+                counts[key] += 1
+
+        def reader():
+            try:
+                while not stop.is_set():
+                    try:
+                        # Same routing as a storefront GET; pinned sends everything to the primary
+                        with replica_reads(pinned=primary_only):
+                            self.read_catalog()
+                        count('reads')
+                    except OperationalError:
+                        count('errors')
+            finally:
+                connections.close_all()
+
+        def writer():
+            try:
+                while not stop.is_set():
+                    try:
+                        with transaction.atomic():
+                            CartItem.objects.filter(pk=item_id).update(quantity=F('quantity') % 50 + 1)
+                        count('writes')
+                    except OperationalError:
+                        count('errors')
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=reader) for _ in range(options['readers'])]
+        threads += [threading.Thread(target=writer) for _ in range(options['writers'])]
+        for thread in threads:
+            thread.start()
+        time.sleep(options['seconds'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return counts['reads'], counts['writes'], counts['errors']
+
+    def read_catalog(self):
+        # Roughly what product_list does per request
+        products = list(
+            Product.objects.filter(is_available=True).select_related('category').prefetch_related('images')[:48]
+        )
+        Category.objects.filter(is_active=True).count()
+        return products
@@ -0,0 +1,105 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Run in a fresh interpreter: import the WSGI app and serve one request. The
+# environ is built by hand; django.test would add its own imports to the count.
+PROBE = '''
+import io, json, sys, time
+start = time.perf_counter()
+import config.wsgi
+loaded = time.perf_counter()
+path, _, query = sys.argv[1].partition('?')
+environ = {
+    'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query,
+    'SERVER_NAME': sys.argv[2], 'SERVER_PORT': '80', 'HTTP_HOST': sys.argv[2], 'SERVER_PROTOCOL': 'HTTP/1.1',
+    'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+    'wsgi.multithread': True, 'wsgi.multiprocess': True, 'wsgi.run_once': False,
+}
+statuses = []
+response = config.wsgi.application(environ, lambda status, headers: statuses.append(status))
+b''.join(response)
+done = time.perf_counter()
+print(json.dumps({
+    'status': statuses[0],
+    'import_ms': (loaded - start) * 1000,
+    'first_response_ms': (done - start) * 1000,
+    'modules': len(sys.modules),
+    # What LAZY_ADMIN defers: every app's admin.py and the admin URLconf
+    'modeladmins': 'store.admin' in sys.modules,
+    # What STOREFRONT_ONLY leaves out: the admin and DRF apps themselves
+    'admin_app': 'django.contrib.admin' in sys.modules,
+    'drf': 'rest_framework' in sys.modules,
+    'pillow': 'PIL.Image' in sys.modules,
+}))
+'''
+
+MODES = {
+    'full': {'LAZY_ADMIN': '0', 'STOREFRONT_ONLY': '0'},
+    'lazy-admin': {'LAZY_ADMIN': '1', 'STOREFRONT_ONLY': '0'},
+    'storefront': {'LAZY_ADMIN': '1', 'STOREFRONT_ONLY': '1'},
+}
+
+
+class Command(BaseCommand):
+    help = 'Measure cold-start time of config.wsgi to the first response, per startup mode.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=3, help='Cold starts per mode (best is reported).')
+        parser.add_argument('--path', default='/', help='URL requested by each worker.')
+        parser.add_argument('--top', type=int, default=10, help='Slowest packages to list per mode (0 to skip).')
+
+    def handle(self, *args, **options):
+        failed = []
+        for mode, mode_env in MODES.items():
+            runs = [self.cold_start(mode_env, options['path']) for _ in range(options['runs'])]
+            best = min(runs, key=lambda run: run[0]['first_response_ms'])
+            result, imports = best
+            self.stdout.write(
+                f"{mode:>11}: first response {result['first_response_ms']:6.0f}ms "
+                f"(import {result['import_ms']:4.0f}ms, {result['modules']} modules, "
+                f"status {result['status'].split()[0]}) "
+                f"modeladmins={result['modeladmins']} admin_app={result['admin_app']} "
+                f"drf={result['drf']} pillow={result['pillow']}"
+            )
+            for total, package in imports[:options['top']]:
+                self.stdout.write(f'{"":>13}{total / 1000:6.1f}ms  {package}')
+            if not result['status'].startswith('200'):
+                failed.append(f"{mode} ({result['status']})")
+        if failed:
+            # An error page is not the storefront's first response
+            raise CommandError(f"{options['path']} did not answer 200 in: {', '.join(failed)}")
+
+    def cold_start(self, mode_env, path):
+        env = {
+            **os.environ,
+            **mode_env,
+            'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'),
+        }
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', PROBE, path, self.host()],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+        )
+        return json.loads(proc.stdout.strip().splitlines()[-1]), self.package_import_times(proc.stderr)
+
+    def host(self):
+        """A host name ALLOWED_HOSTS accepts, so the request is not a DisallowedHost 400."""
+        for host in settings.ALLOWED_HOSTS:
+            if host != '*':
+                return host.lstrip('.')
+        return 'localhost'
+
+    def package_import_times(self, stderr):
+        """Import self-time from ``-X importtime`` summed per top-level package, slowest first."""
+        totals = {}
+        for line in stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            self_us, _, name = line[len('import time:'):].split('|')
+            package = name.strip().split('.')[0]
+            totals[package] = totals.get(package, 0) + int(self_us)
+        return sorted(((total, package) for package, total in totals.items()), reverse=True)
@@ -0,0 +1,82 @@
+import re
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template import engines
+from django.template.backends.jinja2 import Jinja2
+from django.test import RequestFactory
+
+from store.attributes import filter_form, get_filter_attributes
+from store.catalog import get_category_tree
+from store.models import Category, Product
+
+BENCH_PREFIX = 'bench-render-'
+CSRF_RE = re.compile(r'<input type="hidden" name="csrfmiddlewaretoken" value="[^"]*">')
+
+
+class Command(BaseCommand):
+    help = 'Compare product_list.html render time on the Django and Jinja2 engines.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=1000, help='Products in the grid.')
+        parser.add_argument('--renders', type=int, default=20, help='Renders per engine.')
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        # Built directly so the benchmark works whichever engine the site uses
+        params = {key: value for key, value in settings.JINJA2_TEMPLATES.items() if key != 'BACKEND'}
+        jinja2_engine = Jinja2({**params, 'NAME': 'jinja2'})
+
+        # Throwaway catalog, rolled back at the end
+        with transaction.atomic():
+            context = self.build_context(options['products'])
+            outputs = {}
+            for name, engine in (('django', engines['django']), ('jinja2', jinja2_engine)):
+                template = engine.get_template('store/product_list.html')
+                template.render(context, request)  # Warm up template and URL caches
+                start = time.perf_counter()
+                for _ in range(options['renders']):
+                    html = template.render(context, request)
+                elapsed = (time.perf_counter() - start) / options['renders']
+                outputs[name] = html
+                self.stdout.write(f'{name:>7}: {elapsed * 1000:7.1f}ms per render  ({len(html)} bytes)')
+            transaction.set_rollback(True)
+
+        django_html, jinja2_html = (
+            ' '.join(CSRF_RE.sub('', outputs[name]).split()) for name in ('django', 'jinja2')
+        )
+        # The templates differ only in their header comment
+        same = django_html.split('-->', 1)[1] == jinja2_html.split('-->', 1)[1]
+        self.stdout.write(f'Output identical (ignoring whitespace and CSRF tokens): {same}')
+
+    def build_context(self, count):
+        category = Category.objects.create(name=f'{BENCH_PREFIX}category', slug=f'{BENCH_PREFIX}category')
+        Product.objects.bulk_create([
+            Product(
+                category=category,
+                name=f'{BENCH_PREFIX}{i}',
+                slug=f'{BENCH_PREFIX}{i}',
+                description='Benchmark product',
+                price=Decimal('499.00') + i,
+                stock=i % 7,
+            )
+            for i in range(count)
+        ])
+        # Same queryset as store.views.product_list, evaluated once up front
+        products = list(
+            Product.objects.filter(category=category, is_available=True)
+            .select_related('category').prefetch_related('images')
+        )
+        return {
+            'shop_name': 'DD Creation',
+            'current_category': None,
+            'categories': get_category_tree(),
+            'breadcrumbs': [],
+            'products': products,
+            'attribute_filters': filter_form(get_filter_attributes(), {}),
+        }
@@ -0,0 +1,114 @@
+import random
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+
+from store import typeahead
+from store.views import search_suggestions
+
+SYNTHETIC_WORDS = (
+    'classic cotton organic premium vintage slim oversized graphic striped printed embroidered '
+    'black white navy red green blue grey olive maroon mustard pastel neon '
+    'tshirt hoodie sweatshirt cap mug bottle tote sticker poster notebook keychain jacket '
+    'logo retro minimal festival college team event edition limited signature'
+).split()
+
+
+class Command(BaseCommand):
+    help = 'Measure typeahead suggestion latency on the catalog or on a synthetic index.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--queries', type=int, default=5000,
+            help='Number of keystroke queries to time (default: 5000).',
+        )
+        parser.add_argument(
+            '--synthetic', type=int, default=0,
+            help='Index N generated product names instead of the catalog (no database access).',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--max-p95', type=float, default=1.0,
+            help='Fail when the p95 of suggest() is above this many milliseconds (default: 1).',
+        )
+
+    def synthetic_index(self, size, rng):
+        index = typeahead.CatalogIndex.__new__(typeahead.CatalogIndex)
+        index.built_at = time.monotonic()
+        index._lock = threading.Lock()
+        index.tree, index.product_categories = {}, {}
+        names = [
+            f'{" ".join(rng.sample(SYNTHETIC_WORDS, rng.randint(2, 4)))} {number}' for number in range(1, size + 1)
+        ]
+        index.products = typeahead.PrefixIndex(
+            [typeahead.Entry(number, name, f'/p/{number}/', rng.randint(0, 500)) for number, name in enumerate(names, 1)],
+            typeahead.MAX_PRODUCTS,
+        )
+        index.categories = typeahead.PrefixIndex(
+            [typeahead.Entry(number, word, f'/{word}/') for number, word in enumerate(SYNTHETIC_WORDS, 1)],
+            typeahead.MAX_CATEGORIES,
+        )
+        return index
+
+    def report(self, label, timings):
+        """Write the latency percentiles; returns the p95 in milliseconds."""
+        timings.sort()
+
+        def percentile(share):
+            return timings[min(int(len(timings) * share), len(timings) - 1)] * 1000
+
+        self.stdout.write(
+            f'{label}: p50 {percentile(0.5):.3f} ms, p95 {percentile(0.95):.3f} ms, '
+            f'p99 {percentile(0.99):.3f} ms, max {timings[-1] * 1000:.3f} ms, '
+            f'mean {statistics.fmean(timings) * 1000:.3f} ms'
+        )
+        return percentile(0.95)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        previous = typeahead._index
+        start = time.perf_counter()
+        if options['synthetic']:
+            index = typeahead._index = self.synthetic_index(options['synthetic'], rng)
+        else:
+            index = typeahead.build_index()
+        self.stdout.write(
+            f'Indexed {len(index.products)} product(s) and {len(index.categories)} category(ies) '
+            f'in {(time.perf_counter() - start) * 1000:.0f} ms.'
+        )
+        names = [entry.name for entry in index.products.entries.values()]
+        if not names:
+            self.stderr.write('Nothing to search: the index is empty.')
+            return
+
+        # What a visitor types, keystroke by keystroke: prefixes of real names
+        queries = []
+        while len(queries) < options['queries']:
+            name = rng.choice(names)
+            queries.extend(name[:length] for length in range(1, min(len(name), 20) + 1))
+        queries = queries[:options['queries']]
+
+        try:
+            timings = []
+            for query in queries:
+                began = time.perf_counter()
+                typeahead.suggest(query)
+                timings.append(time.perf_counter() - began)
+            p95 = self.report('suggest()', timings)
+
+            factory = RequestFactory()
+            timings = []
+            for query in queries:
+                request = factory.get('/search/suggest/', {'q': query})
+                began = time.perf_counter()
+                search_suggestions(request)
+                timings.append(time.perf_counter() - began)
+            self.report('view', timings)
+        finally:
+            if options['synthetic']:
+                typeahead._index = previous
+        if p95 > options['max_p95']:
+            raise CommandError(f"suggest() p95 is {p95:.3f} ms, over the {options['max_p95']} ms target.")
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from store.feeds import build_feeds, feeds_root
+
+
+class Command(BaseCommand):
+    help = 'Regenerate the sitemap and product feed shards whose products changed since the last run.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Rebuild every shard (e.g. after renaming a category).')
+        parser.add_argument('--base-url', help='Absolute site URL for links (default: settings.SITE_URL).')
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Keep running and refresh every N seconds (default: run once).',
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        full = options['full']
+        while True:
+            result = build_feeds(full=full, base_url=options['base_url'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Feeds in {feeds_root()}: {len(result['rebuilt'])} shard(s) rebuilt, "
+                f"{len(result['removed'])} removed, {result['unchanged']} unchanged."
+            ))
+            if interval <= 0:
+                break
+            full = False
+            time.sleep(interval)
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from store.cart_cleanup import abandoned_carts, purge_abandoned_carts
+
+
+class Command(BaseCommand):
+    help = 'Find carts idle past a threshold and delete them in small batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--idle-days', type=int, default=30, help='Carts untouched for this many days are abandoned.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Carts deleted per transaction.')
+        parser.add_argument('--pause', type=float, default=0.05, help='Seconds to sleep between batches.')
+        parser.add_argument('--archive-to', help='Append removed carts to this file as JSON lines before deleting.')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many carts would be removed.')
+
+    def handle(self, *args, **options):
+        if options['idle_days'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--idle-days and --batch-size must be positive.')
+
+        if options['dry_run']:
+            count = abandoned_carts(options['idle_days']).count()
+            self.stdout.write(f"{count} cart(s) idle for more than {options['idle_days']} days.")
+            return
+
+        kwargs = {
+            'idle_days': options['idle_days'],
+            'batch_size': options['batch_size'],
+            'pause': options['pause'],
+        }
+        if options['archive_to']:
+            with open(options['archive_to'], 'a') as archive_file:
+                removed = purge_abandoned_carts(archive_file=archive_file, **kwargs)
+        else:
+            removed = purge_abandoned_carts(**kwargs)
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} abandoned cart(s).'))
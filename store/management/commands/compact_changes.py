@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from store.changes import TOMBSTONE_RETENTION_DAYS, compact_changes
+
+
+class Command(BaseCommand):
+    help = 'Trim the catalog changes feed: superseded changes and old tombstones.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention-days', type=float, default=TOMBSTONE_RETENTION_DAYS,
+            help='Keep tombstones this long; clients offline for longer must resync from cursor 0.',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Keep running and compact every N seconds (default: run once).',
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        while True:
+            superseded, tombstones = compact_changes(options['retention_days'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Removed {superseded} superseded change(s) and {tombstones} expired tombstone(s).'
+            ))
+            if interval <= 0:
+                break
+            time.sleep(interval)
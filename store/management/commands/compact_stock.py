@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from store.stock import compact_stock_movements
+
+
+class Command(BaseCommand):
+    help = 'Fold pending stock movements into Product.stock in one batched UPDATE.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Keep running and compact every N seconds (default: run once).',
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        while True:
+            updated = compact_stock_movements()
+            self.stdout.write(self.style.SUCCESS(f'Compacted stock movements for {updated} product(s).'))
+            if interval <= 0:
+                break
+            time.sleep(interval)
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from store.images import dedupe_images
+
+
+class Command(BaseCommand):
+    help = 'Move existing product images into the content-addressed store, one file per distinct image.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report what would be stored and reused.',
+        )
+
+    def handle(self, *args, **options):
+        stats = dedupe_images(dry_run=options['dry_run'])
+        prefix = 'Would move' if options['dry_run'] else 'Moved'
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {stats['images']} image(s): {stats['stored']} stored, {stats['reused']} duplicate(s); "
+            f"{stats['bytes_before']} bytes -> {stats['bytes_after']} bytes."
+        ))
+        if stats['missing']:
+            self.stderr.write(f"{stats['missing']} image(s) skipped: file missing.")
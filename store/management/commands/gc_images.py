@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from store.images import GC_GRACE_HOURS, collect_garbage
+
+
+class Command(BaseCommand):
+    help = 'Delete product image files that no ProductImage has used for the grace period.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours', type=float, default=GC_GRACE_HOURS,
+            help='Keep unreferenced files this long, so in-flight uploads can still use them.',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Keep running and collect every N seconds (default: run once).',
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        while True:
+            deleted, freed = collect_garbage(options['grace_hours'])
+            self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} unused image file(s), {freed} bytes.'))
+            if interval <= 0:
+                break
+            time.sleep(interval)
@@ -0,0 +1,46 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from config.replica import refresh_replica, replica_lag
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary database into the read replica with the SQLite backup API.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Keep running and refresh every N seconds (default: run once).',
+        )
+        parser.add_argument('--status', action='store_true', help='Only report the current replica lag.')
+
+    def handle(self, *args, **options):
+        if not settings.DB_REPLICA_PATH:
+            raise CommandError('Set DB_REPLICA_PATH to enable the read replica.')
+
+        if options['status']:
+            lag = replica_lag()
+            if lag is None:
+                self.stdout.write(self.style.WARNING('No replica snapshot yet; reads use the primary.'))
+            else:
+                style = self.style.SUCCESS if lag <= settings.REPLICA_MAX_LAG else self.style.WARNING
+                self.stdout.write(style(f'Replica lag {lag:.1f}s (max {settings.REPLICA_MAX_LAG}s).'))
+            return
+
+        interval = options['interval']
+        if interval and interval >= settings.REPLICA_MAX_LAG:
+            self.stdout.write(self.style.WARNING(
+                f'--interval {interval}s is not below REPLICA_MAX_LAG ({settings.REPLICA_MAX_LAG}s); '
+                'reads will fall back to the primary between refreshes.'
+            ))
+        while True:
+            start = time.perf_counter()
+            refresh_replica()
+            self.stdout.write(self.style.SUCCESS(
+                f'Replica refreshed in {(time.perf_counter() - start) * 1000:.0f}ms.'
+            ))
+            if interval <= 0:
+                break
+            time.sleep(interval)
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from config.warmup import HOT_CATEGORIES, HOT_PRODUCTS, warm_caches
+
+
+class Command(BaseCommand):
+    help = 'Preload templates, open database connections and render the hot catalog pages.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--categories', type=int, default=HOT_CATEGORIES,
+            help=f'Number of category pages to render (default: {HOT_CATEGORIES}).',
+        )
+        parser.add_argument(
+            '--products', type=int, default=HOT_PRODUCTS,
+            help=f'Number of product pages to render (default: {HOT_PRODUCTS}).',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Keep running and warm every N seconds (default: run once).',
+        )
+
+    def log(self, step, result, seconds):
+        if step == 'pages':
+            failed = [path for path, status in result.items() if status != 200]
+            summary = f'{len(result) - len(failed)} of {len(result)} page(s) rendered'
+            for path in failed:
+                self.stderr.write(f'  {path}: {result[path]}')
+        elif isinstance(result, list):
+            summary = ', '.join(result)
+        else:
+            summary = str(result)
+        self.stdout.write(f'{step}: {summary} ({seconds * 1000:.0f} ms)')
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        while True:
+            start = time.perf_counter()
+            warm_caches(options['categories'], options['products'], log=self.log)
+            self.stdout.write(self.style.SUCCESS(f'Caches warmed in {time.perf_counter() - start:.2f}s.'))
+            if interval <= 0:
+                break
+            time.sleep(interval)
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0003_cart_cartitem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('receipt', 'Receipt'), ('reservation', 'Reservation'), ('sale', 'Sale'), ('adjustment', 'Adjustment')], max_length=20)),
+                ('quantity', models.IntegerField(help_text='Signed change in stock, e.g. +10 for a receipt, -2 for a sale.')),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('is_applied', models.BooleanField(default=False, help_text='Already folded into Product.stock.')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='store.product')),
+            ],
+            options={
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['is_applied', 'product'], name='stock_pending_idx')],
+            },
+        ),
+    ]
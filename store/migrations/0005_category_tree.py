@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import CharField, Value
+from django.db.models.functions import Cast, Concat
+
+
+def fill_root_paths(apps, schema_editor):
+    # Existing categories are all roots: path is "/<id>/"
+    Category = apps.get_model('store', 'Category')
+    Category.objects.update(path=Concat(Value('/'), Cast('id', CharField()), Value('/')), depth=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0004_stockmovement'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='children', to='store.category'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(fill_root_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0005_category_tree'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('starts_at', models.DateTimeField()),
+                ('ends_at', models.DateTimeField(blank=True, help_text='Leave empty for a permanent change.', null=True)),
+                ('new_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('percent_off', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('active', 'Active'), ('ended', 'Ended')], default='pending', editable=False, max_length=10)),
+                ('applied_at', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('ended_at', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('category', models.ForeignKey(blank=True, help_text='Applies to every product in this category and its subcategories.', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='price_schedules', to='store.category')),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='price_schedules', to='store.product')),
+            ],
+            options={
+                'ordering': ['-starts_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PriceHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('old_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('new_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('changed_at', models.DateTimeField(auto_now_add=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_history', to='store.product')),
+                ('schedule', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='history', to='store.priceschedule')),
+            ],
+            options={
+                'verbose_name_plural': 'Price history',
+                'ordering': ['-changed_at', '-id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='priceschedule',
+            index=models.Index(fields=['status', 'starts_at'], name='price_schedule_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pricehistory',
+            index=models.Index(fields=['product', 'changed_at'], name='price_history_product_idx'),
+        ),
+    ]
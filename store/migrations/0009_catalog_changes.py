@@ -0,0 +1,56 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:36
+
+from itertools import islice
+
+from django.db import migrations, models
+
+SEED_BATCH_SIZE = 2000
+
+
+def seed_changes(apps, schema_editor):
+    # One upsert per existing object, so syncing from cursor 0 loads the whole catalog
+    CatalogChange = apps.get_model('store', 'CatalogChange')
+    for kind, model_name in (
+        ('category', 'Category'),
+        ('attribute', 'ProductAttribute'),
+        ('product', 'Product'),
+        ('image', 'ProductImage'),
+        ('attribute_value', 'ProductAttributeValue'),
+    ):
+        ids = apps.get_model('store', model_name).objects.order_by('id').values_list('id', flat=True)
+        ids = ids.iterator(chunk_size=SEED_BATCH_SIZE)
+        while batch := list(islice(ids, SEED_BATCH_SIZE)):
+            CatalogChange.objects.bulk_create([CatalogChange(kind=kind, object_id=object_id) for object_id in batch])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0008_cart_updated_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogChangeHorizon',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.BigIntegerField(default=0)),
+                ('compacted_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CatalogChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('category', 'Category'), ('attribute', 'Attribute'), ('product', 'Product'), ('image', 'Product image'), ('attribute_value', 'Attribute value')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('action', models.CharField(choices=[('upsert', 'Created or updated'), ('delete', 'Deleted')], default='upsert', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['kind', 'object_id'], name='catalog_change_object_idx')],
+            },
+        ),
+        migrations.RunPython(seed_changes, migrations.RunPython.noop),
+    ]
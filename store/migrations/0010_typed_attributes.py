@@ -0,0 +1,120 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:38
+
+from decimal import Decimal, InvalidOperation
+
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+MAX_INTEGER = 2 ** 63
+MAX_DECIMAL = 10 ** 14
+
+
+def _is_code(value):
+    """Digits with a leading zero ("007", "02134") are codes, not numbers."""
+    digits = value.strip().lstrip('+-')
+    return len(digits) > 1 and digits[0] == '0' and digits[1].isdigit()
+
+
+def _as_integer(value):
+    try:
+        number = int(value.strip())
+    except ValueError:
+        return None
+    return number if abs(number) < MAX_INTEGER else None
+
+
+def _as_decimal(value):
+    try:
+        number = Decimal(value.strip())
+    except InvalidOperation:
+        return None
+    return number.quantize(Decimal('0.0001')) if number.is_finite() and abs(number) < MAX_DECIMAL else None
+
+
+def _batches(queryset):
+    last_id = 0
+    while batch := list(queryset.filter(id__gt=last_id).order_by('id')[:BATCH_SIZE]):
+        yield batch
+        last_id = batch[-1].id
+
+
+def convert_values(apps, schema_editor):
+    """
+    Give each attribute the narrowest type all its values fit (integer, then
+    decimal, else text) and fill the typed columns, a batch at a time. The
+    display strings are left as they are, so reverting the type loses nothing.
+    """
+    ProductAttribute = apps.get_model('store', 'ProductAttribute')
+    ProductAttributeValue = apps.get_model('store', 'ProductAttributeValue')
+    CatalogChange = apps.get_model('store', 'CatalogChange')
+
+    for attribute in ProductAttribute.objects.order_by('id'):
+        values = ProductAttributeValue.objects.filter(attribute=attribute)
+        fits_integer = fits_decimal = values.exists()
+        for batch in _batches(values.only('id', 'value')):
+            fits_integer = fits_integer and all(_as_integer(item.value) is not None for item in batch)
+            fits_decimal = fits_decimal and all(
+                _as_decimal(item.value) is not None and not _is_code(item.value) for item in batch
+            )
+            if not fits_decimal:
+                break
+        if not fits_decimal:
+            continue
+
+        attribute.data_type = 'integer' if fits_integer else 'decimal'
+        attribute.save(update_fields=['data_type'])
+        CatalogChange.objects.create(kind='attribute', object_id=attribute.id)
+        for batch in _batches(values):
+            for item in batch:
+                if fits_integer:
+                    item.value_int = _as_integer(item.value)
+                else:
+                    item.value_decimal = _as_decimal(item.value)
+            ProductAttributeValue.objects.bulk_update(batch, ['value_int', 'value_decimal'])
+            CatalogChange.objects.bulk_create(
+                [CatalogChange(kind='attribute_value', object_id=item.id) for item in batch]
+            )
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0009_catalog_changes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productattribute',
+            name='choices',
+            field=models.TextField(blank=True, help_text='Allowed values, one per line (choice attributes only).'),
+        ),
+        migrations.AddField(
+            model_name='productattribute',
+            name='data_type',
+            field=models.CharField(choices=[('text', 'Text'), ('integer', 'Integer'), ('decimal', 'Decimal'), ('choice', 'Choice')], default='text', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='productattributevalue',
+            name='value_decimal',
+            field=models.DecimalField(blank=True, decimal_places=4, editable=False, max_digits=18, null=True),
+        ),
+        migrations.AddField(
+            model_name='productattributevalue',
+            name='value_int',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='productattributevalue',
+            index=models.Index(fields=['attribute', 'value'], name='attr_value_text_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productattributevalue',
+            index=models.Index(fields=['attribute', 'value_int'], name='attr_value_int_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productattributevalue',
+            index=models.Index(fields=['attribute', 'value_decimal'], name='attr_value_decimal_idx'),
+        ),
+        migrations.RunPython(convert_values, migrations.RunPython.noop),
+    ]
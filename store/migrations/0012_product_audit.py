@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:11
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0011_image_blobs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductAudit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(choices=[('price', 'Price'), ('stock', 'Stock'), ('is_available', 'Availability')], max_length=20)),
+                ('old_value', models.CharField(blank=True, max_length=64)),
+                ('new_value', models.CharField(blank=True, max_length=64)),
+                ('source', models.CharField(choices=[('admin', 'Admin'), ('pricing', 'Price schedule'), ('stock_compaction', 'Stock compaction'), ('checkout', 'Checkout'), ('other', 'Other')], default='other', max_length=20)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('product', models.ForeignKey(db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='audit_entries', to='store.product')),
+                ('user', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-changed_at', '-id'],
+                'indexes': [models.Index(fields=['product', '-changed_at', '-id'], name='product_audit_history_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0012_product_audit'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productimage',
+            index=models.Index(fields=['image'], name='product_image_name_idx'),
+        ),
+    ]
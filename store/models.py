@@ -1,14 +1,33 @@
 # store/models.py
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
 from django.conf import settings
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.core.files.storage import storages
+from django.db import models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Substr
+from django.utils import timezone
 from django.utils.text import slugify
 
+# Limits of the typed attribute columns (BigIntegerField and
+# DecimalField(max_digits=18, decimal_places=4))
+MAX_ATTRIBUTE_INTEGER = 2 ** 63
+MAX_ATTRIBUTE_DECIMAL = 10 ** 14
+
 ## 1. Category Model
 class Category(models.Model):
+    parent = models.ForeignKey(
+        'self', on_delete=models.PROTECT, null=True, blank=True, related_name='children'
+    )
     name = models.CharField(max_length=255, unique=True)
     slug = models.SlugField(max_length=255, unique=True, editable=False)
     description = models.TextField(blank=True)
     is_active = models.BooleanField(default=True)
+    # Materialized path of ancestor ids, e.g. "/1/4/9/", kept up to date on save
+    path = models.CharField(max_length=255, db_index=True, editable=False, default='')
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
 
     class Meta:
         verbose_name_plural = 'Categories'
@@ -17,11 +36,43 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+    def clean(self):
+        if self.parent_id and self.pk and f'/{self.pk}/' in (self.parent.path or f'/{self.parent_id}/'):
+            raise ValidationError({'parent': 'A category cannot be moved under itself or one of its subcategories.'})
+
     def save(self, *args, **kwargs):
         # Auto-generate slug from name
         if not self.slug:
             self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+        old_path = self.path
+        # One transaction: on_commit hooks of the save signals run after the path UPDATEs
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+            parent_path = self.parent.path if self.parent_id else '/'
+            new_path = f'{parent_path}{self.pk}/'
+            if new_path != old_path:
+                new_depth = new_path.count('/') - 2
+                Category.objects.filter(pk=self.pk).update(path=new_path, depth=new_depth)
+                if old_path:
+                    # Re-root every descendant with a single UPDATE
+                    Category.objects.filter(subtree_q(old_path)).exclude(pk=self.pk).update(
+                        path=Concat(Value(new_path), Substr('path', len(old_path) + 1)),
+                        depth=F('depth') + (new_depth - self.depth),
+                    )
+                self.path, self.depth = new_path, new_depth
+
+    def get_subtree_q(self, prefix=''):
+        """Q object matching this category and all its descendants."""
+        return subtree_q(self.path, prefix)
+
+
+def subtree_q(path, prefix=''):
+    """
+    Match every path starting with ``path`` as an index-friendly range:
+    paths are digits and "/", and "0" sorts right after "/".
+    """
+    return models.Q(**{f'{prefix}path__gte': path, f'{prefix}path__lt': path[:-1] + '0'})
 
 
 ## 2. Product Model
@@ -55,27 +106,129 @@ class Product(models.Model):
 
 # Defines the name of an attribute (e.g., "Color", "Size", "Material")
 class ProductAttribute(models.Model):
+    TEXT = 'text'
+    INTEGER = 'integer'
+    DECIMAL = 'decimal'
+    CHOICE = 'choice'
+    TYPE_CHOICES = [
+        (TEXT, 'Text'),
+        (INTEGER, 'Integer'),
+        (DECIMAL, 'Decimal'),
+        (CHOICE, 'Choice'),
+    ]
+    NUMERIC_TYPES = (INTEGER, DECIMAL)
+
     name = models.CharField(max_length=100, unique=True)
+    data_type = models.CharField(max_length=10, choices=TYPE_CHOICES, default=TEXT)
+    choices = models.TextField(blank=True, help_text='Allowed values, one per line (choice attributes only).')
     
     def __str__(self):
         return self.name
 
-# Stores the value of an attribute for a specific product
+    @property
+    def is_numeric(self):
+        return self.data_type in self.NUMERIC_TYPES
+
+    @property
+    def value_field(self):
+        """The ProductAttributeValue column holding this attribute's typed values."""
+        return {self.INTEGER: 'value_int', self.DECIMAL: 'value_decimal'}.get(self.data_type, 'value')
+
+    def clean(self):
+        if self.pk and self.type_changed():
+            from .attributes import invalid_values
+            bad = invalid_values(self)
+            if bad:
+                raise ValidationError({
+                    'data_type': f'{len(bad)} existing value(s) do not fit, e.g. {", ".join(repr(v) for v in bad[:5])}.'
+                })
+
+    def save(self, *args, **kwargs):
+        retype = self.pk is not None and self.type_changed()
+        super().save(*args, **kwargs)
+        if retype:
+            from .attributes import retype_values
+            retype_values(self)
+
+    def type_changed(self):
+        stored = ProductAttribute.objects.filter(pk=self.pk).values_list('data_type', 'choices').first()
+        return stored is not None and stored != (self.data_type, self.choices)
+
+    def get_choices(self):
+        return [line.strip() for line in self.choices.splitlines() if line.strip()]
+
+    def parse(self, raw):
+        """
+        Convert a raw string into this attribute's type. Returns (value,
+        value_int, value_decimal); raises ValidationError if it doesn't fit.
+        ``value`` is the string as entered (e.g. "007", "1.50"), only trimmed.
+        """
+        value = str(raw).strip()
+        if self.data_type == self.INTEGER:
+            try:
+                number = int(value)
+            except ValueError:
+                raise ValidationError(f'{self.name} must be a whole number.')
+            if abs(number) >= MAX_ATTRIBUTE_INTEGER:
+                raise ValidationError(f'{self.name} is too large.')
+            return value, number, None
+        if self.data_type == self.DECIMAL:
+            try:
+                number = Decimal(value)
+            except InvalidOperation:
+                raise ValidationError(f'{self.name} must be a number.')
+            if not number.is_finite() or abs(number) >= MAX_ATTRIBUTE_DECIMAL:
+                raise ValidationError(f'{self.name} must be a number below {MAX_ATTRIBUTE_DECIMAL:,}.')
+            return value, None, number.quantize(Decimal('0.0001'))
+        if self.data_type == self.CHOICE and value not in self.get_choices():
+            raise ValidationError(f'{self.name} must be one of: {", ".join(self.get_choices())}.')
+        return value, None, None
+
+# Stores the value of an attribute for a specific product. ``value`` is the
+# display string; integer and decimal attributes also keep the number in an
+# indexed typed column so range filters and sorting run in SQL.
 class ProductAttributeValue(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='attribute_values')
     attribute = models.ForeignKey(ProductAttribute, on_delete=models.CASCADE)
     value = models.CharField(max_length=255) # e.g., "Red", "Large", "Cotton"
+    value_int = models.BigIntegerField(null=True, blank=True, editable=False)
+    value_decimal = models.DecimalField(max_digits=18, decimal_places=4, null=True, blank=True, editable=False)
 
     class Meta:
         # Ensures a product can only have one value for a given attribute
         unique_together = ('product', 'attribute')
         verbose_name = 'Product Attribute Value'
         verbose_name_plural = 'Product Attribute Values'
+        indexes = [
+            models.Index(fields=['attribute', 'value'], name='attr_value_text_idx'),
+            models.Index(fields=['attribute', 'value_int'], name='attr_value_int_idx'),
+            models.Index(fields=['attribute', 'value_decimal'], name='attr_value_decimal_idx'),
+        ]
 
     def __str__(self):
         return f"{self.product.name} - {self.attribute.name}: {self.value}"
+
+    def clean(self):
+        if self.attribute_id:
+            try:
+                self.attribute.parse(self.value)
+            except ValidationError as error:
+                raise ValidationError({'value': error.messages})
+
+    def save(self, *args, **kwargs):
+        # Keep the typed columns in step with the value
+        self.value, self.value_int, self.value_decimal = self.attribute.parse(self.value)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'value' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'value_int', 'value_decimal'}
+        super().save(*args, **kwargs)
     
 
+def product_image_storage():
+    # Content-addressed: each distinct image is stored once (see store.images)
+    return storages['product_images']
+
+
 class ProductImage(models.Model):
     product = models.ForeignKey(
         'Product', 
@@ -83,7 +236,8 @@ class ProductImage(models.Model):
         related_name='images'
     )
     image = models.ImageField(
-        upload_to='products/%Y/%m/%d', 
+        upload_to='products', 
+        storage=product_image_storage,
         help_text='Upload a product image'
     )
     alt_text = models.CharField(
@@ -100,6 +254,10 @@ class ProductImage(models.Model):
         verbose_name = 'Product Image'
         verbose_name_plural = 'Product Images'
         ordering = ['is_main', 'id'] # Main image first
+        indexes = [
+            # Reference recounts and garbage collection look images up by file name
+            models.Index(fields=['image'], name='product_image_name_idx'),
+        ]
 
     def __str__(self):
         return f"Image for {self.product.name}"
@@ -114,9 +272,24 @@ class Cart(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Range scans for idle/abandoned carts
+            models.Index(fields=['updated_at'], name='cart_updated_idx'),
+        ]
+
     def __str__(self):
         return f"Cart ({self.user.email})"
 
+    @classmethod
+    def touch(cls, cart_id):
+        """
+        Bump updated_at when the cart's items change. Skipped if the cart was
+        touched in the last minute, so busy carts cost no extra writes.
+        """
+        now = timezone.now()
+        cls.objects.filter(pk=cart_id, updated_at__lt=now - timedelta(minutes=1)).update(updated_at=now)
+
     @property
     def total_price(self):
         return sum(item.total_price for item in self.items.all())
@@ -143,6 +316,302 @@ class CartItem(models.Model):
     def __str__(self):
         return f"{self.quantity} x {self.product.name}"
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        Cart.touch(self.cart_id)
+
+    def delete(self, *args, **kwargs):
+        cart_id = self.cart_id
+        result = super().delete(*args, **kwargs)
+        Cart.touch(cart_id)
+        return result
+
     @property
     def total_price(self):
-        return self.product.price * self.quantity
\ No newline at end of file
+        return self.product.price * self.quantity
+
+## 4. Stock Ledger
+
+# Append-only record of every stock change. Movements are folded into
+# Product.stock in batches by store.stock.compact_stock_movements().
+class StockMovement(models.Model):
+    RECEIPT = 'receipt'
+    RESERVATION = 'reservation'
+    SALE = 'sale'
+    ADJUSTMENT = 'adjustment'
+    KIND_CHOICES = [
+        (RECEIPT, 'Receipt'),
+        (RESERVATION, 'Reservation'),
+        (SALE, 'Sale'),
+        (ADJUSTMENT, 'Adjustment'),
+    ]
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_movements')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    quantity = models.IntegerField(help_text='Signed change in stock, e.g. +10 for a receipt, -2 for a sale.')
+    note = models.CharField(max_length=255, blank=True)
+    is_applied = models.BooleanField(default=False, help_text='Already folded into Product.stock.')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['is_applied', 'product'], name='stock_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.quantity:+d} x {self.product_id}"
+
+
+## 5. Pricing
+
+# A planned price change for one product or a whole category subtree.
+# Applied and reverted in bulk by store.pricing.apply_due_price_schedules().
+class PriceSchedule(models.Model):
+    PENDING = 'pending'
+    ACTIVE = 'active'
+    ENDED = 'ended'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (ACTIVE, 'Active'),
+        (ENDED, 'Ended'),
+    ]
+
+    name = models.CharField(max_length=255)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, null=True, blank=True, related_name='price_schedules')
+    category = models.ForeignKey(
+        Category, on_delete=models.CASCADE, null=True, blank=True, related_name='price_schedules',
+        help_text='Applies to every product in this category and its subcategories.'
+    )
+    starts_at = models.DateTimeField()
+    ends_at = models.DateTimeField(null=True, blank=True, help_text='Leave empty for a permanent change.')
+    new_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    percent_off = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, editable=False)
+    applied_at = models.DateTimeField(null=True, blank=True, editable=False)
+    ended_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        ordering = ['-starts_at']
+        indexes = [
+            models.Index(fields=['status', 'starts_at'], name='price_schedule_due_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+    def clean(self):
+        if bool(self.product_id) == bool(self.category_id):
+            raise ValidationError('Choose either a product or a category.')
+        if (self.new_price is None) == (self.percent_off is None):
+            raise ValidationError('Set either a new price or a percentage off.')
+        if self.percent_off is not None and not 0 < self.percent_off < 100:
+            raise ValidationError({'percent_off': 'Percentage off must be between 0 and 100.'})
+        if self.ends_at and self.ends_at <= self.starts_at:
+            raise ValidationError({'ends_at': 'End must be after the start.'})
+
+    def get_products(self):
+        if self.product_id:
+            return Product.objects.filter(pk=self.product_id)
+        return Product.objects.filter(self.category.get_subtree_q(prefix='category__'))
+
+
+# Append-only log of every price a product has had
+class PriceHistory(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='price_history')
+    old_price = models.DecimalField(max_digits=10, decimal_places=2)
+    new_price = models.DecimalField(max_digits=10, decimal_places=2)
+    schedule = models.ForeignKey(PriceSchedule, on_delete=models.SET_NULL, null=True, blank=True, related_name='history')
+    note = models.CharField(max_length=255, blank=True)
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = 'Price history'
+        ordering = ['-changed_at', '-id']
+        indexes = [
+            models.Index(fields=['product', 'changed_at'], name='price_history_product_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.old_price} -> {self.new_price}"
+
+
+## 6. Orders
+
+class Order(models.Model):
+    PLACED = 'placed'
+    PAID = 'paid'
+    SHIPPED = 'shipped'
+    CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (PLACED, 'Placed'),
+        (PAID, 'Paid'),
+        (SHIPPED, 'Shipped'),
+        (CANCELLED, 'Cancelled'),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='orders'
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PLACED)
+    total_price = models.DecimalField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Order #{self.pk}"
+
+    @property
+    def total_quantity(self):
+        return sum(item.quantity for item in self.items.all())
+
+
+# Prices and names are snapshotted at checkout so later catalog edits
+# never change what the customer paid.
+class OrderItem(models.Model):
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name='items'
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.SET_NULL,
+        null=True
+    )
+    product_name = models.CharField(max_length=255)
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+    quantity = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product_name}"
+
+    @property
+    def total_price(self):
+        return self.unit_price * self.quantity
+
+
+## 7. Catalog Changes Feed
+
+# One row per change to a synced catalog object, written in the same
+# transaction as the change itself; the id is the feed's sequence number.
+# See store.changes.
+class CatalogChange(models.Model):
+    CATEGORY = 'category'
+    ATTRIBUTE = 'attribute'
+    PRODUCT = 'product'
+    IMAGE = 'image'
+    ATTRIBUTE_VALUE = 'attribute_value'
+    KIND_CHOICES = [
+        (CATEGORY, 'Category'),
+        (ATTRIBUTE, 'Attribute'),
+        (PRODUCT, 'Product'),
+        (IMAGE, 'Product image'),
+        (ATTRIBUTE_VALUE, 'Attribute value'),
+    ]
+    UPSERT = 'upsert'
+    DELETE = 'delete'
+    ACTION_CHOICES = [
+        (UPSERT, 'Created or updated'),
+        (DELETE, 'Deleted'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES, default=UPSERT)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['kind', 'object_id'], name='catalog_change_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.action} {self.kind} {self.object_id}"
+
+
+# Single row: the highest sequence number of a tombstone removed by
+# compaction. A client whose cursor is below it may have missed a delete.
+class CatalogChangeHorizon(models.Model):
+    sequence = models.BigIntegerField(default=0)
+    compacted_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Changes compacted through #{self.sequence}"
+
+
+## 8. Image Blobs
+
+# One row per stored image file: how many ProductImage rows use it. Kept up
+# to date by signals (store.images); files no row uses are deleted by
+# `manage.py gc_images` once unreferenced for a grace period.
+class ImageBlob(models.Model):
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    unreferenced_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} use(s))"
+
+
+## 9. Audit Log
+
+# One row per changed price, stock or availability value of a product,
+# queued when the change commits and written in batches (see store.audit).
+class ProductAudit(models.Model):
+    PRICE = 'price'
+    STOCK = 'stock'
+    AVAILABILITY = 'is_available'
+    FIELD_CHOICES = [
+        (PRICE, 'Price'),
+        (STOCK, 'Stock'),
+        (AVAILABILITY, 'Availability'),
+    ]
+    ADMIN = 'admin'
+    PRICING = 'pricing'
+    STOCK_COMPACTION = 'stock_compaction'
+    CHECKOUT = 'checkout'
+    OTHER = 'other'
+    SOURCE_CHOICES = [
+        (ADMIN, 'Admin'),
+        (PRICING, 'Price schedule'),
+        (STOCK_COMPACTION, 'Stock compaction'),
+        (CHECKOUT, 'Checkout'),
+        (OTHER, 'Other'),
+    ]
+
+    # No database constraints: rows are written after the change commits,
+    # possibly after the product or user is gone. The history outlives a
+    # deleted product (nullable only so joins to it are outer joins).
+    product = models.ForeignKey(
+        Product, on_delete=models.DO_NOTHING, null=True, db_constraint=False, db_index=False,
+        related_name='audit_entries',
+    )
+    field = models.CharField(max_length=20, choices=FIELD_CHOICES)
+    old_value = models.CharField(max_length=64, blank=True)
+    new_value = models.CharField(max_length=64, blank=True)
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES, default=OTHER)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+        db_constraint=False, related_name='+',
+    )
+    # When the change was made, not when the row was written
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-changed_at', '-id']
+        indexes = [
+            # A product's history, newest first, straight from the index
+            models.Index(fields=['product', '-changed_at', '-id'], name='product_audit_history_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} {self.field}: {self.old_value} -> {self.new_value}"
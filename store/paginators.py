@@ -0,0 +1,25 @@
+# store/paginators.py
+from django.core.paginator import Paginator
+from django.db.models import Max
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for large admin changelists. Results are counted exactly up to
+    ``exact_count_limit`` rows with a LIMITed subquery. Beyond that, an
+    unfiltered table is estimated from its highest primary key (one index
+    lookup) and a filtered result is capped at the limit.
+    """
+    exact_count_limit = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        count = queryset[:self.exact_count_limit + 1].count()
+        if count <= self.exact_count_limit or queryset.query.where:
+            return count
+        # Read the base table so annotations and joins don't come along
+        manager = queryset.model._base_manager.using(queryset.db)
+        highest = manager.aggregate(highest=Max('pk'))['highest'] or 0
+        return max(highest, count)
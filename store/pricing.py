@@ -0,0 +1,120 @@
+# store/pricing.py
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Q, Value, When
+from django.db.models.functions import Round
+from django.utils import timezone
+
+from .audit import record_product_changes
+from .changes import record_changes
+from .models import CatalogChange, PriceHistory, PriceSchedule, Product, ProductAudit
+
+SCHEDULE_STARTED = 'Schedule started'
+SCHEDULE_ENDED = 'Schedule ended'
+
+
+def _set_prices(product_ids, price_expression):
+    """Apply ``price_expression`` to all products in one UPDATE; return (old, new) prices."""
+    old_prices = dict(Product.objects.filter(id__in=product_ids).values_list('id', 'price'))
+    Product.objects.filter(id__in=old_prices).update(price=price_expression, updated_at=timezone.now())
+    record_changes(CatalogChange.PRODUCT, old_prices)
+    new_prices = dict(Product.objects.filter(id__in=old_prices).values_list('id', 'price'))
+    record_product_changes(
+        ((product_id, ProductAudit.PRICE, old_price, new_prices.get(product_id))
+         for product_id, old_price in old_prices.items()),
+        source=ProductAudit.PRICING,
+    )
+    return old_prices, new_prices
+
+
+def _write_history(old_prices, new_prices, schedule, note):
+    PriceHistory.objects.bulk_create(
+        [
+            PriceHistory(
+                product_id=product_id,
+                old_price=old_price,
+                new_price=new_prices[product_id],
+                schedule=schedule,
+                note=note,
+            )
+            for product_id, old_price in old_prices.items()
+            if new_prices.get(product_id) != old_price
+        ],
+        batch_size=500,
+    )
+
+
+def start_schedule(schedule, now):
+    product_ids = list(schedule.get_products().values_list('id', flat=True))
+    if schedule.new_price is not None:
+        expression = Value(schedule.new_price)
+    else:
+        multiplier = (100 - schedule.percent_off) / 100
+        expression = Round(F('price') * Value(multiplier), 2)
+
+    with transaction.atomic():
+        old_prices, new_prices = _set_prices(product_ids, expression)
+        _write_history(old_prices, new_prices, schedule, note=SCHEDULE_STARTED)
+        schedule.status = PriceSchedule.ACTIVE
+        schedule.applied_at = now
+        schedule.save(update_fields=['status', 'applied_at'])
+    return len(product_ids)
+
+
+def end_schedule(schedule, now):
+    """
+    Restore the prices the schedule replaced, skipping products whose price
+    was changed again by someone else while the schedule was running.
+    """
+    started = schedule.history.filter(note=SCHEDULE_STARTED).values_list('product_id', 'old_price', 'new_price')
+    restore = {}
+    current = dict(
+        Product.objects.filter(id__in=[row[0] for row in started]).values_list('id', 'price')
+    )
+    for product_id, old_price, new_price in started:
+        if current.get(product_id) == new_price:
+            restore[product_id] = old_price
+
+    with transaction.atomic():
+        if restore:
+            expression = Case(
+                *[When(id=product_id, then=Value(price)) for product_id, price in restore.items()],
+                default=F('price'),
+                output_field=DecimalField(max_digits=10, decimal_places=2),
+            )
+            old_prices, new_prices = _set_prices(list(restore), expression)
+            _write_history(old_prices, new_prices, schedule, note=SCHEDULE_ENDED)
+        schedule.status = PriceSchedule.ENDED
+        schedule.ended_at = now
+        schedule.save(update_fields=['status', 'ended_at'])
+    return len(restore)
+
+
+def apply_due_price_schedules(now=None):
+    """
+    Start every pending schedule whose start time has passed and end every
+    active one whose end time has passed. Each schedule is one batched
+    UPDATE, and its changes feed rows move the catalog version
+    (store.catalog.get_catalog_version) in the same transaction.
+    Returns the number of product prices changed.
+    """
+    now = now or timezone.now()
+    changed = 0
+
+    due_to_end = PriceSchedule.objects.filter(status=PriceSchedule.ACTIVE, ends_at__lte=now)
+    for schedule in due_to_end.order_by('ends_at'):
+        changed += end_schedule(schedule, now)
+
+    due_to_start = PriceSchedule.objects.filter(
+        Q(ends_at__isnull=True) | Q(ends_at__gt=now),
+        status=PriceSchedule.PENDING,
+        starts_at__lte=now,
+    ).select_related('category')
+    for schedule in due_to_start.order_by('starts_at'):
+        changed += start_schedule(schedule, now)
+
+    # Schedules whose whole window passed before we ran never take effect
+    PriceSchedule.objects.filter(
+        status=PriceSchedule.PENDING, ends_at__lte=now
+    ).update(status=PriceSchedule.ENDED, ended_at=now)
+
+    return changed
@@ -0,0 +1,96 @@
+# store/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .audit import record_product_save, stored_values
+from .catalog import invalidate_category_tree
+from .changes import MODEL_KINDS, record_changes
+from .images import release, retain
+from .live import hub, product_event
+from .models import CartItem, CatalogChange, Category, Product, ProductImage
+from .typeahead import loaded_index, schedule_rebuild
+
+
+@receiver([post_save, post_delete], sender=Category)
+def category_changed(sender, **kwargs):
+    # After commit, when Category.save's path UPDATEs are in too; other
+    # processes pick the new tree up through its versioned cache key
+    transaction.on_commit(invalidate_category_tree)
+    # Product URLs and visibility may have changed with it
+    transaction.on_commit(schedule_rebuild)
+
+
+@receiver(pre_save, sender=Product)
+def product_saving(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Audited values as stored, for product_saved to diff against
+    instance._audited_values = None if raw else stored_values(instance, update_fields)
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, created=False, raw=False, **kwargs):
+    if not raw:
+        record_product_save(instance, created, getattr(instance, '_audited_values', None))
+    # Push the new stock/price to open pages once the change is committed
+    if hub.watched([instance.pk]):
+        event = product_event(instance.pk, instance.stock, instance.price, instance.is_available)
+        transaction.on_commit(lambda: hub.publish([event]))
+    index = loaded_index()
+    if index is not None:
+        transaction.on_commit(lambda: index.refresh_products([instance.pk]))
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    index = loaded_index()
+    if index is not None:
+        transaction.on_commit(lambda: index.remove_product(instance.pk))
+
+
+@receiver(post_save, sender=CartItem)
+def cart_item_saved(sender, instance, created, **kwargs):
+    # Typeahead popularity; the periodic rebuild recounts from the database
+    index = loaded_index()
+    if created and index is not None:
+        transaction.on_commit(lambda: index.add_cart_line(instance.product_id))
+
+
+def catalog_object_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_changes(MODEL_KINDS[sender], [instance.pk])
+
+
+def catalog_object_deleted(sender, instance, **kwargs):
+    record_changes(MODEL_KINDS[sender], [instance.pk], CatalogChange.DELETE)
+
+
+for synced_model in MODEL_KINDS:
+    post_save.connect(catalog_object_saved, sender=synced_model)
+    post_delete.connect(catalog_object_deleted, sender=synced_model)
+
+
+@receiver(pre_delete, sender=Category)
+def category_deleting(sender, instance, **kwargs):
+    # Its products are moved to "no category" by an UPDATE that sends no signals
+    record_changes(CatalogChange.PRODUCT, instance.products.values_list('id', flat=True))
+
+
+@receiver(pre_save, sender=ProductImage)
+def product_image_saving(sender, instance, **kwargs):
+    # The file the row used before, so post_save can move the reference
+    instance._stored_image = (
+        sender.objects.filter(pk=instance.pk).values_list('image', flat=True).first() if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=ProductImage)
+def product_image_saved(sender, instance, **kwargs):
+    previous = getattr(instance, '_stored_image', None)
+    if instance.image.name != previous:
+        retain(instance.image.name)
+        release(previous)
+
+
+@receiver(post_delete, sender=ProductImage)
+def product_image_deleted(sender, instance, **kwargs):
+    release(instance.image.name)
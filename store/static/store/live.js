@@ -0,0 +1,32 @@
+// store/static/store/live.js
+// Live stock and price updates (store/live.py). Elements opt in with
+// data-live-product="<id>" and data-live-field="stock" | "price" | "max";
+// the stream URL comes from data-live-url on <body>.
+(function () {
+    const url = document.body.dataset.liveUrl;
+    const nodes = document.querySelectorAll('[data-live-product]');
+    if (!url || !nodes.length || !window.EventSource) {
+        return;
+    }
+    const ids = [...new Set([...nodes].map(node => node.dataset.liveProduct))];
+    const source = new EventSource(url + '?ids=' + ids.join(','));
+
+    source.addEventListener('product', event => {
+        const data = JSON.parse(event.data);
+        document.querySelectorAll(`[data-live-product="${data.id}"]`).forEach(node => {
+            switch (node.dataset.liveField) {
+                case 'stock':
+                    node.textContent = data.stock > 0 ? `In Stock (${data.stock})` : 'Out of Stock';
+                    node.classList.toggle('text-success', data.stock > 0);
+                    node.classList.toggle('text-danger', data.stock <= 0);
+                    break;
+                case 'price':
+                    node.textContent = `Rs. ${data.price}`;
+                    break;
+                case 'max':
+                    node.max = Math.max(data.stock, 1);
+                    break;
+            }
+        });
+    });
+})();
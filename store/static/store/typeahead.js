@@ -0,0 +1,77 @@
+// store/static/store/typeahead.js
+// Header search suggestions (store/typeahead.py). A form with
+// data-suggest-url holds the search input and an empty list-group that is
+// filled with category and product links as the visitor types.
+(function () {
+    document.querySelectorAll('form[data-suggest-url]').forEach(form => {
+        const input = form.querySelector('input[type="search"]');
+        const list = form.querySelector('.list-group');
+        let timer = null;
+        let pending = null;
+
+        function hide() {
+            list.classList.add('d-none');
+            list.replaceChildren();
+        }
+
+        function show(data) {
+            const links = [];
+            for (const [group, label] of [['categories', 'Category'], ['products', '']]) {
+                for (const item of data[group]) {
+                    const link = document.createElement('a');
+                    link.className = 'list-group-item list-group-item-action py-1';
+                    link.href = item.url;
+                    link.textContent = item.name;
+                    if (label) {
+                        const badge = document.createElement('span');
+                        badge.className = 'badge bg-secondary ms-2';
+                        badge.textContent = label;
+                        link.append(badge);
+                    }
+                    links.push(link);
+                }
+            }
+            list.replaceChildren(...links);
+            list.classList.toggle('d-none', !links.length);
+        }
+
+        input.addEventListener('input', () => {
+            clearTimeout(timer);
+            const query = input.value.trim();
+            if (!query) {
+                hide();
+                return;
+            }
+            // Wait for a pause in typing, and drop answers to older queries
+            timer = setTimeout(() => {
+                if (pending) {
+                    pending.abort();
+                }
+                pending = new AbortController();
+                fetch(form.dataset.suggestUrl + '?q=' + encodeURIComponent(query), {signal: pending.signal})
+                    .then(response => response.json())
+                    .then(show)
+                    .catch(() => {});
+            }, 80);
+        });
+
+        // Enter opens the first suggestion
+        form.addEventListener('submit', event => {
+            event.preventDefault();
+            const first = list.querySelector('a');
+            if (first) {
+                window.location = first.href;
+            }
+        });
+        input.addEventListener('keydown', event => {
+            if (event.key === 'Escape') {
+                hide();
+            }
+        });
+        document.addEventListener('click', event => {
+            if (!form.contains(event.target)) {
+                hide();
+            }
+        });
+    });
+})();
@@ -0,0 +1,124 @@
+# store/stock.py
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .audit import record_product_changes
+from .changes import record_changes
+from .models import CatalogChange, Product, ProductAudit, StockMovement
+
+# Seconds an available-to-sell figure may be served from this process' cache.
+# Movements recorded in this process invalidate their product immediately.
+AVAILABLE_STOCK_TTL = getattr(settings, 'AVAILABLE_STOCK_TTL', 30)
+
+_available_cache = {}
+_available_lock = threading.Lock()
+
+
+def invalidate_available_stock(product_ids=None):
+    with _available_lock:
+        if product_ids is None:
+            _available_cache.clear()
+        else:
+            for product_id in product_ids:
+                _available_cache.pop(product_id, None)
+
+
+def get_available_stock(product_ids):
+    """
+    Return {product_id: available_to_sell} = Product.stock plus any movements
+    not yet compacted. Fresh entries come from the in-process cache; misses
+    are loaded with two queries however many products are asked for.
+    """
+    product_ids = set(product_ids)
+    now = time.monotonic()
+    result = {}
+    with _available_lock:
+        for product_id in product_ids:
+            entry = _available_cache.get(product_id)
+            if entry and entry[1] > now:
+                result[product_id] = entry[0]
+
+    missing = product_ids - result.keys()
+    if missing:
+        loaded = dict(Product.objects.filter(id__in=missing).values_list('id', 'stock'))
+        pending = StockMovement.objects.filter(
+            is_applied=False, product_id__in=missing
+        ).values('product_id').annotate(delta=Sum('quantity'))
+        for row in pending:
+            loaded[row['product_id']] = loaded.get(row['product_id'], 0) + row['delta']
+
+        expires = now + AVAILABLE_STOCK_TTL
+        with _available_lock:
+            for product_id, available in loaded.items():
+                _available_cache[product_id] = (available, expires)
+        result.update(loaded)
+    return result
+
+
+def get_available(product_id):
+    return get_available_stock([product_id]).get(product_id, 0)
+
+
+def pending_quantity():
+    """Expression for the sum of a Product's movements not yet folded into its stock (0 if none)."""
+    pending = (
+        StockMovement.objects.filter(product_id=OuterRef('pk'), is_applied=False)
+        .values('product_id')
+        .annotate(delta=Sum('quantity'))
+        .values('delta')
+    )
+    return Coalesce(Subquery(pending, output_field=IntegerField()), Value(0))
+
+
+def record_movement(product, kind, quantity, note='', is_applied=False):
+    """Append a movement to the ledger."""
+    movement = StockMovement.objects.create(
+        product=product, kind=kind, quantity=quantity, note=note, is_applied=is_applied
+    )
+    transaction.on_commit(lambda: invalidate_available_stock([movement.product_id]))
+    return movement
+
+
+def compact_stock_movements():
+    """
+    Fold every pending movement into Product.stock with a single batched
+    UPDATE and mark those movements as applied. Returns the number of
+    products updated.
+    """
+    with transaction.atomic():
+        pending = StockMovement.objects.filter(is_applied=False)
+        high_water = pending.aggregate(last=Max('id'))['last']
+        if high_water is None:
+            return 0
+
+        batch = pending.filter(id__lte=high_water)
+        deltas = {
+            row['product_id']: row['delta']
+            for row in batch.values('product_id').annotate(delta=Sum('quantity'))
+            if row['delta']
+        }
+        if deltas:
+            Product.objects.filter(id__in=deltas).update(
+                stock=F('stock') + Case(
+                    *[When(id=product_id, then=Value(delta)) for product_id, delta in deltas.items()],
+                    default=Value(0),
+                    output_field=IntegerField(),
+                ),
+                updated_at=timezone.now(),
+            )
+            record_changes(CatalogChange.PRODUCT, deltas)
+            record_product_changes(
+                ((product_id, ProductAudit.STOCK, stock - deltas[product_id], stock)
+                 for product_id, stock in Product.objects.filter(id__in=deltas).values_list('id', 'stock')),
+                source=ProductAudit.STOCK_COMPACTION,
+            )
+        batch.update(is_applied=True)
+
+    invalidate_available_stock(deltas)
+    return len(deltas)
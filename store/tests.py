@@ -1,3 +1,171 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
 
-# Create your tests here.
+from django.db import connection, transaction
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from users.models import CustomUser
+
+from . import images
+from .checkout import OutOfStockError, checkout
+from .guest_cart import GUEST_CART_COOKIE, GuestCart
+from .models import Cart, CartItem, Category, ImageBlob, Order, Product, ProductAudit, ProductImage, StockMovement
+from .stock import compact_stock_movements, record_movement
+
+
+# Audit rows written on commit, not by a flusher that outlives the test database
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], AUDIT_BUFFERED=False)
+class CheckoutConcurrencyTest(TransactionTestCase):
+    shoppers = 30
+    stock = 7
+
+    def setUp(self):
+        category = Category.objects.create(name='Tees', slug='tees')
+        self.product = Product.objects.create(
+            category=category, name='Oversized Tee', slug='oversized-tee', price=499, stock=self.stock,
+        )
+        self.users = []
+        for number in range(self.shoppers):
+            user = CustomUser.objects.create_user(email=f'shopper{number}@example.com', password='x')
+            cart = Cart.objects.create(user=user)
+            CartItem.objects.create(cart=cart, product=self.product, quantity=1)
+            self.users.append(user)
+
+    def test_checkouts_never_oversell(self):
+        results = []
+        start = threading.Barrier(self.shoppers)
+
+        def buy(user):
+            start.wait()
+            try:
+                checkout(user)
+                results.append('ordered')
+            except OutOfStockError:
+                results.append('short')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=buy, args=[user]) for user in self.users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.product.refresh_from_db()
+        self.assertEqual(results.count('ordered'), self.stock)
+        self.assertEqual(results.count('short'), self.shoppers - self.stock)
+        self.assertEqual(Order.objects.count(), self.stock)
+        self.assertEqual(self.product.stock, 0)
+        # A short checkout rolls back whole: its cart is left as it was
+        self.assertEqual(CartItem.objects.count(), self.shoppers - self.stock)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], AUDIT_BUFFERED=False)
+class CheckoutPendingStockTest(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Tees', slug='tees')
+        self.product = Product.objects.create(category=category, name='Oversized Tee', slug='oversized-tee', price=499, stock=5)
+        self.user = CustomUser.objects.create_user(email='shopper@example.com', password='x')
+        self.cart = Cart.objects.create(user=self.user)
+
+    def test_pending_movements_count_against_stock(self):
+        record_movement(self.product, StockMovement.RESERVATION, -4)
+        CartItem.objects.create(cart=self.cart, product=self.product, quantity=2)
+        with self.assertRaises(OutOfStockError):
+            checkout(self.user)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 5)
+
+        CartItem.objects.filter(cart=self.cart).update(quantity=1)
+        checkout(self.user)
+        compact_stock_movements()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 0)
+
+
+
+class GuestCartCookieTest(SimpleTestCase):
+    def test_empty_cart_only_clears_a_cookie_that_was_sent(self):
+        response = HttpResponse()
+        GuestCart(RequestFactory().get('/cart/')).save(response)
+        self.assertNotIn(GUEST_CART_COOKIE, response.cookies)
+
+        request = RequestFactory().get('/cart/')
+        request.COOKIES[GUEST_CART_COOKIE] = 'tampered'
+        GuestCart(request).save(response)
+        self.assertEqual(response.cookies[GUEST_CART_COOKIE]['max-age'], 0)
+
+
+@override_settings(AUDIT_BUFFERED=False)
+class ProductAuditTest(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Tees', slug='tees')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product = Product.objects.create(category=category, name='Oversized Tee', slug='oversized-tee', price=499, stock=5)
+        ProductAudit.objects.all().delete()
+
+    def test_rolled_back_change_is_not_audited(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.product.stock = 9
+                self.product.save()
+                raise RuntimeError
+        self.assertFalse(ProductAudit.objects.exists())
+
+        self.product.refresh_from_db()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.stock = 3
+            self.product.save()
+        audit = ProductAudit.objects.get()
+        self.assertEqual((audit.field, audit.old_value, audit.new_value), (ProductAudit.STOCK, '5', '3'))
+
+
+class ImageStoreTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        category = Category.objects.create(name='Tees', slug='tees')
+        self.product = Product.objects.create(category=category, name='Oversized Tee', slug='oversized-tee', price=499, stock=5)
+
+    def upload(self, name, color):
+        content = io.BytesIO()
+        Image.new('RGB', (4, 4), color).save(content, 'PNG')
+        return ProductImage.objects.create(product=self.product, image=SimpleUploadedFile(name, content.getvalue()))
+
+    def test_identical_uploads_share_one_file(self):
+        first = self.upload('front.png', 'red')
+        second = self.upload('front-copy.png', 'red')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(ImageBlob.objects.get().ref_count, 2)
+
+        second.delete()
+        self.assertEqual(ImageBlob.objects.get().ref_count, 1)
+        self.assertEqual(images.recount_references(), 0)
+
+    def test_garbage_collection_waits_for_the_grace_period(self):
+        image = self.upload('front.png', 'red')
+        path = image.image.path
+        image.delete()
+        blob = ImageBlob.objects.get()
+        self.assertEqual(blob.ref_count, 0)
+
+        self.assertEqual(images.collect_garbage(), (0, 0))
+        self.assertTrue(os.path.exists(path))
+
+        # Unreferenced, and the file untouched, for longer than the grace period
+        ImageBlob.objects.filter(pk=blob.pk).update(unreferenced_at=timezone.now() - timedelta(hours=images.GC_GRACE_HOURS + 1))
+        stale = time.time() - (images.GC_GRACE_HOURS + 1) * 3600
+        os.utime(path, (stale, stale))
+        self.assertEqual(images.collect_garbage(), (1, blob.size))
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(ImageBlob.objects.exists())
@@ -0,0 +1,353 @@
+# store/typeahead.py
+"""
+Search-as-you-type suggestions from an in-process prefix index.
+
+Product and category names are split into words, lower-cased and with
+accents stripped. The distinct words form a sorted array, so the words
+under a prefix are one contiguous slice found with two bisects. Each word
+keeps its entries in rank order, and merging those lists yields the best
+matches first. No query reaches the database. A query of several words
+matches names with a word starting with each of them. Suggestions are
+ranked by popularity: how many cart and order lines name a product, summed
+over a category's products.
+
+The index is built on first use (and by config.warmup when a worker
+starts). Signals keep it current in this process: a saved or deleted
+product updates its entry, a new cart line bumps its popularity, and a
+category change (which can move product URLs or hide products) rebuilds
+it in the background. Other worker processes catch up at their next
+periodic rebuild, every TYPEAHEAD_REBUILD_SECONDS.
+
+The results of one-word queries are memoized per prefix until an entry
+under them is added, renamed or removed. A lookup reads at most MAX_SCAN
+entries, which keeps every keystroke well under a millisecond on a
+catalog of tens of thousands of products.
+"""
+import heapq
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count
+from django.urls import reverse
+
+from .catalog import get_category_tree
+from .models import CartItem, OrderItem, Product
+
+MAX_PRODUCTS = 8
+MAX_CATEGORIES = 4
+MAX_QUERY_LENGTH = 64
+MAX_QUERY_WORDS = 5
+# One-word prefixes whose results are memoized at most; the oldest are dropped first
+MEMO_MAX_PREFIXES = 20_000
+# Entries read per lookup at most; bounds queries whose words are all common,
+# which may then return fewer than the limit
+MAX_SCAN = 250
+TYPEAHEAD_REBUILD_SECONDS = getattr(settings, 'TYPEAHEAD_REBUILD_SECONDS', 5 * 60)
+
+_WORD_RE = re.compile(r'\w+')
+# Sorts after every key that starts with a given prefix
+_PREFIX_END = '\U0010ffff'
+
+
+def normalize_words(text):
+    """Lower-case words with accents removed: 'Café Crème' -> ['cafe', 'creme']."""
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    return _WORD_RE.findall(''.join(char for char in decomposed if not unicodedata.combining(char)))
+
+
+class Entry:
+    __slots__ = ('id', 'name', 'url', 'words', 'text', 'popularity')
+
+    def __init__(self, id, name, url, popularity=0):
+        self.id = id
+        self.name = name
+        self.url = url
+        self.words = tuple(dict.fromkeys(normalize_words(name)))
+        # " w1 w2 ...": a word starts with p when " p" occurs in it
+        self.text = ''.join(f' {word}' for word in self.words)
+        self.popularity = popularity
+
+    def rank(self):
+        return (-self.popularity, self.name, self.id)
+
+    def as_dict(self):
+        return {'name': self.name, 'url': self.url}
+
+
+def _rank(entry):
+    return entry.rank()
+
+
+class PrefixIndex:
+    """Entries by word prefix, ranked by popularity. Thread-safe."""
+
+    def __init__(self, entries=(), limit=MAX_PRODUCTS):
+        self.limit = limit
+        self.entries = {entry.id: entry for entry in entries}
+        self._postings = {}
+        for entry in sorted(self.entries.values(), key=_rank):
+            for word in entry.words:
+                self._postings.setdefault(word, []).append(entry)
+        self._words = sorted(self._postings)
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _forget(self, entry):
+        for word in entry.words:
+            for length in range(1, len(word) + 1):
+                self._memo.pop(word[:length], None)
+
+    def _unlink(self, entry):
+        for word in entry.words:
+            postings = self._postings[word]
+            del postings[bisect_left(postings, entry.rank(), key=_rank)]
+            if not postings:
+                del self._postings[word]
+                del self._words[bisect_left(self._words, word)]
+        self._forget(entry)
+
+    def _link(self, entry):
+        for word in entry.words:
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = []
+                insort(self._words, word)
+            insort(postings, entry, key=_rank)
+        self._forget(entry)
+
+    def put(self, entry):
+        with self._lock:
+            previous = self.entries.pop(entry.id, None)
+            if previous is not None:
+                self._unlink(previous)
+            self.entries[entry.id] = entry
+            self._link(entry)
+
+    def remove(self, entry_id):
+        with self._lock:
+            entry = self.entries.pop(entry_id, None)
+            if entry is not None:
+                self._unlink(entry)
+
+    def add_popularity(self, entry_id, amount):
+        with self._lock:
+            entry = self.entries.get(entry_id)
+            if entry is None:
+                return
+            # Move it within its posting lists
+            for word in entry.words:
+                postings = self._postings[word]
+                del postings[bisect_left(postings, entry.rank(), key=_rank)]
+            entry.popularity += amount
+            for word in entry.words:
+                insort(self._postings[word], entry, key=_rank)
+            # A memoized result only changes if the entry is in it or now outranks its last
+            for word in entry.words:
+                for length in range(1, len(word) + 1):
+                    best = self._memo.get(word[:length])
+                    if best is not None and (
+                        entry in best or len(best) < self.limit or entry.rank() < best[-1].rank()
+                    ):
+                        del self._memo[word[:length]]
+
+    def _range(self, prefix):
+        start = bisect_left(self._words, prefix)
+        return self._words[start:bisect_left(self._words, prefix + _PREFIX_END, start)]
+
+    def _size(self, words):
+        """Entries under ``words``, counted up to MAX_SCAN."""
+        size = 0
+        for word in words:
+            size += len(self._postings[word])
+            if size >= MAX_SCAN:
+                return MAX_SCAN
+        return size
+
+    def search(self, words):
+        """The best ``limit`` entries with a word starting with each of ``words``."""
+        with self._lock:
+            if len(words) == 1 and words[0] in self._memo:
+                return self._memo[words[0]]
+            matches = [self._range(prefix) for prefix in words]
+            # The query word with the fewest entries (then distinct words to
+            # merge) drives; the others only filter
+            driver = min(
+                range(len(words)), key=lambda position: (self._size(matches[position]), len(matches[position])),
+            )
+            others = [f' {word}' for position, word in enumerate(words) if position != driver]
+            # Each word's entries are in rank order: merging the lists
+            # yields the best matches first, so only the top is read
+            postings = [self._postings[word] for word in matches[driver]]
+            ranked = postings[0] if len(postings) == 1 else heapq.merge(*postings, key=_rank)
+            best, seen = [], set()
+            for entry in islice(ranked, MAX_SCAN):
+                if entry.id in seen:
+                    continue
+                seen.add(entry.id)
+                if all(other in entry.text for other in others):
+                    best.append(entry)
+                    if len(best) == self.limit:
+                        break
+            if len(words) == 1:
+                if len(self._memo) >= MEMO_MAX_PREFIXES:
+                    del self._memo[next(iter(self._memo))]
+                self._memo[words[0]] = best
+            return best
+
+
+def product_popularity(product_ids=None):
+    """{product_id: cart lines + order lines}."""
+    popularity = {}
+    for model in (CartItem, OrderItem):
+        rows = model.objects.filter(product__isnull=False)
+        if product_ids is not None:
+            rows = rows.filter(product_id__in=product_ids)
+        for product_id, lines in rows.order_by().values_list('product_id').annotate(lines=Count('id')):
+            popularity[product_id] = popularity.get(product_id, 0) + lines
+    return popularity
+
+
+class CatalogIndex:
+    """
+    Product and category indexes over what the storefront shows. Updates
+    touch both indexes and product_categories, so they hold one lock.
+    """
+
+    def __init__(self):
+        self.built_at = time.monotonic()
+        self._lock = threading.Lock()
+        # Active categories not under an inactive one
+        self.tree = {node['id']: node for node in get_category_tree()}
+        self.product_categories = {}
+        popularity = product_popularity()
+        products = [
+            self.product_entry(product, popularity.get(product.id, 0))
+            for product in self.visible_products().iterator(chunk_size=2000)
+        ]
+        self.products = PrefixIndex(products, MAX_PRODUCTS)
+
+        category_popularity = {}
+        for entry in products:
+            category_id = self.product_categories[entry.id]
+            category_popularity[category_id] = category_popularity.get(category_id, 0) + entry.popularity
+        self.categories = PrefixIndex(
+            [
+                Entry(
+                    node['id'], node['name'], reverse('store:product_filter', args=[node['slug']]),
+                    category_popularity.get(node['id'], 0),
+                )
+                for node in self.tree.values()
+            ],
+            MAX_CATEGORIES,
+        )
+
+    def visible_products(self):
+        return Product.objects.filter(is_available=True, category_id__in=list(self.tree)).only(
+            'id', 'name', 'slug', 'category_id',
+        )
+
+    def product_entry(self, product, popularity):
+        self.product_categories[product.id] = product.category_id
+        url = reverse('store:product_detail', args=[self.tree[product.category_id]['slug'], product.slug])
+        return Entry(product.id, product.name, url, popularity)
+
+    def refresh_products(self, product_ids):
+        """Re-read ``product_ids``: update, add or drop their entries."""
+        product_ids = set(product_ids)
+        popularity = product_popularity(product_ids)
+        products = list(self.visible_products().filter(id__in=product_ids))
+        with self._lock:
+            for product in products:
+                # Its category (and so that category's popularity) may have changed
+                self._remove_product(product.id)
+                entry = self.product_entry(product, popularity.get(product.id, 0))
+                self.products.put(entry)
+                self.categories.add_popularity(product.category_id, entry.popularity)
+                product_ids.discard(product.id)
+            for product_id in product_ids:
+                self._remove_product(product_id)
+
+    def remove_product(self, product_id):
+        with self._lock:
+            self._remove_product(product_id)
+
+    def _remove_product(self, product_id):
+        entry = self.products.entries.get(product_id)
+        self.products.remove(product_id)
+        category_id = self.product_categories.pop(product_id, None)
+        if entry is not None and category_id is not None:
+            self.categories.add_popularity(category_id, -entry.popularity)
+
+    def add_cart_line(self, product_id):
+        with self._lock:
+            category_id = self.product_categories.get(product_id)
+            if category_id is not None:
+                self.products.add_popularity(product_id, 1)
+                self.categories.add_popularity(category_id, 1)
+
+
+_index = None
+_build_lock = threading.Lock()
+_rebuilding = threading.Event()
+
+
+def build_index():
+    """Build the index now and make it the current one."""
+    global _index
+    _index = CatalogIndex()
+    return _index
+
+
+def _rebuild_in_background():
+    try:
+        build_index()
+    finally:
+        connection.close()
+        _rebuilding.clear()
+
+
+def schedule_rebuild():
+    """Rebuild in a background thread; lookups keep using the current index meanwhile."""
+    if _index is None or _rebuilding.is_set():
+        return
+    _rebuilding.set()
+    threading.Thread(target=_rebuild_in_background, name='typeahead-rebuild', daemon=True).start()
+
+
+def get_index():
+    """The current index, built on first use and rebuilt when it gets old."""
+    index = _index
+    if index is None:
+        # One request builds it; concurrent ones wait for that build
+        with _build_lock:
+            return _index or build_index()
+    if time.monotonic() - index.built_at > TYPEAHEAD_REBUILD_SECONDS:
+        schedule_rebuild()
+    return index
+
+
+def loaded_index():
+    """The current index if one was built; signal handlers skip the work otherwise."""
+    return _index
+
+
+def suggest(query):
+    """``{'q', 'categories': [...], 'products': [...]}`` for what has been typed so far."""
+    words = normalize_words(query[:MAX_QUERY_LENGTH])[:MAX_QUERY_WORDS]
+    if not words:
+        return {'q': query, 'categories': [], 'products': []}
+    index = get_index()
+    return {
+        'q': query,
+        'categories': [entry.as_dict() for entry in index.categories.search(words)],
+        'products': [entry.as_dict() for entry in index.products.search(words)],
+    }
@@ -12,6 +12,11 @@ urlpatterns = [
     path('cart/add/<int:product_id>/', views.add_to_cart, name='add_to_cart'),
     path('cart/update/<int:item_id>/', views.update_cart_item, name='update_cart_item'),
     path('cart/remove/<int:item_id>/', views.remove_from_cart, name='remove_from_cart'),
+    path('checkout/', views.checkout, name='checkout'),
+    path('orders/<int:order_id>/', views.order_detail, name='order_detail'),
+    path('live/products/', views.product_events, name='product_events'),
+    path('sync/changes/', views.catalog_changes, name='catalog_changes'),
+    path('search/suggest/', views.search_suggestions, name='search_suggestions'),
     path('', views.product_list, name='product_list'),
     
     # Filtered view - shows products only in the selected category
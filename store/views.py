@@ -1,26 +1,48 @@
 from django.shortcuts import render, get_object_or_404, redirect
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_GET
 from django.contrib import messages
-from .models import Product, Category, ProductAttribute, ProductAttributeValue, Cart, CartItem
+from .models import Product, Category, ProductAttribute, ProductAttributeValue, Cart, CartItem, Order
 from .forms import AddToCartForm
+from .attributes import apply_attribute_filters, filter_form, get_filter_attributes
+from .catalog import get_breadcrumbs, get_category_tree
+from .changes import DEFAULT_BATCH_SIZE, MAX_BATCH_SIZE, CursorExpired, InvalidCursor, changes_since
+from .checkout import CheckoutError, checkout as checkout_cart
+from .guest_cart import GuestCart
+from .live import MAX_WATCHED_PRODUCTS, event_stream
+from .stock import get_available
+from .typeahead import suggest
 
 def product_list(request, category_slug=None):
     """
     Renders the main product listing page, optionally filtered by category.
     """
-    categories = Category.objects.filter(is_active=True)
+    # Sidebar tree and breadcrumbs both come from one cached query
+    categories = get_category_tree()
     products = Product.objects.filter(is_available=True)
     
     current_category = None
+    breadcrumbs = []
     
     if category_slug:
         current_category = get_object_or_404(Category, slug=category_slug)
-        products = products.filter(category=current_category)
+        # Whole subtree in one indexed range query on the materialized path
+        products = products.filter(current_category.get_subtree_q(prefix='category__'))
+        breadcrumbs = get_breadcrumbs(current_category, categories)
+
+    # ?attr.<name>.min=&attr.<name>.max=&sort=attr.<name> run as indexed subqueries
+    attributes = get_filter_attributes()
+    products, selected_filters = apply_attribute_filters(products, request.GET, attributes)
 
     context = {
         'shop_name': 'DD Creation',
         'current_category': current_category,
         'categories': categories,
+        'breadcrumbs': breadcrumbs,
+        'attribute_filters': filter_form(attributes, selected_filters),
         'products': products.select_related('category').prefetch_related('images'), 
     }
     
@@ -56,18 +78,41 @@ def product_detail(request, category_slug, product_slug):
     return render(request, 'store/product_detail.html', context)
 
 
-@login_required
 def add_to_cart(request, product_id):
     """
     Add product to cart
     """
-    product = get_object_or_404(Product, id=product_id, is_available=True)
+    # Only the name is shown; the stock check uses available-to-sell below
+    product = get_object_or_404(Product.objects.only('id', 'name'), id=product_id, is_available=True)
+
+    # Anonymous shoppers get a cookie cart, no database writes until login
+    if not request.user.is_authenticated:
+        guest_cart = GuestCart(request)
+        if request.method == 'POST':
+            quantity = int(request.POST.get('quantity', 1))
+            available = get_available(product.id)
+            if guest_cart.lines.get(product.id, 0) + quantity > available:
+                messages.error(request, f'Sorry, only {available} of {product.name} available.')
+            elif guest_cart.add(product.id, quantity):
+                messages.success(request, f'Added {product.name} to your cart.')
+            else:
+                messages.error(request, 'Your cart is full. Please log in to add more items.')
+        response = redirect('store:product_list')
+        guest_cart.save(response)
+        return response
     
     # Get or create cart for user
     cart, created = Cart.objects.get_or_create(user=request.user)
     
     if request.method == 'POST':
         quantity = int(request.POST.get('quantity', 1))
+
+        # Stock plus pending movements (store.stock), not Product.stock, which lags the ledger
+        in_cart = cart.items.filter(product=product).values_list('quantity', flat=True).first() or 0
+        available = get_available(product.id)
+        if in_cart + quantity > available:
+            messages.error(request, f'Sorry, only {available} of {product.name} available.')
+            return redirect('store:product_list')
         
         # Check if item already exists in cart
         cart_item, created = CartItem.objects.get_or_create(
@@ -88,11 +133,19 @@ def add_to_cart(request, product_id):
     
     return redirect('store:product_list')
 
-@login_required
 def view_cart(request):
     """
     Display user's cart
     """
+    if not request.user.is_authenticated:
+        guest_cart = GuestCart(request)
+        context = {
+            'shop_name': 'DD Creation',
+            'cart': guest_cart if guest_cart.items else None,
+            'cart_items': guest_cart.items,
+        }
+        return render(request, 'store/cart.html', context)
+
     try:
         cart = Cart.objects.get(user=request.user)
         cart_items = cart.items.select_related('product').all()
@@ -107,11 +160,24 @@ def view_cart(request):
     }
     return render(request, 'store/cart.html', context)
 
-@login_required
 def update_cart_item(request, item_id):
     """
     Update cart item quantity
     """
+    if not request.user.is_authenticated:
+        # Guest cart items are keyed by product id
+        guest_cart = GuestCart(request)
+        if request.method == 'POST':
+            quantity = int(request.POST.get('quantity', 1))
+            guest_cart.set(item_id, quantity)
+            if quantity > 0:
+                messages.success(request, 'Cart updated successfully.')
+            else:
+                messages.success(request, 'Item removed from cart.')
+        response = redirect('store:view_cart')
+        guest_cart.save(response)
+        return response
+
     cart_item = get_object_or_404(CartItem, id=item_id, cart__user=request.user)
     
     if request.method == 'POST':
@@ -127,14 +193,116 @@ def update_cart_item(request, item_id):
     
     return redirect('store:view_cart')
 
-@login_required
 def remove_from_cart(request, item_id):
     """
     Remove item from cart
     """
+    if not request.user.is_authenticated:
+        guest_cart = GuestCart(request)
+        guest_cart.remove(item_id)
+        messages.success(request, 'Item removed from your cart.')
+        response = redirect('store:view_cart')
+        guest_cart.save(response)
+        return response
+
     cart_item = get_object_or_404(CartItem, id=item_id, cart__user=request.user)
     product_name = cart_item.product.name
     cart_item.delete()
     messages.success(request, f'{product_name} removed from your cart.')
     
-    return redirect('store:view_cart')
\ No newline at end of file
+    return redirect('store:view_cart')
+
+
+@login_required
+def checkout(request):
+    """
+    Convert the user's cart into an order
+    """
+    if request.method != 'POST':
+        return redirect('store:view_cart')
+
+    try:
+        order = checkout_cart(request.user)
+    except CheckoutError as exc:
+        messages.error(request, str(exc))
+        return redirect('store:view_cart')
+
+    messages.success(request, f'Thank you! Your order #{order.pk} has been placed.')
+    return redirect('store:order_detail', order_id=order.pk)
+
+@login_required
+def order_detail(request, order_id):
+    """
+    Display a placed order
+    """
+    order = get_object_or_404(Order, id=order_id, user=request.user)
+
+    context = {
+        'shop_name': 'DD Creation',
+        'order': order,
+        'order_items': order.items.all(),
+    }
+    return render(request, 'store/order_detail.html', context)
+
+
+async def product_events(request):
+    """
+    Server-Sent Events stream of stock and price changes for ``?ids=1,2,3``.
+    Needs the ASGI app: a WSGI worker would be tied up for the whole stream.
+    """
+    if not isinstance(request, ASGIRequest):
+        raise Http404('Live updates are only served by the ASGI application.')
+    try:
+        product_ids = {int(value) for value in request.GET.get('ids', '').split(',') if value}
+    except ValueError:
+        return HttpResponseBadRequest('ids must be a comma-separated list of product ids.')
+    if not product_ids or len(product_ids) > MAX_WATCHED_PRODUCTS:
+        return HttpResponseBadRequest(f'Watch between 1 and {MAX_WATCHED_PRODUCTS} products.')
+
+    response = StreamingHttpResponse(event_stream(product_ids), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@require_GET
+def catalog_changes(request):
+    """
+    Catalog changes after ``?cursor=`` (0 for a full sync), up to ``?limit``
+    changes per batch. Clients store the returned cursor and call again
+    while ``has_more`` is true. See store.changes.
+    """
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_BATCH_SIZE))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= MAX_BATCH_SIZE:
+        return JsonResponse({'error': f'limit must be between 1 and {MAX_BATCH_SIZE}.'}, status=400)
+
+    try:
+        batch = changes_since(request.GET.get('cursor', '0'), limit)
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor.'}, status=400)
+    except CursorExpired:
+        return JsonResponse(
+            {'error': 'Cursor is older than the retained changes; resync from cursor 0.', 'resync': True},
+            status=410,
+        )
+    return JsonResponse(batch)
+
+
+# Browsers may reuse a suggestion list this long (seconds)
+SUGGESTIONS_MAX_AGE = 60
+
+
+@require_GET
+def search_suggestions(request):
+    """
+    Categories and products whose names have words starting with the words
+    in ``?q=``, most popular first. Served from the in-process prefix index
+    (store.typeahead) without touching the database.
+    """
+    response = JsonResponse(suggest(request.GET.get('q', '')))
+    patch_cache_control(response, public=True, max_age=SUGGESTIONS_MAX_AGE)
+    return response
@@ -0,0 +1,19 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status', 'attempts', 'max_attempts', 'run_at', 'updated_at']
+    list_filter = ['status', 'name']
+    search_fields = ['name', 'last_error']
+    readonly_fields = ['name', 'args', 'kwargs', 'attempts', 'locked_at', 'last_error', 'created_at', 'updated_at']
+    actions = ['retry_now']
+
+    @admin.action(description='Retry selected tasks now')
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status=Task.RUNNING).update(
+            status=Task.QUEUED, run_at=timezone.now(), attempts=0
+        )
+        self.message_user(request, f'{updated} task(s) queued.')
@@ -0,0 +1,64 @@
+import multiprocessing
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from taskqueue.worker import requeue_stale_tasks, run_pending, work, work_in_process
+
+
+class Command(BaseCommand):
+    help = 'Run background task workers against the database task queue.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=2, help='Number of worker threads/processes.')
+        parser.add_argument(
+            '--mode', choices=['thread', 'process'], default='thread',
+            help='Run workers as threads (I/O-bound tasks) or processes (CPU-bound tasks).',
+        )
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when idle.')
+        parser.add_argument('--burst', action='store_true', help='Run due tasks once, then exit.')
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_tasks()
+        if requeued:
+            self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale task(s).'))
+
+        if options['burst']:
+            count = run_pending()
+            self.stdout.write(self.style.SUCCESS(f'Ran {count} task(s).'))
+            return
+
+        concurrency, poll_interval = options['concurrency'], options['poll_interval']
+        if options['mode'] == 'process':
+            # Children must not share the parent's database connections
+            connections.close_all()
+            stop_event = multiprocessing.Event()
+            workers = [
+                multiprocessing.Process(target=work_in_process, args=(stop_event, poll_interval), daemon=True)
+                for _ in range(concurrency)
+            ]
+        else:
+            stop_event = threading.Event()
+            workers = [
+                threading.Thread(target=work, args=(stop_event, poll_interval), daemon=True)
+                for _ in range(concurrency)
+            ]
+
+        for worker in workers:
+            worker.start()
+        self.stdout.write(self.style.SUCCESS(
+            f'Started {concurrency} {options["mode"]} worker(s). Press Ctrl+C to stop.'
+        ))
+
+        # The handler only flips a flag; the workers' event is set outside it
+        stopping = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+        signal.signal(signal.SIGINT, lambda signum, frame: stopping.set())
+        while not stopping.wait(0.5):
+            pass
+        stop_event.set()
+        for worker in workers:
+            worker.join()
+        self.stdout.write('Workers stopped.')
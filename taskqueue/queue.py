@@ -0,0 +1,75 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def get_task(name):
+    return _registry[name]
+
+
+class TaskFunction:
+    """
+    A function that can run in the background. Calling it runs it inline;
+    ``.delay()`` queues it to run after the current transaction commits.
+    """
+
+    def __init__(self, func, name, max_attempts):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def __repr__(self):
+        return f'<task {self.name}>'
+
+    def delay(self, *args, **kwargs):
+        """
+        Queue the task once the surrounding transaction commits (immediately
+        outside a transaction). With TASKQUEUE_EAGER the task runs inline at
+        that point instead, which is what local development and tests use.
+        """
+        if getattr(settings, 'TASKQUEUE_EAGER', False):
+            transaction.on_commit(lambda: self._run_eager(args, kwargs))
+        else:
+            transaction.on_commit(
+                lambda: Task.objects.create(
+                    name=self.name, args=list(args), kwargs=kwargs, max_attempts=self.max_attempts
+                )
+            )
+
+    def _run_eager(self, args, kwargs):
+        try:
+            self.func(*args, **kwargs)
+        except Exception:
+            # Match worker behaviour: a failing side effect never breaks the request
+            logger.exception('Eager task %s failed', self.name)
+
+
+def task(func=None, *, name=None, max_attempts=5):
+    """
+    Register a background task::
+
+        @task
+        def send_welcome_email(user_id):
+            ...
+
+        send_welcome_email.delay(user.pk)
+
+    Arguments must be JSON serializable; pass ids rather than model instances.
+    """
+    def decorator(func):
+        task_name = name or f'{func.__module__}.{func.__qualname__}'
+        wrapped = TaskFunction(func, task_name, max_attempts)
+        _registry[task_name] = wrapped
+        return wrapped
+
+    return decorator(func) if func is not None else decorator
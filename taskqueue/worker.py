@@ -0,0 +1,102 @@
+import logging
+import random
+import signal
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import Task
+from .queue import get_task
+
+logger = logging.getLogger(__name__)
+
+# Base delay before the first retry; doubled on each further attempt
+RETRY_BACKOFF = getattr(settings, 'TASKQUEUE_RETRY_BACKOFF', 10)
+# Running tasks not finished after this long are assumed lost with their worker
+LOCK_TIMEOUT = getattr(settings, 'TASKQUEUE_LOCK_TIMEOUT', 15 * 60)
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter, capped at one hour."""
+    return min(RETRY_BACKOFF * 2 ** (attempts - 1), 3600) * random.uniform(0.8, 1.2)
+
+
+def requeue_stale_tasks(now=None):
+    now = now or timezone.now()
+    return Task.objects.filter(
+        status=Task.RUNNING, locked_at__lt=now - timedelta(seconds=LOCK_TIMEOUT)
+    ).update(status=Task.QUEUED, locked_at=None)
+
+
+def claim_task():
+    """
+    Claim the next due task. SQLite has no SKIP LOCKED, so a conditional
+    UPDATE on the status acts as the lock: only one worker's UPDATE matches.
+    """
+    now = timezone.now()
+    candidates = Task.objects.filter(status=Task.QUEUED, run_at__lte=now).values_list('id', flat=True)[:10]
+    for task_id in candidates:
+        claimed = Task.objects.filter(id=task_id, status=Task.QUEUED).update(
+            status=Task.RUNNING, locked_at=now
+        )
+        if claimed:
+            return Task.objects.get(id=task_id)
+    return None
+
+
+def run_task(task):
+    task.attempts += 1
+    try:
+        get_task(task.name)(*task.args, **task.kwargs)
+    except Exception:
+        task.last_error = traceback.format_exc()
+        if task.attempts >= task.max_attempts:
+            task.status = Task.FAILED
+            logger.error('Task %s (#%s) failed permanently', task.name, task.pk)
+        else:
+            task.status = Task.QUEUED
+            task.run_at = timezone.now() + timedelta(seconds=retry_delay(task.attempts))
+    else:
+        task.status = Task.DONE
+        task.last_error = ''
+    task.locked_at = None
+    task.save(update_fields=['status', 'attempts', 'run_at', 'locked_at', 'last_error', 'updated_at'])
+    return task.status
+
+
+def work(stop_event, poll_interval=1.0):
+    """Claim and run tasks until ``stop_event`` is set, sleeping while idle."""
+    while not stop_event.is_set():
+        close_old_connections()
+        task = claim_task()
+        if task is None:
+            stop_event.wait(poll_interval)
+            continue
+        run_task(task)
+    close_old_connections()
+
+
+def work_in_process(stop_event, poll_interval=1.0):
+    """
+    Entry point for worker processes. Ctrl+C reaches the whole process group,
+    so children ignore it and finish their current task once the parent sets
+    ``stop_event``.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    work(stop_event, poll_interval)
+
+
+def run_pending(limit=None):
+    """Run due tasks in this thread until none are left; returns the count."""
+    count = 0
+    while limit is None or count < limit:
+        task = claim_task()
+        if task is None:
+            break
+        run_task(task)
+        count += 1
+    return count
@@ -13,7 +13,7 @@ class CustomUserAdmin(UserAdmin):
     fieldsets = (
         (None, {'fields': ('email', 'password')}),
         ('Personal info', {'fields': ('first_name', 'last_name')}),
-        ('Permissions', {'fields': ('is_active', 'is_customer', 'is_admin', 'is_staff')}),
+        ('Permissions', {'fields': ('is_active', 'is_customer', 'is_admin', 'is_staff', 'groups')}),
         ('Important dates', {'fields': ('last_login', 'date_joined')}),
     )
     
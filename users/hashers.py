@@ -0,0 +1,88 @@
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+)
+
+
+def hasher_param(profile, name, default):
+    """
+    Read a tuned cost parameter from ``settings.PASSWORD_HASHER_PARAMS``.
+    Parameters are read on every call so a recalibrated value (or
+    override_settings) applies without restarting the worker.
+    """
+    params = getattr(settings, 'PASSWORD_HASHER_PARAMS', {}).get(profile, {})
+    return params.get(name, default)
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 with an iteration count calibrated for the deployment host.
+    Stored hashes with a different count are rehashed on the next login.
+    """
+
+    @property
+    def iterations(self):
+        return hasher_param('pbkdf2', 'iterations', PBKDF2PasswordHasher.iterations)
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    """
+    Scrypt with a configurable work factor. Scrypt is memory hard, so it
+    gives the same protection as PBKDF2 at a fraction of the CPU time.
+    """
+
+    @property
+    def work_factor(self):
+        return hasher_param('scrypt', 'work_factor', ScryptPasswordHasher.work_factor)
+
+    @property
+    def block_size(self):
+        return hasher_param('scrypt', 'block_size', ScryptPasswordHasher.block_size)
+
+    @property
+    def parallelism(self):
+        return hasher_param('scrypt', 'parallelism', ScryptPasswordHasher.parallelism)
+
+    @property
+    def maxmem(self):
+        # scrypt needs ~128 * n * r bytes; OpenSSL's default cap is 32MB
+        return 2 * 128 * self.work_factor * self.block_size * max(self.parallelism, 1)
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2id with configurable costs. Needs the optional ``argon2-cffi`` package.
+    """
+
+    @property
+    def time_cost(self):
+        return hasher_param('argon2', 'time_cost', Argon2PasswordHasher.time_cost)
+
+    @property
+    def memory_cost(self):
+        return hasher_param('argon2', 'memory_cost', Argon2PasswordHasher.memory_cost)
+
+    @property
+    def parallelism(self):
+        return hasher_param('argon2', 'parallelism', Argon2PasswordHasher.parallelism)
+
+
+HASHER_PROFILES = {
+    'pbkdf2': TunedPBKDF2PasswordHasher,
+    'scrypt': TunedScryptPasswordHasher,
+    'argon2': TunedArgon2PasswordHasher,
+}
+
+
+def profile_available(profile):
+    """Argon2 is only usable when argon2-cffi is installed."""
+    hasher = HASHER_PROFILES[profile]()
+    if hasher.library is None:
+        return True
+    try:
+        hasher._load_library()
+    except ValueError:
+        return False
+    return True
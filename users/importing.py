@@ -0,0 +1,169 @@
+# users/importing.py
+import csv
+import json
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from store.models import Cart
+
+from .models import CustomUser
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+def read_rows(file, fmt, on_error=None):
+    """
+    Stream ``(line_number, row)`` pairs from a CSV (with a header row) or
+    JSON Lines file without loading it into memory. JSON lines that are not
+    an object are reported to ``on_error`` and skipped.
+    """
+    on_error = on_error or (lambda line_number, message: None)
+    if fmt == 'csv':
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as exc:
+                on_error(line_number, f'invalid JSON: {exc.msg}')
+                continue
+            if not isinstance(row, dict):
+                on_error(line_number, f'expected a JSON object, got {type(row).__name__}')
+                continue
+            yield line_number, row
+
+
+def _init_hash_worker():
+    # Needed when workers are spawned rather than forked
+    django.setup()
+
+
+def hash_password(password):
+    return make_password(password)
+
+
+def _clean_row(row):
+    """
+    Normalize one input row into CustomUser field values. Rows carry either
+    ``password`` (plaintext, hashed later) or ``password_hash`` (an encoded
+    hash in a format one of PASSWORD_HASHERS understands); neither means the
+    account gets an unusable password.
+    """
+    email = CustomUser.objects.normalize_email(str(row.get('email') or '').strip())
+    try:
+        validate_email(email)
+    except ValidationError:
+        raise ImportRowError(f'invalid email {email!r}')
+
+    fields = {
+        'email': email,
+        'first_name': str(row.get('first_name') or '')[:30],
+        'last_name': str(row.get('last_name') or '')[:30],
+    }
+    if row.get('date_joined'):
+        date_joined = parse_datetime(str(row['date_joined']))
+        if date_joined is None:
+            raise ImportRowError(f"invalid date_joined {row['date_joined']!r}")
+        if timezone.is_naive(date_joined):
+            date_joined = timezone.make_aware(date_joined)
+        fields['date_joined'] = date_joined
+    if row.get('is_active') not in (None, ''):
+        fields['is_active'] = str(row['is_active']).lower() in ('1', 'true', 'yes')
+
+    password_hash = str(row.get('password_hash') or '')
+    if password_hash:
+        try:
+            identify_hasher(password_hash)
+        except ValueError:
+            raise ImportRowError('password_hash is not in a supported format')
+        fields['password'] = password_hash
+    elif row.get('password'):
+        # Placeholder; replaced by the hashing pool
+        fields['plaintext'] = str(row['password'])
+    else:
+        fields['password'] = make_password(None)
+    return fields
+
+
+def _import_batch(rows, seen, pool, create_carts, dry_run, stats, on_error):
+    cleaned = []
+    for line_number, row in rows:
+        try:
+            fields = _clean_row(row)
+        except ImportRowError as exc:
+            stats['invalid'] += 1
+            on_error(line_number, str(exc))
+            continue
+        # Duplicates within the file: first occurrence wins
+        if fields['email'] in seen:
+            stats['duplicate'] += 1
+            continue
+        seen.add(fields['email'])
+        cleaned.append(fields)
+
+    # Duplicates against existing accounts: one lookup on the unique email index per batch
+    existing = set(
+        CustomUser.objects.filter(email__in=[fields['email'] for fields in cleaned])
+        .values_list('email', flat=True)
+    )
+    stats['existing'] += len(existing)
+    cleaned = [fields for fields in cleaned if fields['email'] not in existing]
+    if dry_run:
+        stats['would_create'] += len(cleaned)
+        return
+    if not cleaned:
+        return
+
+    to_hash = [fields for fields in cleaned if 'plaintext' in fields]
+    plaintexts = [fields.pop('plaintext') for fields in to_hash]
+    hashed = pool.map(hash_password, plaintexts, chunksize=16) if pool else map(hash_password, plaintexts)
+    for fields, encoded in zip(to_hash, hashed):
+        fields['password'] = encoded
+    stats['hashed'] += len(to_hash)
+
+    with transaction.atomic():
+        users = CustomUser.objects.bulk_create([CustomUser(**fields) for fields in cleaned])
+        if create_carts:
+            Cart.objects.bulk_create([Cart(user_id=user.pk) for user in users])
+            stats['carts'] += len(users)
+    stats['created'] += len(users)
+
+
+def import_users(rows, batch_size=1000, workers=None, create_carts=False, dry_run=False, on_error=None):
+    """
+    Create accounts from ``(line_number, row)`` pairs in batches of
+    ``batch_size``: validate and normalize, drop duplicates (in the file and
+    in the database), hash plaintext passwords in a pool of ``workers``
+    processes (0 hashes inline), then insert each batch with one
+    bulk_create in its own transaction. Returns a Counter of outcomes.
+    """
+    stats = Counter()
+    seen = set()
+    on_error = on_error or (lambda line_number, message: None)
+    rows = iter(rows)
+
+    pool = None
+    if workers != 0 and not dry_run:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_hash_worker)
+    try:
+        while batch := list(islice(rows, batch_size)):
+            _import_batch(batch, seen, pool, create_carts, dry_run, stats, on_error)
+    finally:
+        if pool:
+            pool.shutdown()
+    return stats
@@ -0,0 +1,81 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from users.hashers import HASHER_PROFILES, profile_available
+from users.models import CustomUser
+
+BENCH_PASSWORD = 'bench-Password-123'
+BENCH_DOMAIN = 'bench-login.invalid'
+# Django's stock PBKDF2 is the baseline the tuned profiles are compared to
+BASELINE = ('django-default', 'django.contrib.auth.hashers.PBKDF2PasswordHasher')
+
+
+class Command(BaseCommand):
+    help = 'Benchmark successful logins/sec through the login view per hasher profile.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=40, help='Logins per profile.')
+        parser.add_argument('--threads', type=int, default=4, help='Concurrent clients.')
+
+    def handle(self, *args, **options):
+        logins, threads = options['logins'], options['threads']
+        if logins < 1 or threads < 1:
+            raise CommandError('--logins and --threads must be positive.')
+        self.stdout.write(f'{logins} logins per profile on {threads} thread(s), POSTed to the login view')
+
+        runs = [BASELINE] + [
+            (profile, f'{hasher.__module__}.{hasher.__qualname__}')
+            for profile, hasher in sorted(HASHER_PROFILES.items())
+            if profile_available(profile)
+        ]
+        baseline = None
+        try:
+            for number, (name, hasher) in enumerate(runs):
+                hashers = [hasher] + [other for other in settings.PASSWORD_HASHERS if other != hasher]
+                with override_settings(PASSWORD_HASHERS=hashers):
+                    rate = self.measure(number, name, logins, threads)
+                baseline = baseline or rate
+                self.stdout.write(f'{name:>15}: {rate:8.1f} logins/s  ({rate / baseline:.1f}x baseline)')
+        finally:
+            CustomUser.objects.filter(email__endswith=f'@{BENCH_DOMAIN}').delete()
+
+    def measure(self, number, name, logins, threads):
+        # One account and one client address per login, so throttling runs but never trips
+        password = make_password(BENCH_PASSWORD)
+        emails = [f'{name}-{index}@{BENCH_DOMAIN}' for index in range(logins)]
+        CustomUser.objects.bulk_create([CustomUser(email=email, password=password) for email in emails])
+        clients = [
+            Client(HTTP_HOST=self.host(), REMOTE_ADDR=f'10.{number}.{index // 256}.{index % 256}')
+            for index in range(logins)
+        ]
+        url = reverse('users:login')
+
+        def log_in(index):
+            try:
+                return clients[index].post(url, {'email': emails[index], 'password': BENCH_PASSWORD}).status_code
+            finally:
+                connection.close()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            statuses = list(pool.map(log_in, range(logins)))
+        elapsed = time.perf_counter() - start
+        if any(status != 302 for status in statuses):
+            raise CommandError(f'{name}: logins answered {sorted(set(statuses))}, expected only 302 redirects.')
+        for client in clients:
+            client.logout()
+        return logins / elapsed
+
+    def host(self):
+        """A host name ALLOWED_HOSTS accepts."""
+        for host in settings.ALLOWED_HOSTS:
+            if host != '*':
+                return host.lstrip('.')
+        return 'localhost'
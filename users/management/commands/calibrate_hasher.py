@@ -0,0 +1,106 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.hashers import HASHER_PROFILES, profile_available
+
+SAMPLE_PASSWORD = 'calibrate-Password-123'
+SAMPLE_SALT = 'calibrationsalt0123456'
+
+
+def time_hash(hasher, repeat=3, **params):
+    """Best-of-``repeat`` wall time in milliseconds for one hash with ``params``."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        hasher.encode(SAMPLE_PASSWORD, SAMPLE_SALT, **params)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+class Command(BaseCommand):
+    help = 'Measure password hash time on this host and suggest PASSWORD_HASHER_PARAMS.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profile', choices=sorted(HASHER_PROFILES), default=None,
+            help='Hasher profile to calibrate (default: all available profiles).',
+        )
+        parser.add_argument(
+            '--target-ms', type=float, default=100.0,
+            help='Desired time for a single password hash in milliseconds.',
+        )
+
+    def handle(self, *args, **options):
+        target = options['target_ms']
+        if target <= 0:
+            raise CommandError('--target-ms must be positive.')
+
+        profiles = [options['profile']] if options['profile'] else sorted(HASHER_PROFILES)
+        for profile in profiles:
+            if not profile_available(profile):
+                self.stdout.write(self.style.WARNING(f'{profile}: library not installed, skipped.'))
+                continue
+            hasher = HASHER_PROFILES[profile]()
+            params = getattr(self, f'calibrate_{profile}')(hasher, target)
+            self.stdout.write(self.style.SUCCESS(f"'{profile}': {params!r},"))
+
+    def calibrate_pbkdf2(self, hasher, target):
+        # PBKDF2 cost is linear in the iteration count
+        probe = 100_000
+        elapsed = time_hash(hasher, iterations=probe)
+        iterations = max(int(probe * target / elapsed) // 10_000 * 10_000, 10_000)
+        current = time_hash(hasher)
+        self.stdout.write(
+            f'pbkdf2: {hasher.iterations} iterations take {current:.1f}ms, '
+            f'{iterations} iterations ~{elapsed * iterations / probe:.1f}ms'
+        )
+        return {'iterations': iterations}
+
+    def calibrate_scrypt(self, hasher, target):
+        # Work factor must be a power of two; pick the largest one within target
+        block_size, parallelism = hasher.block_size, hasher.parallelism
+        best = 2 ** 12
+        for exponent in range(12, 21):
+            work_factor = 2 ** exponent
+            elapsed = time_hash(_ScryptProbe(work_factor, block_size, parallelism))
+            self.stdout.write(f'scrypt: n=2**{exponent} takes {elapsed:.1f}ms')
+            if elapsed > target:
+                break
+            best = work_factor
+        return {'work_factor': best, 'block_size': block_size, 'parallelism': parallelism}
+
+    def calibrate_argon2(self, hasher, target):
+        memory_cost, parallelism = hasher.memory_cost, hasher.parallelism
+        best = 1
+        for time_cost in range(1, 11):
+            probe = _Argon2Probe(time_cost, memory_cost, parallelism)
+            elapsed = time_hash(probe)
+            self.stdout.write(f'argon2: time_cost={time_cost} takes {elapsed:.1f}ms')
+            if elapsed > target:
+                break
+            best = time_cost
+        return {'time_cost': best, 'memory_cost': memory_cost, 'parallelism': parallelism}
+
+
+class _ScryptProbe(HASHER_PROFILES['scrypt']):
+    """Scrypt hasher with fixed costs, used while searching for the work factor."""
+
+    def __init__(self, work_factor, block_size, parallelism):
+        self._costs = (work_factor, block_size, parallelism)
+
+    work_factor = property(lambda self: self._costs[0])
+    block_size = property(lambda self: self._costs[1])
+    parallelism = property(lambda self: self._costs[2])
+
+
+class _Argon2Probe(HASHER_PROFILES['argon2']):
+    """Argon2 hasher with fixed costs, used while searching for the time cost."""
+
+    def __init__(self, time_cost, memory_cost, parallelism):
+        self._costs = (time_cost, memory_cost, parallelism)
+
+    time_cost = property(lambda self: self._costs[0])
+    memory_cost = property(lambda self: self._costs[1])
+    parallelism = property(lambda self: self._costs[2])
@@ -0,0 +1,59 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.importing import import_users, read_rows
+
+MAX_REPORTED_ERRORS = 20
+
+
+class Command(BaseCommand):
+    help = 'Bulk-import customer accounts from a CSV or JSON Lines file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File with email, password or password_hash, first_name, last_name columns.')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Input format (default: from the file extension).')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk_create transaction.')
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Processes hashing plaintext passwords (0 hashes in this process).',
+        )
+        parser.add_argument('--create-carts', action='store_true', help='Create an empty Cart for each new user.')
+        parser.add_argument('--dry-run', action='store_true', help='Validate and count without writing anything.')
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or ('jsonl' if options['path'].endswith(('.jsonl', '.json')) else 'csv')
+        if options['batch_size'] < 1 or options['workers'] < 0:
+            raise CommandError('--batch-size must be positive and --workers non-negative.')
+
+        errors = []
+
+        def on_error(line_number, message):
+            errors.append(line_number)
+            if len(errors) <= MAX_REPORTED_ERRORS:
+                self.stderr.write(f'line {line_number}: {message}')
+
+        start = time.perf_counter()
+        try:
+            with open(options['path'], newline='', encoding='utf-8') as file:
+                stats = import_users(
+                    read_rows(file, fmt, on_error),
+                    batch_size=options['batch_size'],
+                    workers=options['workers'],
+                    create_carts=options['create_carts'],
+                    dry_run=options['dry_run'],
+                    on_error=on_error,
+                )
+        except (OSError, ValueError) as exc:
+            raise CommandError(f'Import stopped: {exc}')
+        elapsed = time.perf_counter() - start
+
+        if len(errors) > MAX_REPORTED_ERRORS:
+            self.stderr.write(f'... and {len(errors) - MAX_REPORTED_ERRORS} more invalid row(s).')
+        created = stats['would_create'] if options['dry_run'] else stats['created']
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Would create' if options['dry_run'] else 'Created'} {created} user(s) in {elapsed:.1f}s "
+            f"({stats['hashed']} password(s) hashed, {stats['carts']} cart(s)); "
+            f"skipped {stats['existing']} existing, {stats['duplicate']} duplicate, {len(errors)} invalid."
+        ))
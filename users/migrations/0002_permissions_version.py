@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='permissions_version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_permissions_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PermissionsVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(default=1)),
+            ],
+        ),
+    ]
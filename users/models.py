@@ -1,7 +1,10 @@
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
+from django.db.models import F
 from django.utils import timezone
 
+from .roles import ROLE_FLAGS, get_access
+
 class CustomUserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
         if not email:
@@ -42,6 +45,10 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
 
     # Required for Django admin and permissions
     is_staff = models.BooleanField(default=False)
+
+    # Bumped whenever the user's roles or permissions change; part of the
+    # access cache key (see users.roles)
+    permissions_version = models.PositiveIntegerField(default=1, editable=False)
     
     objects = CustomUserManager()
 
@@ -55,8 +62,87 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return self.email
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded flags so save() can tell whether roles changed
+        instance._loaded_role_flags = instance._role_flags()
+        return instance
+
+    def _role_flags(self):
+        # Only flags already loaded; deferred ones can't have been edited
+        return {flag: self.__dict__[flag] for flag in ROLE_FLAGS if flag in self.__dict__}
+
+    def _role_flags_changed(self):
+        loaded = getattr(self, '_loaded_role_flags', None)
+        if loaded is None:
+            return False
+        return any(self.__dict__.get(flag) != value for flag, value in loaded.items())
+
+    def save(self, *args, **kwargs):
+        if self._role_flags_changed():
+            self.permissions_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'permissions_version'}
+        super().save(*args, **kwargs)
+        self._loaded_role_flags = self._role_flags()
+        self.__dict__.pop('_access_cache', None)
+
+    def invalidate_access(self):
+        """Retire cached roles/permissions after a change save() can't see (e.g. groups)."""
+        CustomUser.objects.filter(pk=self.pk).update(permissions_version=F('permissions_version') + 1)
+        self.refresh_from_db(fields=['permissions_version'])
+        self.__dict__.pop('_access_cache', None)
+
+    @property
+    def roles(self):
+        return get_access(self)['roles']
+
+    def has_role(self, role):
+        return role in self.roles
+
+    # Model-level permission checks are answered from the cached access set
+    # instead of querying groups and permissions through the auth backends.
+    # Object-level checks still go through the backends.
+
+    def get_all_permissions(self, obj=None):
+        if obj is not None:
+            return super().get_all_permissions(obj)
+        return set(get_access(self)['permissions'])
+
+    def has_perm(self, perm, obj=None):
+        if obj is not None:
+            return super().has_perm(perm, obj)
+        if self.is_active and self.is_superuser:
+            return True
+        return self.is_active and perm in get_access(self)['permissions']
+
+    def has_perms(self, perm_list, obj=None):
+        return all(self.has_perm(perm, obj) for perm in perm_list)
+
+    def has_module_perms(self, app_label):
+        if self.is_active and self.is_superuser:
+            return True
+        if not self.is_active:
+            return False
+        prefix = f'{app_label}.'
+        return any(perm.startswith(prefix) for perm in get_access(self)['permissions'])
+
     def is_store_admin(self):
         return self.is_admin
 
     def is_regular_customer(self):
-        return self.is_customer and not self.is_admin
\ No newline at end of file
+        return self.is_customer and not self.is_admin
+
+
+class PermissionsVersion(models.Model):
+    """
+    The site-wide permissions version (one row), part of every access cache
+    key. Kept in the database like CustomUser.permissions_version, so a bump
+    reaches every worker as soon as it commits.
+    """
+    version = models.PositiveIntegerField(default=1)
+
+    def __str__(self):
+        return f"Permissions version {self.version}"
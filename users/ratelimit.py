@@ -0,0 +1,132 @@
+import hashlib
+import math
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+
+DEFAULT_LOGIN_RATE_LIMIT = {
+    # Token bucket per client IP: burst size and refill rate
+    'ip_capacity': 20,
+    'ip_refill_per_minute': 10,
+    # Token bucket per email address
+    'email_capacity': 10,
+    'email_refill_per_minute': 5,
+    # Sliding window of failed attempts per email address
+    'email_max_failures': 5,
+    'failure_window': 15 * 60,
+}
+
+# A bucket's lock expires after this many seconds, in case its holder died
+BUCKET_LOCK_TIMEOUT = 5
+# Seconds an attempt waits for a bucket's lock before it is throttled
+BUCKET_LOCK_WAIT = 1.0
+
+
+def get_login_rate_limit():
+    return {**DEFAULT_LOGIN_RATE_LIMIT, **getattr(settings, 'LOGIN_RATE_LIMIT', {})}
+
+
+def client_ip(request):
+    return request.META.get('REMOTE_ADDR', '') if request is not None else ''
+
+
+@contextmanager
+def bucket_lock(key):
+    """
+    Hold the lock of the bucket under ``key``; yields False if it could not
+    be had within BUCKET_LOCK_WAIT. ``cache.add`` is atomic, so concurrent
+    attempts (in any process sharing the cache) update a bucket one at a time.
+    """
+    lock_key = f'{key}:lock'
+    deadline = time.monotonic() + BUCKET_LOCK_WAIT
+    while not cache.add(lock_key, 1, timeout=BUCKET_LOCK_TIMEOUT):
+        if time.monotonic() > deadline:
+            yield False
+            return
+        time.sleep(0.001)
+    try:
+        yield True
+    finally:
+        cache.delete(lock_key)
+
+
+def take_token(key, capacity, refill_per_minute, now=None):
+    """
+    Take one token from the bucket stored under ``key`` in the cache.
+    Returns 0 when a token was taken, otherwise the seconds until one is free.
+    """
+    refill_rate = refill_per_minute / 60.0
+    with bucket_lock(key) as locked:
+        if not locked:
+            # Only a flood of attempts on one bucket keeps its lock busy this long
+            return 1
+        now = time.time() if now is None else now
+        tokens, stamp = cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + max(now - stamp, 0) * refill_rate)
+        if tokens < 1:
+            return math.ceil((1 - tokens) / refill_rate)
+        cache.set(key, (tokens - 1, now), timeout=math.ceil(capacity / refill_rate))
+    return 0
+
+
+class LoginRateLimiter:
+    """
+    Guards a login attempt before the password is hashed.
+
+    Every attempt takes a token from a per-IP and a per-email bucket, and
+    failed attempts are counted per email in a sliding window. Counters live
+    in the Django cache, so rejected requests never reach ``authenticate``.
+    """
+
+    def __init__(self, request, email):
+        self.limits = get_login_rate_limit()
+        self.ip = client_ip(request)
+        digest = hashlib.sha256((email or '').strip().lower().encode()).hexdigest()[:32]
+        self.email_key = f'login:email:{digest}'
+        self.ip_key = f'login:ip:{self.ip}'
+        self.failures_key = f'login:failures:{digest}'
+
+    def _failure_keys(self, now):
+        window = self.limits['failure_window']
+        current = int(now // window)
+        return f'{self.failures_key}:{current}', f'{self.failures_key}:{current - 1}'
+
+    def recent_failures(self, now=None):
+        """Failed attempts in the last window, weighting the previous window."""
+        now = time.time() if now is None else now
+        window = self.limits['failure_window']
+        current_key, previous_key = self._failure_keys(now)
+        counts = cache.get_many([current_key, previous_key])
+        overlap = 1 - (now % window) / window
+        return counts.get(current_key, 0) + counts.get(previous_key, 0) * overlap
+
+    def check(self):
+        """Return 0 if the attempt may go ahead, else the seconds to wait."""
+        now = time.time()
+        if self.recent_failures(now) >= self.limits['email_max_failures']:
+            return math.ceil(self.limits['failure_window'] - now % self.limits['failure_window'])
+
+        wait = 0
+        if self.ip:
+            wait = take_token(
+                self.ip_key, self.limits['ip_capacity'], self.limits['ip_refill_per_minute'], now
+            )
+        if not wait:
+            wait = take_token(
+                self.email_key, self.limits['email_capacity'], self.limits['email_refill_per_minute'], now
+            )
+        return wait
+
+    def failed(self):
+        current_key, _ = self._failure_keys(time.time())
+        cache.add(current_key, 0, timeout=2 * self.limits['failure_window'])
+        try:
+            cache.incr(current_key)
+        except ValueError:
+            # Evicted between add() and incr()
+            cache.set(current_key, 1, timeout=2 * self.limits['failure_window'])
+
+    def succeeded(self):
+        cache.delete_many(list(self._failure_keys(time.time())))
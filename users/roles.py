@@ -0,0 +1,91 @@
+# users/roles.py
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+
+# Roles that come from CustomUser flags; every Group the user is in is also a role
+SUPERUSER = 'superuser'
+ADMIN = 'admin'
+STAFF = 'staff'
+CUSTOMER = 'customer'
+
+PERMISSIONS_VERSION_ID = 1
+ACCESS_CACHE_TIMEOUT = 5 * 60
+
+# Changing any of these changes a user's roles or permissions
+ROLE_FLAGS = ('is_active', 'is_customer', 'is_admin', 'is_staff', 'is_superuser')
+
+
+def get_permissions_version():
+    """
+    Site-wide version folded into every access cache key. Bumped when a
+    Group's permissions change, which affects all of its members at once.
+    Read from the database (one primary-key lookup), so all workers agree.
+    """
+    from .models import PermissionsVersion
+
+    version = PermissionsVersion.objects.filter(pk=PERMISSIONS_VERSION_ID).values_list('version', flat=True).first()
+    return version or 1
+
+
+def bump_permissions_version():
+    """Move the site-wide version on, in the caller's transaction."""
+    from .models import PermissionsVersion
+
+    versions = PermissionsVersion.objects.filter(pk=PERMISSIONS_VERSION_ID)
+    if versions.update(version=F('version') + 1):
+        return
+    try:
+        with transaction.atomic():
+            PermissionsVersion.objects.create(pk=PERMISSIONS_VERSION_ID, version=2)
+    except IntegrityError:
+        # Created concurrently
+        versions.update(version=F('version') + 1)
+
+
+def access_cache_key(user):
+    return f'users:access:{user.pk}:{user.permissions_version}:{get_permissions_version()}'
+
+
+def _resolve_access(user):
+    """Compute roles and "app_label.codename" permissions with two queries."""
+    roles = set()
+    if user.is_superuser:
+        roles.add(SUPERUSER)
+    if user.is_admin:
+        roles.add(ADMIN)
+    if user.is_staff:
+        roles.add(STAFF)
+    if user.is_regular_customer():
+        roles.add(CUSTOMER)
+    roles.update(user.groups.values_list('name', flat=True))
+
+    permissions = set()
+    if user.is_active:
+        queryset = Permission.objects.all()
+        if not user.is_superuser:
+            queryset = queryset.filter(Q(user=user) | Q(group__user=user)).distinct()
+        permissions = {
+            f'{app_label}.{codename}'
+            for app_label, codename in queryset.values_list('content_type__app_label', 'codename')
+        }
+    return {'roles': frozenset(roles), 'permissions': frozenset(permissions)}
+
+
+def get_access(user):
+    """
+    Effective roles and permissions of ``user``. Memoized on the instance for
+    the rest of the request and in the cache across requests; the key carries
+    the user's and the site's permission versions, so a bump of either one
+    retires the cached entry.
+    """
+    access = getattr(user, '_access_cache', None)
+    if access is None:
+        key = access_cache_key(user)
+        access = cache.get(key)
+        if access is None:
+            access = _resolve_access(user)
+            cache.set(key, access, ACCESS_CACHE_TIMEOUT)
+        user._access_cache = access
+    return access
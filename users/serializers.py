@@ -1,6 +1,7 @@
-from rest_framework import serializers
+from rest_framework import exceptions, serializers
 from django.contrib.auth import authenticate
 from .models import CustomUser
+from .ratelimit import LoginRateLimiter
 
 class CustomerSignupSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, min_length=8)
@@ -40,10 +41,19 @@ class UserLoginSerializer(serializers.Serializer):
         password = attrs.get('password')
 
         if email and password:
-            user = authenticate(request=self.context.get('request'), 
+            request = self.context.get('request')
+            # Throttle before authenticate() so rejected attempts skip the password hash
+            limiter = LoginRateLimiter(request, email)
+            retry_after = limiter.check()
+            if retry_after:
+                raise exceptions.Throttled(wait=retry_after)
+
+            user = authenticate(request=request, 
                               email=email, password=password)
             if not user:
+                limiter.failed()
                 raise serializers.ValidationError('Unable to log in with provided credentials.')
+            limiter.succeeded()
             if not user.is_active:
                 raise serializers.ValidationError('User account is disabled.')
         else:
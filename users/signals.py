@@ -0,0 +1,34 @@
+# users/signals.py
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .models import CustomUser
+from .roles import bump_permissions_version
+
+MEMBERSHIP_ACTIONS = ('post_add', 'post_remove', 'post_clear')
+
+
+@receiver(m2m_changed, sender=CustomUser.groups.through)
+@receiver(m2m_changed, sender=CustomUser.user_permissions.through)
+def user_access_changed(sender, instance, action, reverse, **kwargs):
+    if action not in MEMBERSHIP_ACTIONS:
+        return
+    if reverse:
+        # Changed from the Group/Permission side (group.user_set.add(...)):
+        # the affected users aren't all known, so retire every cached entry
+        bump_permissions_version()
+    else:
+        instance.invalidate_access()
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def group_permissions_changed(sender, action, **kwargs):
+    if action in MEMBERSHIP_ACTIONS:
+        bump_permissions_version()
+
+
+@receiver([post_save, post_delete], sender=Group)
+def group_changed(sender, **kwargs):
+    # Group names are roles, and deleting a group drops its memberships
+    bump_permissions_version()
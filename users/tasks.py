@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.mail import send_mail
+
+from taskqueue.queue import task
+from .models import CustomUser
+
+
+@task(max_attempts=3)
+def send_welcome_email(user_id):
+    """
+    Welcome email sent after customer signup
+    """
+    user = CustomUser.objects.get(pk=user_id)
+    send_mail(
+        subject='Welcome to DD Creation',
+        message=f'Hi {user.first_name or user.email},\n\nThanks for creating an account with DD Creation. Happy shopping!',
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient_list=[user.email],
+    )
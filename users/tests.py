@@ -1,3 +1,66 @@
-from django.test import TestCase
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.hashers import MD5PasswordHasher
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from .models import CustomUser
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    LOGIN_RATE_LIMIT={'email_capacity': 10, 'ip_capacity': 100, 'email_max_failures': 1000},
+)
+class LoginRateLimitConcurrencyTest(TransactionTestCase):
+    attempts = 40
+
+    def setUp(self):
+        cache.clear()
+        CustomUser.objects.create_user(email='shopper@example.com', password='right-password')
+
+    def test_rejected_attempts_never_reach_the_hasher(self):
+        hashed = []
+        verify = MD5PasswordHasher.verify
+        cache_get = LocMemCache.get
+
+        def counting_verify(hasher, password, encoded):
+            hashed.append(password)
+            return verify(hasher, password, encoded)
+
+        def slow_get(backend, *args, **kwargs):
+            # Widen the window between reading a bucket and writing it back
+            value = cache_get(backend, *args, **kwargs)
+            time.sleep(0.005)
+            return value
+
+        statuses = []
+        start = threading.Barrier(self.attempts)
+
+        def attempt():
+            client = Client()
+            start.wait()
+            try:
+                response = client.post(
+                    reverse('users:login'), {'email': 'shopper@example.com', 'password': 'wrong-password'},
+                )
+                statuses.append(response.status_code)
+            finally:
+                connection.close()
+
+        with mock.patch.object(MD5PasswordHasher, 'verify', counting_verify), \
+                mock.patch.object(LocMemCache, 'get', slow_get):
+            threads = [threading.Thread(target=attempt) for _ in range(self.attempts)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(statuses), self.attempts)
+        self.assertEqual(statuses.count(429), self.attempts - 10)
+        # Only the attempts that got an email token were hashed
+        self.assertEqual(len(hashed), 10)
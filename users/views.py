@@ -2,7 +2,10 @@ from django.shortcuts import render, redirect, get_list_or_404, get_object_or_40
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
+from store.guest_cart import merge_guest_cart
 from .forms import CustomerSignupForm
+from .ratelimit import LoginRateLimiter
+from .tasks import send_welcome_email
 
 
 
@@ -15,11 +18,14 @@ def customer_signup(request):
         form = CustomerSignupForm(request.POST)
         if form.is_valid():
             user = form.save()
+            send_welcome_email.delay(user.pk)
             
             # Auto-login after signup
             login(request, user)
             messages.success(request, 'Account created successfully! Welcome to our store.')
-            return redirect('store:product_list')  # Adjust based on your store URL name
+            response = redirect('store:product_list')  # Adjust based on your store URL name
+            merge_guest_cart(request, user, response)
+            return response
         else:
             messages.error(request, 'Please correct the errors below.')
     else:
@@ -34,17 +40,30 @@ def customer_login(request):
     if request.method == 'POST':
         email = request.POST.get('email')
         password = request.POST.get('password')
+
+        # Reject throttled attempts before authenticate() pays for a password hash
+        limiter = LoginRateLimiter(request, email)
+        retry_after = limiter.check()
+        if retry_after:
+            messages.error(request, f'Too many login attempts. Please try again in {retry_after} seconds.')
+            response = render(request, 'users/login.html', status=429)
+            response['Retry-After'] = str(retry_after)
+            return response
         
         user = authenticate(request, email=email, password=password)
         
         if user is not None:
+            limiter.succeeded()
             if user.is_regular_customer():  # Only allow customers to login
                 login(request, user)
                 messages.success(request, f'Welcome back, {user.first_name}!')
-                return redirect('store:product_list')  # Adjust based on your store URL name
+                response = redirect('store:product_list')  # Adjust based on your store URL name
+                merge_guest_cart(request, user, response)
+                return response
             else:
                 messages.error(request, 'This login is for customers only.')
         else:
+            limiter.failed()
             messages.error(request, 'Invalid email or password.')
     
     return render(request, 'users/login.html')